@@ -0,0 +1,257 @@
+import bisect
+import re
+import threading
+import unicodedata
+from array import array
+from datetime import datetime
+from functools import lru_cache
+
+from historial import a_dict
+
+# Campos de texto libre que entran en el índice invertido
+CAMPOS_TEXTO = ("nombre", "titulo", "profesion", "rasgo", "motivacion")
+
+# Facetas de valor exacto
+CAMPOS_FACETA = ("estilo", "genero")
+
+PALABRA = re.compile(r"\w+")
+
+# Prefijos de "AAAA-MM-DD HH:MM:SS" aceptados como fecha, con sus dígitos significativos
+FORMATOS_FECHA = (
+    ("%Y-%m-%d %H:%M:%S", 14),
+    ("%Y-%m-%d %H:%M", 12),
+    ("%Y-%m-%d %H", 10),
+    ("%Y-%m-%d", 8),
+    ("%Y-%m", 6),
+    ("%Y", 4),
+)
+
+
+@lru_cache(maxsize=65536)
+def normalizar(texto):
+    """Pasa un texto a minúsculas y sin tildes, para comparar sin distinguirlas"""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def tokenizar(texto):
+    """Palabras normalizadas de un texto, sin repetir"""
+    return tuple(dict.fromkeys(PALABRA.findall(normalizar(texto))))
+
+
+@lru_cache(maxsize=4096)
+def clave_fecha(fecha, fin=False):
+    """Convierte una fecha "AAAA-MM-DD[ HH:MM:SS]" en un entero comparable
+
+    Los componentes que falten se completan con el principio del periodo, o
+    con el final si fin es True, de modo que "2024-05-01" como límite superior
+    incluye todo ese día. Lanza ValueError si la fecha no es válida.
+    """
+    texto = str(fecha).strip()
+    for formato, longitud in FORMATOS_FECHA:
+        try:
+            valor = datetime.strptime(texto, formato)
+        except ValueError:
+            continue
+        digitos = valor.strftime("%Y%m%d%H%M%S")[:longitud]
+        return int(digitos.ljust(14, "9" if fin else "0"))
+    raise ValueError(f"Fecha no válida: {fecha!r} (formato AAAA-MM-DD HH:MM:SS)")
+
+
+def filtro_personajes(texto="", estilo=None, genero=None, desde=None, hasta=None):
+    """Predicado con los criterios de IndiceBusqueda.buscar para un solo personaje
+
+    Sirve para filtrar mientras se recorre el historial (p. ej. al exportar)
+    sin construir el índice, así que la memoria no depende del historial.
+    Lanza ValueError si alguna fecha no es válida.
+    """
+    palabras = tokenizar(texto or "")
+    estilo = normalizar(estilo) if estilo else None
+    genero = normalizar(genero) if genero else None
+    inicio = clave_fecha(desde) if desde else None
+    fin = clave_fecha(hasta, fin=True) if hasta else None
+
+    def cumple(personaje):
+        if estilo is not None and normalizar(personaje.get("estilo") or "") != estilo:
+            return False
+        if genero is not None and normalizar(personaje.get("genero") or "") != genero:
+            return False
+        if inicio is not None or fin is not None:
+            try:
+                clave = clave_fecha(personaje.get("fecha_generacion") or "")
+            except ValueError:
+                return False
+            if (inicio is not None and clave < inicio) or (fin is not None and clave > fin):
+                return False
+        if palabras:
+            propias = set()
+            for campo in CAMPOS_TEXTO:
+                valor = personaje.get(campo)
+                if valor:
+                    propias.update(tokenizar(valor))
+            return all(any(propia.startswith(palabra) for propia in propias) for palabra in palabras)
+        return True
+
+    return cumple
+
+
+class IndiceBusqueda:
+    """Índice en memoria para buscar y filtrar el historial de personajes
+
+    Mantiene un índice invertido (palabra -> posiciones en el historial) sobre
+    los campos de CAMPOS_TEXTO, una faceta por estilo y género y las fechas de
+    generación ordenadas para consultas por rango. Las listas de posiciones
+    son array('I') en orden creciente, así que añadir personajes es O(1) por
+    palabra; actualizar() indexa solo los añadidos desde la última vez y
+    vuelve a empezar si el historial es más corto. Si el historial se vacía y
+    puede volver a crecer antes de la siguiente actualización, hay que llamar
+    a reiniciar() al vaciarlo.
+    """
+
+    def __init__(self, historial):
+        self.historial = historial
+        self._cerrojo = threading.Lock()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        self.indexados = 0
+        self._palabras = {}
+        self._vocabulario = []  # Palabras ordenadas, para buscar por prefijo
+        self._facetas = {campo: {} for campo in CAMPOS_FACETA}
+        self._fechas = array("q")
+        self._fechas_pos = array("I")
+        self._fechas_ordenadas = True  # _fechas_pos sigue el orden del historial
+
+    def reiniciar(self):
+        """Descarta todo lo indexado (p. ej. al borrar el historial)"""
+        with self._cerrojo:
+            self._reiniciar()
+
+    def actualizar(self):
+        """Indexa los personajes añadidos al historial; devuelve cuántos"""
+        with self._cerrojo:
+            total = len(self.historial)
+            if total < self.indexados:
+                self._reiniciar()
+            inicio = self.indexados
+            try:
+                for i in range(inicio, total):
+                    self._indexar(i, self.historial[i])
+            except IndexError:
+                # El historial se ha vaciado mientras se indexaba
+                self._reiniciar()
+                return 0
+            self.indexados = total
+            return total - inicio
+
+    def _indexar(self, i, personaje):
+        if not isinstance(personaje, dict):
+            personaje = a_dict(personaje)  # Personaje compacto: materializar una vez
+
+        for campo in CAMPOS_TEXTO:
+            valor = personaje.get(campo)
+            if not valor:
+                continue
+            for palabra in tokenizar(valor):
+                posiciones = self._palabras.get(palabra)
+                if posiciones is None:
+                    posiciones = self._palabras[palabra] = array("I")
+                    bisect.insort(self._vocabulario, palabra)
+                elif posiciones[-1] == i:
+                    continue  # Ya indexada por otro campo de este personaje
+                posiciones.append(i)
+
+        for campo in CAMPOS_FACETA:
+            valor = personaje.get(campo)
+            if valor:
+                self._facetas[campo].setdefault(normalizar(valor), array("I")).append(i)
+
+        fecha = personaje.get("fecha_generacion")
+        if fecha:
+            try:
+                clave = clave_fecha(fecha)
+            except ValueError:
+                return
+            if not self._fechas or clave >= self._fechas[-1]:
+                self._fechas.append(clave)
+                self._fechas_pos.append(i)
+            else:
+                # Fecha anterior a la última indexada (p. ej. un historial importado)
+                j = bisect.bisect_right(self._fechas, clave)
+                self._fechas.insert(j, clave)
+                self._fechas_pos.insert(j, i)
+                self._fechas_ordenadas = False
+
+    def valores(self, campo):
+        """Valores distintos (normalizados) de una faceta"""
+        with self._cerrojo:
+            return sorted(self._facetas[campo])
+
+    def buscar(self, texto="", estilo=None, genero=None, desde=None, hasta=None):
+        """Posiciones del historial que cumplen todos los criterios
+
+        Cada palabra de texto debe aparecer (como palabra o comienzo de
+        palabra) en alguno de los campos de texto; estilo y genero filtran por
+        valor exacto y desde/hasta por fecha de generación, ambos incluidos.
+        Devuelve un array de NumPy con las posiciones de la más reciente a la
+        más antigua. Lanza ValueError si alguna fecha no es válida.
+        """
+        import numpy as np
+
+        inicio = clave_fecha(desde) if desde else None
+        fin = clave_fecha(hasta, fin=True) if hasta else None
+
+        with self._cerrojo:
+            conjuntos = []
+            for palabra in tokenizar(texto or ""):
+                conjuntos.append(self._por_prefijo(palabra))
+            for campo, valor in (("estilo", estilo), ("genero", genero)):
+                if valor:
+                    posiciones = self._facetas[campo].get(normalizar(valor))
+                    conjuntos.append(np.frombuffer(posiciones, dtype=np.uint32) if posiciones
+                                     else np.empty(0, dtype=np.uint32))
+            if inicio is not None or fin is not None:
+                conjuntos.append(self._por_fechas(inicio, fin))
+
+            if not conjuntos:
+                return np.arange(self.indexados - 1, -1, -1, dtype=np.uint32)
+
+            # Intersecar empezando por el más pequeño: cada paso es una búsqueda
+            # binaria vectorizada de los candidatos en el siguiente conjunto
+            conjuntos.sort(key=len)
+            resultado = conjuntos[0]
+            for conjunto in conjuntos[1:]:
+                if not len(resultado):
+                    break
+                j = np.searchsorted(conjunto, resultado)
+                j[j == len(conjunto)] = 0
+                resultado = resultado[conjunto[j] == resultado] if len(conjunto) else conjunto
+            return resultado[::-1].copy()
+
+    def _por_prefijo(self, prefijo):
+        """Posiciones (ordenadas) con alguna palabra que empieza por prefijo"""
+        import numpy as np
+
+        j = bisect.bisect_left(self._vocabulario, prefijo)
+        listas = []
+        while j < len(self._vocabulario) and self._vocabulario[j].startswith(prefijo):
+            listas.append(np.frombuffer(self._palabras[self._vocabulario[j]], dtype=np.uint32))
+            j += 1
+        if not listas:
+            return np.empty(0, dtype=np.uint32)
+        if len(listas) == 1:
+            return listas[0]
+        return np.unique(np.concatenate(listas))
+
+    def _por_fechas(self, inicio, fin):
+        """Posiciones (ordenadas) generadas entre inicio y fin, ambos incluidos"""
+        import numpy as np
+
+        fechas = np.frombuffer(self._fechas, dtype=np.int64) if self._fechas else np.empty(0, dtype=np.int64)
+        a = 0 if inicio is None else np.searchsorted(fechas, inicio, side="left")
+        b = len(fechas) if fin is None else np.searchsorted(fechas, fin, side="right")
+        if a >= b:
+            return np.empty(0, dtype=np.uint32)
+        posiciones = np.frombuffer(self._fechas_pos, dtype=np.uint32)[a:b]
+        return posiciones if self._fechas_ordenadas else np.sort(posiciones)
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class CacheRespuestas:
+    """Caché persistente (SQLite) de respuestas de la IA
+
+    Cada clave identifica una configuración de generación (modelo, plantilla
+    de prompt, género, estilo, detallado). Para no devolver siempre el mismo
+    personaje se guardan hasta `variedad` respuestas por clave: mientras haya
+    menos se cuenta como fallo y se pide una nueva a la API; con todas
+    guardadas se van rotando. Las entradas caducan tras `ttl` segundos y, si
+    se supera `max_entradas` o el contenido guardado pasa de `max_bytes`, se
+    eliminan las menos usadas recientemente (0 desactiva cada límite).
+    """
+
+    def __init__(self, ruta, ttl=86400, max_entradas=5000, variedad=1, max_bytes=0):
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.variedad = max(1, variedad)
+
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojadas = 0
+
+        self._lock = threading.Lock()
+        self._conexion = sqlite3.connect(ruta, check_same_thread=False)
+        self._conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS respuestas (
+                id INTEGER PRIMARY KEY,
+                clave TEXT NOT NULL,
+                contenido TEXT NOT NULL,
+                creado REAL NOT NULL,
+                usado REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS respuestas_clave ON respuestas (clave, usado);
+            CREATE INDEX IF NOT EXISTS respuestas_usado ON respuestas (usado);
+        """)
+        self._conexion.commit()
+
+    @staticmethod
+    def clave(modelo, plantilla, genero, estilo, detallado):
+        """Calcula la clave de caché de una configuración de generación"""
+        datos = json.dumps([modelo, plantilla, genero, estilo, bool(detallado)], ensure_ascii=False)
+        return hashlib.sha256(datos.encode("utf-8")).hexdigest()
+
+    def obtener(self, clave):
+        """Devuelve una respuesta guardada para la clave, o None si hay que pedir otra"""
+        ahora = time.time()
+        with self._lock:
+            cursor = self._conexion.cursor()
+            if self.ttl:
+                cursor.execute(
+                    "DELETE FROM respuestas WHERE clave = ? AND creado < ?",
+                    (clave, ahora - self.ttl)
+                )
+
+            # La menos usada recientemente, para rotar entre las guardadas
+            filas = cursor.execute(
+                "SELECT id, contenido FROM respuestas WHERE clave = ? ORDER BY usado LIMIT ?",
+                (clave, self.variedad)
+            ).fetchall()
+
+            if len(filas) < self.variedad:
+                self.fallos += 1
+                self._conexion.commit()
+                return None
+
+            id_fila, contenido = filas[0]
+            cursor.execute("UPDATE respuestas SET usado = ? WHERE id = ?", (ahora, id_fila))
+            self._conexion.commit()
+            self.aciertos += 1
+            return contenido
+
+    def guardar(self, clave, contenido):
+        """Guarda una respuesta y desaloja las entradas más antiguas si sobran
+
+        No se guardan más de `variedad` respuestas por clave (p. ej. cuando
+        una petición por grupos trae varios personajes de la misma clave).
+        """
+        ahora = time.time()
+        with self._lock:
+            cursor = self._conexion.cursor()
+            guardadas = cursor.execute("SELECT COUNT(*) FROM respuestas WHERE clave = ?", (clave,)).fetchone()[0]
+            if guardadas >= self.variedad:
+                return
+            cursor.execute(
+                "INSERT INTO respuestas (clave, contenido, creado, usado) VALUES (?, ?, ?, ?)",
+                (clave, contenido, ahora, ahora)
+            )
+
+            total, tamano = cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(contenido AS BLOB))), 0) FROM respuestas"
+            ).fetchone()
+            sobrantes = total - self.max_entradas if self.max_entradas else 0
+            exceso = tamano - self.max_bytes if self.max_bytes else 0
+            if sobrantes > 0 or exceso > 0:
+                # Las menos usadas hasta cumplir los dos límites
+                desalojar = []
+                filas = cursor.execute(
+                    "SELECT id, LENGTH(CAST(contenido AS BLOB)) FROM respuestas ORDER BY usado"
+                )
+                for id_fila, bytes_fila in filas:
+                    if len(desalojar) >= sobrantes and exceso <= 0:
+                        break
+                    desalojar.append((id_fila,))
+                    exceso -= bytes_fila
+                cursor.executemany("DELETE FROM respuestas WHERE id = ?", desalojar)
+                self.desalojadas += len(desalojar)
+            self._conexion.commit()
+
+    def estadisticas(self):
+        """Devuelve los contadores de la caché para poder dimensionarla"""
+        with self._lock:
+            entradas, tamano = self._conexion.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(contenido AS BLOB))), 0) FROM respuestas"
+            ).fetchone()
+        consultas = self.aciertos + self.fallos
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+            "entradas": entradas,
+            "bytes": tamano,
+            "desalojadas": self.desalojadas
+        }
+
+    def limpiar(self):
+        """Elimina todas las respuestas guardadas"""
+        with self._lock:
+            self._conexion.execute("DELETE FROM respuestas")
+            self._conexion.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
@@ -1,116 +1,322 @@
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog
+import argparse
+import base64
+import contextlib
+import csv
+import hashlib
 import json
 import random
 import os
-import requests
+import re
+import struct
+import sys
 import threading
 import time
+from collections import Counter, namedtuple
+from itertools import combinations, islice
+from collections.abc import Mapping
 from datetime import datetime
 
-class TkinterCustomTheme:
-    """Clase para aplicar tema personalizado a Tkinter"""
-    
-    def __init__(self, root, theme_data):
-        self.root = root
-        self.colors = theme_data["colors"]
-        
-        # Configurar estilos
-        self.style = ttk.Style()
-        self.style.theme_use('clam')  # Usar clam como base
-        
-        # Configurar colores del tema
-        self.configure_styles()
-        
-        # Configurar opciones globales para los menús desplegables
-        self.root.option_add('*TCombobox*Listbox.background', '#d0d0d0')  # Fondo gris claro
-        self.root.option_add('*TCombobox*Listbox.foreground', '#000000')  # Texto negro
-        self.root.option_add('*TCombobox*Listbox.selectBackground', self.colors["accent"])
-        self.root.option_add('*TCombobox*Listbox.selectForeground', '#ffffff')
-        
-        # Aplicar color de fondo a la ventana principal
-        root.configure(bg=self.colors["background"])
-    
-    def configure_styles(self):
-        # Estilo de widget TFrame
-        self.style.configure(
-            "Custom.TFrame",
-            background=self.colors["background"]
-        )
-        
-        # Estilo de widget TLabel
-        self.style.configure(
-            "Custom.TLabel",
-            background=self.colors["background"],
-            foreground=self.colors["text"]
-        )
-        
-        # Estilo de widget TLabel para títulos
-        self.style.configure(
-            "Title.TLabel",
-            background=self.colors["background"],
-            foreground=self.colors["accent"],
-            font=("Helvetica", 14, "bold")
-        )
-        
-        # Estilo de widget TButton
-        self.style.configure(
-            "Custom.TButton",
-            background=self.colors["button"],
-            foreground=self.colors["text"],
-            borderwidth=1,
-            focusthickness=3,
-            focuscolor=self.colors["accent"]
-        )
-        self.style.map(
-            "Custom.TButton",
-            background=[("active", self.colors["accent"]), ("pressed", self.colors["button_hover"])],
-            foreground=[("active", self.colors["text"])]
-        )
-        
-        # Estilo de widget TCombobox
-        self.style.configure(
-            "Custom.TCombobox",
-            fieldbackground=self.colors["secondary_bg"],
-            background=self.colors["accent"],
-            foreground=self.colors["text"],
-            arrowcolor=self.colors["text"],
-            borderwidth=1
-        )
-        
-        # Estilo de widget TCheckbutton
-        self.style.configure(
-            "Custom.TCheckbutton",
-            background=self.colors["background"],
-            foreground=self.colors["text"]
-        )
-        
-        # Estilo de separador
-        self.style.configure(
-            "Custom.TSeparator",
-            background=self.colors["accent"]
-        )
-        
-        # Estilo de progreso
-        self.style.configure(
-            "Custom.Horizontal.TProgressbar",
-            troughcolor=self.colors["secondary_bg"],
-            background=self.colors["accent"],
-            borderwidth=0
+from estadisticas import EstadisticasHistorial, ruta_estadisticas
+from historial import DiarioHistorial, HistorialPerezoso, historial_solo_lectura, migrar_historial_json, ruta_diario
+
+# Datos de una combinación (estilo, género) con todos los fallbacks ya aplicados;
+# huella identifica el paquete de datos y codigo la combinación dentro de él
+CategoriaCompilada = namedtuple(
+    "CategoriaCompilada",
+    ["estilo", "genero", "nombres", "apellidos", "titulos", "profesiones", "rasgos", "motivaciones", "rango_edad",
+     "huella", "codigo"]
+)
+
+# Sorteo por contador: cada campo de un personaje offline sale de una palabra
+# de 32 bits derivada de su semilla de 64 bits, con el mismo resultado en
+# Python y en NumPy. La semilla se mezcla con splitmix64 y cuatro pasos de un
+# LCG de 64 bits dan el resto de palabras. El índice en un pool de n
+# elementos es (palabra * n) >> 32.
+MASCARA_64 = (1 << 64) - 1
+GAMMA_64 = 0x9E3779B97F4A7C15
+LCG_A = 6364136223846793005
+LCG_C = 1442695040888963407
+(CAMPO_GENERO, CAMPO_NOMBRE, CAMPO_APELLIDO, CAMPO_CON_TITULO, CAMPO_TITULO,
+ CAMPO_PROFESION, CAMPO_RASGO, CAMPO_MOTIVACION, CAMPO_EDAD) = range(9)
+
+def palabras_semilla(semilla):
+    """Las diez palabras de 32 bits de una semilla (una por campo, y una libre)"""
+    z0 = (semilla + GAMMA_64) & MASCARA_64
+    z0 = ((z0 ^ (z0 >> 30)) * 0xBF58476D1CE4E5B9) & MASCARA_64
+    z0 = ((z0 ^ (z0 >> 27)) * 0x94D049BB133111EB) & MASCARA_64
+    z0 ^= z0 >> 31
+    z1 = (z0 * LCG_A + LCG_C) & MASCARA_64
+    z2 = (z1 * LCG_A + LCG_C) & MASCARA_64
+    z3 = (z2 * LCG_A + LCG_C) & MASCARA_64
+    z4 = (z3 * LCG_A + LCG_C) & MASCARA_64
+    return (z0 >> 32, z0 & 0xFFFFFFFF, z1 >> 32, z1 & 0xFFFFFFFF, z2 >> 32,
+            z2 & 0xFFFFFFFF, z3 >> 32, z3 & 0xFFFFFFFF, z4 >> 32, z4 & 0xFFFFFFFF)
+
+def palabras_semilla_lote(semillas):
+    """Versión vectorizada de palabras_semilla (semillas es un array uint64)"""
+    import numpy as np
+    
+    z = semillas + np.uint64(GAMMA_64)
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    
+    palabras = []
+    for paso in range(5):
+        if paso:
+            z = z * np.uint64(LCG_A) + np.uint64(LCG_C)
+        palabras += (z >> np.uint64(32), z & np.uint64(0xFFFFFFFF))
+    return palabras
+
+def indices_lote(palabra, n):
+    """Índices (int64) en [0, n) de una palabra de palabras_semilla_lote; -1 donde n es 0"""
+    import numpy as np
+    
+    if np.isscalar(n):
+        if n == 0:
+            return np.full(len(palabra), -1, dtype=np.int64)
+        return ((palabra * np.uint64(n)) >> np.uint64(32)).astype(np.int64)
+    indices = ((palabra * n.astype(np.uint64)) >> np.uint64(32)).astype(np.int64)
+    return np.where(n > 0, indices, -1)
+
+class PermutacionIndices:
+    """Permutación pseudoaleatoria con clave de range(total)
+    
+    Una red de Feistel de cuatro rondas permuta el menor dominio de 2^(2h)
+    valores que cubre total, y los valores que caen fuera se vuelven a
+    permutar hasta caer dentro (cycle-walking). No guarda nada por elemento.
+    """
+    
+    RONDAS = 4
+    
+    def __init__(self, total, clave):
+        self.total = total
+        bits = max(2, (total - 1).bit_length())
+        self._mitad = (bits + 1) // 2
+        self._mascara = (1 << self._mitad) - 1
+        self._claves = tuple((clave + (r + 1) * GAMMA_64) & MASCARA_64 for r in range(self.RONDAS))
+    
+    def _feistel(self, x):
+        mitad, mascara = self._mitad, self._mascara
+        izquierda, derecha = x >> mitad, x & mascara
+        for clave in self._claves:
+            z = (derecha * GAMMA_64 ^ clave) & MASCARA_64
+            z = ((z ^ (z >> 31)) * 0xBF58476D1CE4E5B9) & MASCARA_64
+            izquierda, derecha = derecha, izquierda ^ ((z ^ (z >> 29)) & mascara)
+        return (izquierda << mitad) | derecha
+    
+    def __len__(self):
+        return self.total
+    
+    def __getitem__(self, i):
+        if not 0 <= i < self.total:
+            raise IndexError("indice fuera de la permutacion")
+        x = self._feistel(i)
+        while x >= self.total:
+            x = self._feistel(x)
+        return x
+
+# Clave con la que el historial guarda un personaje offline: semilla, fecha,
+# huella del paquete de datos y estilo/género en 16 bytes (base85, 20 caracteres)
+FORMATO_CLAVE = struct.Struct("<QI3sB")
+
+def codificar_clave(semilla, timestamp, huella, codigo):
+    return base64.b85encode(FORMATO_CLAVE.pack(semilla, timestamp, huella, codigo)).decode("ascii")
+
+def decodificar_clave(clave):
+    """Devuelve (semilla, timestamp, huella, codigo)"""
+    return FORMATO_CLAVE.unpack(base64.b85decode(clave))
+
+class Personaje(Mapping):
+    """Personaje offline compacto
+    
+    En lugar de un diccionario con nueve cadenas guarda la CategoriaCompilada
+    compartida, los índices sorteados sobre sus pools, la fecha como entero
+    (epoch) y la semilla de la que salen los índices. Las cadenas se
+    materializan al leer cada campo, y la clase se comporta como un
+    diccionario de solo lectura (get, in, dict(personaje)...).
+    """
+    
+    __slots__ = ("cat", "nombre_idx", "apellido_idx", "titulo_idx", "profesion_idx",
+                 "rasgo_idx", "motivacion_idx", "edad", "timestamp", "semilla")
+    
+    CAMPOS = ("nombre", "titulo", "edad", "profesion", "rasgo", "motivacion", "estilo", "genero", "fecha_generacion")
+    
+    def __init__(self, cat, nombre_idx, apellido_idx, titulo_idx, profesion_idx, rasgo_idx, motivacion_idx, edad, timestamp, semilla=None):
+        self.cat = cat
+        self.nombre_idx = nombre_idx
+        self.apellido_idx = apellido_idx  # -1 si no hay apellido
+        self.titulo_idx = titulo_idx  # -1 si no tiene título
+        self.profesion_idx = profesion_idx
+        self.rasgo_idx = rasgo_idx
+        self.motivacion_idx = motivacion_idx
+        self.edad = edad
+        self.timestamp = timestamp
+        self.semilla = semilla
+    
+    @staticmethod
+    def _elemento(pool, idx):
+        return pool[idx] if idx >= 0 else ""
+    
+    def __getitem__(self, campo):
+        cat = self.cat
+        if campo == "nombre":
+            nombre = cat.nombres[self.nombre_idx]
+            if self.apellido_idx >= 0:
+                nombre = f"{nombre} {cat.apellidos[self.apellido_idx]}"
+            return nombre
+        elif campo == "titulo":
+            return self._elemento(cat.titulos, self.titulo_idx)
+        elif campo == "edad":
+            return self.edad
+        elif campo == "profesion":
+            return self._elemento(cat.profesiones, self.profesion_idx)
+        elif campo == "rasgo":
+            return self._elemento(cat.rasgos, self.rasgo_idx)
+        elif campo == "motivacion":
+            return self._elemento(cat.motivaciones, self.motivacion_idx)
+        elif campo == "estilo":
+            return cat.estilo
+        elif campo == "genero":
+            return cat.genero
+        elif campo == "fecha_generacion":
+            return datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        raise KeyError(campo)
+    
+    def __iter__(self):
+        return iter(self.CAMPOS)
+    
+    def __len__(self):
+        return len(self.CAMPOS)
+    
+    def __repr__(self):
+        return f"Personaje({self.a_dict()!r})"
+    
+    def a_dict(self, fecha_generacion=None):
+        """Materializa el personaje como diccionario (para mostrar o exportar)"""
+        cat = self.cat
+        return {
+            "nombre": self["nombre"],
+            "titulo": self._elemento(cat.titulos, self.titulo_idx),
+            "edad": self.edad,
+            "profesion": self._elemento(cat.profesiones, self.profesion_idx),
+            "rasgo": self._elemento(cat.rasgos, self.rasgo_idx),
+            "motivacion": self._elemento(cat.motivaciones, self.motivacion_idx),
+            "estilo": cat.estilo,
+            "genero": cat.genero,
+            "fecha_generacion": fecha_generacion or self["fecha_generacion"]
+        }
+    
+    def clave_compacta(self):
+        """Clave con la que se guarda en el historial, o None si no se puede regenerar"""
+        if self.semilla is None or self.cat.codigo is None:
+            return None
+        return codificar_clave(self.semilla, self.timestamp, self.cat.huella, self.cat.codigo)
+
+class LotePersonajes:
+    """Lote columnar de personajes generados offline
+    
+    Guarda solo arrays de índices sobre los pools de cada género; los objetos
+    Personaje se construyen bajo demanda al iterar, y como_dicts() devuelve
+    diccionarios normales.
+    """
+    
+    COLUMNAS = ("genero", "nombre", "apellido", "titulo", "profesion", "rasgo", "motivacion", "edad", "semilla")
+    
+    def __init__(self, categorias, columnas, timestamp):
+        self.categorias = categorias  # Una CategoriaCompilada por género
+        self.estilo = categorias[0].estilo
+        self.columnas = columnas
+        self.timestamp = timestamp
+    
+    def __len__(self):
+        return len(self.columnas["edad"])
+    
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("indice fuera del lote")
+        
+        col = self.columnas
+        return Personaje(
+            self.categorias[col["genero"][i]],
+            int(col["nombre"][i]),
+            int(col["apellido"][i]),
+            int(col["titulo"][i]),
+            int(col["profesion"][i]),
+            int(col["rasgo"][i]),
+            int(col["motivacion"][i]),
+            int(col["edad"][i]),
+            self.timestamp,
+            int(col["semilla"][i])
         )
+    
+    def __iter__(self):
+        # Convertir las columnas a listas de Python una sola vez es mucho más
+        # rápido que indexar arrays de NumPy elemento a elemento
+        self.columnas = {k: v.tolist() if hasattr(v, "tolist") else v for k, v in self.columnas.items()}
+        for i in range(len(self)):
+            yield self[i]
+    
+    def como_dicts(self):
+        """Devuelve el lote completo como lista de diccionarios"""
+        fecha = datetime.fromtimestamp(self.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return [personaje.a_dict(fecha) for personaje in self]
 
 class PersonajeGenerator:
     """Clase principal para generar personajes ficticios"""
     
-    def __init__(self, config_file="config.json"):
+    GENEROS = ("masculino", "femenino", "neutro")
+    
+    # Por debajo de este tamaño los lotes se sortean sin NumPy
+    LOTE_MINIMO_NUMPY = 1000
+    
+    def __init__(self, config_file="config.json", semilla=None, historial=None):
+        """semilla hace reproducible la generación offline; historial (True o
+        False) sustituye a settings.save_history de la configuración"""
         # Cargar configuración
         self.load_config(config_file)
-        
-        # Cargar datos
+        if historial is not None:
+            self.config.setdefault("settings", {})["save_history"] = historial
+        
+        # Generadores aleatorios propios: el de Python para los personajes
+        # sueltos y el de NumPy para los lotes vectorizados (NumPy se importa
+        # con el primer lote grande, así que el arranque no lo paga)
+        self._semilla = semilla
+        self._rng = random.Random(semilla)
+        self._np_rng = None
+        
+        # Cargar datos (y los paquetes anteriores que pida el historial, por huella)
+        self._paquetes = {}
         self.load_data(self.config["data_file"])
         
+        # Diario de historial (se abre al guardar por primera vez)
+        self._diario = None
+        self._paquete_guardado = False
+        
+        # Limitador de peticiones y clientes HTTP por endpoint (compartidos por todos los hilos)
+        self._limitador = None
+        self._clientes = {}
+        self._lock_ia = threading.Lock()
+        
+        # Caché opcional de respuestas de la IA (se abre al primer uso)
+        self._cache = None
+        
+        # Reserva de personajes de IA precargados en segundo plano
+        self._precarga = None
+        
+        # Guardados del historial (el servidor guarda desde varios hilos a la vez)
+        self._lock_historial = threading.Lock()
+        
+        # Estadísticas del historial (se cargan o reconstruyen al primer uso)
+        self._estadisticas = None
+        self._lock_estadisticas = threading.Lock()
+        
         # Historial de personajes generados
-        self.history = []
+        self.load_history()
     
     def load_config(self, config_file):
         """Carga la configuración desde un archivo JSON"""
@@ -129,143 +335,659 @@ class PersonajeGenerator:
     def load_data(self, data_file):
         """Carga los datos desde un archivo JSON"""
         try:
-            with open(data_file, 'r', encoding='utf-8') as f:
-                self.data = json.load(f)
+            with open(data_file, 'rb') as f:
+                contenido = f.read()
+            self.data = json.loads(contenido)
         except Exception as e:
             print(f"Error al cargar datos: {e}")
+            contenido = b""
             self.data = {"categorias": {}, "profesiones": {}, "motivaciones": []}
+        
+        # Los personajes del historial se guardan como semillas que solo
+        # valen con el paquete de datos que las generó
+        self.huella_datos = hashlib.sha256(contenido).digest()[:3]
+        
+        self.compilar_indice()
     
-    def save_history(self):
-        """Guarda el historial de personajes generados"""
-        if self.config["settings"].get("save_history", False):
-            try:
-                history_file = self.config["settings"].get("history_file", "historico_personajes.json")
-                with open(history_file, 'w', encoding='utf-8') as f:
-                    json.dump(self.history, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                print(f"Error al guardar historial: {e}")
+    def compilar_indice(self):
+        """Compila los datos en una tabla (estilo, genero) -> CategoriaCompilada
+        
+        Los fallbacks de estilo, de nombres (neutros -> masculinos) y de títulos
+        (neutros) se resuelven aquí una sola vez, de modo que la generación de
+        cada personaje solo tiene que sortear índices sobre tuplas.
+        """
+        self.indice = self._compilar_categorias(self.data, self.huella_datos)
+        self._pools_lote = {}
+        self._paquetes[self.huella_datos] = {cat.codigo: cat for cat in self.indice.values()}
     
-    def generar_nombre_offline(self, genero="aleatorio", estilo="fantasia", incluir_titulo=False):
-        """Genera un nombre de personaje usando datos offline"""
+    def _compilar_categorias(self, datos, huella):
+        """Devuelve la tabla (estilo, genero) -> CategoriaCompilada de un paquete de datos"""
+        indice = {}
+        motivaciones = tuple(datos.get("motivaciones", []))
+        
+        for estilo_idx, (estilo, cat_data) in enumerate(datos.get("categorias", {}).items()):
+            nombres_cat = cat_data.get("nombres", {})
+            titulos_cat = cat_data.get("titulos", {})
+            
+            # Generar edad apropiada para el contexto
+            if estilo == "medieval":
+                rango_edad = (16, 60)
+            elif estilo == "moderno":
+                rango_edad = (18, 75)
+            else:
+                rango_edad = (20, 500)  # Para fantasía y ciencia ficción
+            
+            for genero_idx, genero in enumerate(self.GENEROS):
+                # Nombres del género, o neutros, o masculinos
+                nombres = nombres_cat.get(genero + "s", []) or nombres_cat.get("neutros", []) or nombres_cat.get("masculinos", [])
+                # Títulos del género, o neutros
+                titulos = titulos_cat.get(genero + "s", []) or titulos_cat.get("neutros", [])
+                
+                # Estilo y género en un byte (los paquetes de más de 85 estilos
+                # guardan los personajes de los últimos completos en el historial)
+                codigo = estilo_idx * len(self.GENEROS) + genero_idx
+                
+                indice[(estilo, genero)] = CategoriaCompilada(
+                    estilo=estilo,
+                    genero=genero,
+                    nombres=tuple(nombres),
+                    apellidos=tuple(cat_data.get("apellidos", [])),
+                    titulos=tuple(titulos),
+                    profesiones=tuple(datos.get("profesiones", {}).get(estilo, [])),
+                    rasgos=tuple(cat_data.get("rasgos", [])),
+                    motivaciones=motivaciones,
+                    rango_edad=rango_edad,
+                    huella=huella,
+                    codigo=codigo if codigo < 256 else None
+                )
+        return indice
+    
+    def _compilar_pools_lote(self, estilo):
+        """Construye los pools indexados de un estilo para generar lotes"""
+        import numpy as np
+        
+        categorias = tuple(self.indice[(estilo, genero)] for genero in self.GENEROS)
+        comun = categorias[0]  # El resto de pools no depende del género
+        
+        return {
+            "categorias": categorias,
+            "nombres_len": np.array([len(cat.nombres) for cat in categorias], dtype=np.int64),
+            "titulos_len": np.array([len(cat.titulos) for cat in categorias], dtype=np.int64),
+            "apellidos": comun.apellidos,
+            "profesiones": comun.profesiones,
+            "rasgos": comun.rasgos,
+            "motivaciones": comun.motivaciones,
+            "rango_edad": comun.rango_edad
+        }
+    
+    def resolver_categoria(self, genero="aleatorio", estilo="fantasia"):
+        """Devuelve la CategoriaCompilada para el género y estilo pedidos
+        
+        El género aleatorio se sortea aquí una única vez por personaje.
+        """
         # Determinar género si es aleatorio
         if genero == "aleatorio":
-            genero = random.choice(["masculino", "femenino", "neutro"])
+            genero = self._rng.choice(self.GENEROS)
+        elif genero not in self.GENEROS:
+            genero = "neutro"
+        
+        cat = self.indice.get((estilo, genero))
+        if cat is None:
+            cat = self.indice[("fantasia", genero)]  # Fallback a fantasía
+        return cat
+    
+    def _componer_nombre(self, cat, incluir_titulo=False):
+        """Compone el nombre completo a partir de una categoría compilada"""
+        nombre = self._rng.choice(cat.nombres)
         
-        # Comprobar que existe la categoría seleccionada
-        if estilo not in self.data["categorias"]:
-            estilo = "fantasia"  # Fallback a fantasía
+        # Nombre completo
+        if cat.apellidos:
+            nombre = f"{nombre} {self._rng.choice(cat.apellidos)}"
         
-        # Obtener los datos de la categoría seleccionada
-        cat_data = self.data["categorias"][estilo]
+        # Agregar título si se solicita
+        if incluir_titulo and cat.titulos:
+            nombre = f"{nombre} {self._rng.choice(cat.titulos)}"
         
-        # Seleccionar nombre según género
-        nombres = cat_data["nombres"].get(genero + "s", [])
-        if not nombres:  # Si no hay nombres del género solicitado
-            nombres = cat_data["nombres"]["neutros"] if "neutros" in cat_data["nombres"] else []
-            if not nombres:  # Si tampoco hay neutros, usar masculinos
-                nombres = cat_data["nombres"]["masculinos"]
+        return nombre
+    
+    def load_history(self):
+        """Abre el historial de sesiones anteriores sin decodificarlo
         
-        nombre = random.choice(nombres)
-        apellido = random.choice(cat_data["apellidos"]) if "apellidos" in cat_data else ""
+        Los personajes guardados se leen del diario bajo demanda a través de su
+        índice de offsets, así que el arranque no depende del tamaño del historial.
+        """
+        self.history = []
         
-        # Nombre completo
-        nombre_completo = f"{nombre} {apellido}" if apellido else nombre
+        if self.config["settings"].get("save_history", False):
+            try:
+                diario = self._abrir_diario()
+                self.history = HistorialPerezoso(diario.ruta, diario.indice.total, self.expandir_clave)
+            except Exception as e:
+                print(f"Error al cargar historial: {e}")
         
-        # Agregar título si se solicita
-        if incluir_titulo and "titulos" in cat_data:
-            titulos = cat_data["titulos"].get(genero + "s", [])
-            if not titulos:
-                titulos = cat_data["titulos"].get("neutros", [])
+        self._persistidos = len(self.history)  # Personajes ya enviados al diario
+    
+    def save_history(self):
+        """Guarda el historial de personajes generados
+        
+        Solo se envían al diario los personajes nuevos desde la última llamada,
+        así que el coste no depende del tamaño del historial. Se puede llamar
+        desde varios hilos: cada personaje se envía una sola vez.
+        """
+        if not self.config["settings"].get("save_history", False):
+            return
+        
+        with self._lock_historial:
+            try:
+                diario = self._abrir_diario()
+                total = len(self.history)
+                
+                # El historial se ha vaciado o sustituido desde el último guardado
+                if total < self._persistidos:
+                    diario.limpiar()
+                    self._persistidos = 0
+                
+                nuevos = self.history[self._persistidos:total]
+                if nuevos and not self._paquete_guardado:
+                    # Las claves compactas necesitan el paquete de datos para expandirse
+                    self._guardar_paquete()
+                diario.agregar_varios(nuevos)
+                self._persistidos = total
+                
+                # Contar los mismos personajes en las estadísticas
+                self._estadisticas_al_dia()
+            except Exception as e:
+                print(f"Error al guardar historial: {e}")
+    
+    def ruta_historial(self):
+        """Ruta del diario JSONL del historial según la configuración"""
+        settings = self.config["settings"]
+        return settings.get("history_journal") or ruta_diario(settings.get("history_file", "historico_personajes.json"))
+    
+    def abrir_historial_lectura(self):
+        """Abre el historial guardado solo para leerlo (exportar, estadísticas)
+        
+        No crea el diario ni su hilo escritor, así que es seguro mientras la
+        interfaz o el servidor están escribiendo en el mismo historial.
+        """
+        ruta = self.ruta_historial()
+        history_file = self.config["settings"].get("history_file", "historico_personajes.json")
+        if not os.path.exists(ruta) and os.path.exists(history_file):
+            # Historial JSON de versiones anteriores, aún sin migrar
+            with open(history_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        return historial_solo_lectura(ruta, self.expandir_clave)
+    
+    def _abrir_diario(self):
+        """Abre (una vez) el diario JSONL del historial"""
+        if self._diario is None:
+            settings = self.config["settings"]
+            history_file = settings.get("history_file", "historico_personajes.json")
+            ruta = self.ruta_historial()
+            
+            # Importar el historial JSON de versiones anteriores la primera vez
+            migrar_historial_json(history_file, ruta)
             
-            if titulos:
-                titulo = random.choice(titulos)
-                nombre_completo = f"{nombre_completo} {titulo}"
+            self._diario = DiarioHistorial(
+                ruta,
+                intervalo_fsync=settings.get("history_fsync_interval", 1.0),
+                compactar_min_bytes=settings.get("history_compact_min_bytes", 1024 * 1024)
+            )
+        return self._diario
+    
+    def _estadisticas_al_dia(self):
+        """Devuelve las estadísticas del historial tras contar los personajes nuevos
+        
+        La primera vez se leen del archivo guardado junto al diario; solo si
+        falta (o no corresponde al diario) se reconstruyen recorriéndolo.
+        Después cada llamada cuenta únicamente los personajes añadidos desde la
+        anterior, y vuelve a empezar si el historial se ha vaciado.
+        """
+        with self._lock_estadisticas:
+            estadisticas = self._estadisticas
+            if estadisticas is None:
+                ruta = None
+                if self.config["settings"].get("save_history", False):
+                    ruta = self._abrir_diario().ruta
+                estadisticas = EstadisticasHistorial.al_dia(self.history, ruta)
+            elif estadisticas.total > len(self.history):
+                estadisticas = EstadisticasHistorial()
+            
+            estadisticas.agregar_varios(self.history[estadisticas.total:])
+            self._estadisticas = estadisticas
+            return estadisticas
+    
+    def estadisticas_historial(self, top=10):
+        """Devuelve el informe de distribuciones del historial (ver EstadisticasHistorial.resumen)"""
+        return self._estadisticas_al_dia().resumen(top)
+    
+    def liberar_historial(self):
+        """Guarda el historial y deja sus personajes solo en el diario
+
+        Para generaciones largas (`chargen generate --save-history`): espera a
+        que el diario esté escrito y pasa a leer de él lo ya guardado, de modo
+        que la memoria no crece con la cantidad generada.
+        """
+        self.save_history()
+        with self._lock_historial:
+            if self._diario is None or not isinstance(self.history, HistorialPerezoso):
+                return
+            self._diario.vaciar()
+            self.history.consolidar(self._diario.ruta, self._persistidos)
+    
+    def limpiar_historial(self):
+        """Borra el historial en memoria y en disco"""
+        self.history.clear()
+        with self._lock_estadisticas:
+            self._estadisticas = None if self._estadisticas is None else EstadisticasHistorial()
+        self.save_history()
+    
+    def cerrar(self):
+        """Escribe lo pendiente del historial y sus estadísticas y cierra el diario"""
+        self.save_history()
+        if self._diario is not None:
+            self._diario.cerrar()
+            # Con el diario ya cerrado (y compactado) las estadísticas cuentan
+            # exactamente sus personajes: se sellan con su tamaño final
+            estadisticas = self._estadisticas
+            if estadisticas is not None and estadisticas.total == self._persistidos:
+                try:
+                    ruta = self._diario.ruta
+                    estadisticas.sellar(ruta, os.path.getsize(ruta))
+                    estadisticas.guardar(ruta_estadisticas(ruta))
+                except Exception as e:
+                    print(f"Error al guardar estadísticas del historial: {e}")
         
-        return nombre_completo
+        for cliente in self._clientes.values():
+            cliente.cerrar()
+        self._clientes = {}
+        
+        if self._precarga is not None:
+            self._precarga.detener()
+            self._precarga = None
+        
+        if self._cache is not None:
+            self._cache.cerrar()
+            self._cache = None
+    
+    def generar_nombre_offline(self, genero="aleatorio", estilo="fantasia", incluir_titulo=False):
+        """Genera un nombre de personaje usando datos offline"""
+        return self._componer_nombre(self.resolver_categoria(genero, estilo), incluir_titulo)
+    
+    def generar_nombres_unicos(self, n, genero="aleatorio", estilo="fantasia", incluir_titulo=False):
+        """Devuelve un iterador de n nombres offline distintos entre sí
+        
+        Recorre el espacio nombre × apellido × (título o ninguno) con una
+        permutación pseudoaleatoria en lugar de sortear y descartar repetidos,
+        así que no hay colisiones ni reintentos y la memoria no depende de n.
+        Lanza ValueError si n supera las combinaciones disponibles.
+        """
+        return (nombre for nombre, _ in self._recorrer_nombres_unicos(n, genero, estilo, incluir_titulo))
+    
+    def _recorrer_nombres_unicos(self, n, genero="aleatorio", estilo="fantasia", incluir_titulo=False):
+        """Como generar_nombres_unicos, pero devuelve pares (nombre, CategoriaCompilada)"""
+        if (estilo, "neutro") not in self.indice:
+            estilo = "fantasia"  # Fallback a fantasía
+        generos = self.GENEROS if genero == "aleatorio" else (genero if genero in self.GENEROS else "neutro",)
+        
+        # Pools sin repetidos de cada género; None es "sin apellido" o "sin título"
+        espacios = []
+        for g in generos:
+            cat = self.indice[(estilo, g)]
+            pools = (
+                tuple(dict.fromkeys(cat.nombres)),
+                tuple(dict.fromkeys(cat.apellidos)) or (None,),
+                (None,) + tuple(dict.fromkeys(cat.titulos)) if incluir_titulo else (None,)
+            )
+            espacios.append((cat, pools, tuple(frozenset(pool) for pool in pools)))
+        
+        # Una combinación que también existe en un género anterior solo cuenta
+        # para el primero (p. ej. nombres que aparecen como masculinos y neutros)
+        def comun(*conjuntos):
+            total = 1
+            for partes in zip(*conjuntos):
+                total *= len(frozenset.intersection(*partes))
+            return total
+        
+        disponibles = 0
+        for i, (_, pools, conjuntos) in enumerate(espacios):
+            repetidas = 0
+            anteriores = [c for _, _, c in espacios[:i]]
+            for k in range(1, len(anteriores) + 1):
+                for grupo in combinations(anteriores, k):
+                    repetidas += (-1) ** (k + 1) * comun(conjuntos, *grupo)
+            disponibles += len(pools[0]) * len(pools[1]) * len(pools[2]) - repetidas
+        
+        if n > disponibles:
+            raise ValueError(f"Se han pedido {n} nombres distintos pero {estilo}/{genero} solo tiene {disponibles} combinaciones")
+        return self._nombres_permutados(n, espacios)
+    
+    def _nombres_permutados(self, n, espacios):
+        tamanos = [len(p[0]) * len(p[1]) * len(p[2]) for _, p, _ in espacios]
+        permutacion = PermutacionIndices(sum(tamanos), self._rng.getrandbits(64))
+        
+        i = 0
+        while n > 0:
+            indice = permutacion[i]
+            i += 1
+            for g, (cat, (nombres, apellidos, titulos), _) in enumerate(espacios):
+                if indice < tamanos[g]:
+                    break
+                indice -= tamanos[g]
+            
+            indice, t = divmod(indice, len(titulos))
+            nombre_idx, a = divmod(indice, len(apellidos))
+            combinacion = (nombres[nombre_idx], apellidos[a], titulos[t])
+            if any(all(parte in conjunto for parte, conjunto in zip(combinacion, conjuntos))
+                   for _, _, conjuntos in espacios[:g]):
+                continue  # Ya la cubre un género anterior
+            
+            yield " ".join(parte for parte in combinacion if parte is not None), cat
+            n -= 1
     
     def generar_personaje_offline(self, genero="aleatorio", estilo="fantasia", detallado=False):
         """Genera un personaje completo usando datos offline"""
-        # Nombre del personaje
-        nombre_completo = self.generar_nombre_offline(genero, estilo, incluir_titulo=False)
-        
         # Si solo queremos el nombre, devolvemos
         if not detallado:
-            return nombre_completo
+            return self._componer_nombre(self.resolver_categoria(genero, estilo))
         
-        # Determinar género si es aleatorio
+        personaje = self.personaje_desde_semilla(self._rng.getrandbits(64), genero, estilo)
+        
+        # Agregar al historial
+        self.history.append(personaje)
+        
+        return personaje
+    
+    def personaje_desde_semilla(self, semilla, genero="aleatorio", estilo="fantasia", timestamp=None):
+        """Devuelve el personaje offline de una semilla de 64 bits
+        
+        Con el mismo paquete de datos, la misma semilla, estilo y género dan
+        siempre el mismo personaje, tanto aquí como en generar_lote_offline.
+        """
+        palabras = palabras_semilla(semilla)
         if genero == "aleatorio":
-            genero = random.choice(["masculino", "femenino", "neutro"])
+            genero = self.GENEROS[(palabras[CAMPO_GENERO] * len(self.GENEROS)) >> 32]
+        cat = self.resolver_categoria(genero, estilo)
+        return self._personaje_de_categoria(cat, semilla, timestamp, palabras)
+    
+    @staticmethod
+    def _personaje_de_categoria(cat, semilla, timestamp=None, palabras=None):
+        """Sortea los índices de un personaje sobre los pools de la categoría"""
+        p = palabras or palabras_semilla(semilla)
+        edad_min, edad_max = cat.rango_edad
+        return Personaje(
+            cat,
+            (p[CAMPO_NOMBRE] * len(cat.nombres)) >> 32,
+            (p[CAMPO_APELLIDO] * len(cat.apellidos)) >> 32 if cat.apellidos else -1,
+            # 50% de probabilidad de tener título
+            (p[CAMPO_TITULO] * len(cat.titulos)) >> 32 if cat.titulos and p[CAMPO_CON_TITULO] >> 31 else -1,
+            (p[CAMPO_PROFESION] * len(cat.profesiones)) >> 32 if cat.profesiones else -1,
+            (p[CAMPO_RASGO] * len(cat.rasgos)) >> 32 if cat.rasgos else -1,
+            (p[CAMPO_MOTIVACION] * len(cat.motivaciones)) >> 32 if cat.motivaciones else -1,
+            edad_min + ((p[CAMPO_EDAD] * (edad_max - edad_min + 1)) >> 32),
+            int(time.time()) if timestamp is None else timestamp,
+            semilla
+        )
+    
+    def expandir_clave(self, clave):
+        """Reconstruye un personaje guardado en el historial como clave compacta"""
+        try:
+            semilla, timestamp, huella, codigo = decodificar_clave(clave)
+            cat = self._paquete(huella).get(codigo)
+        except Exception as e:
+            print(f"Error al expandir personaje del historial: {e}")
+            cat = None
+        
+        if cat is None:
+            return {"nombre": "Registro no disponible", "error_formato": "Falta el paquete de datos con el que se generó"}
+        return self._personaje_de_categoria(cat, semilla, timestamp)
+    
+    def _paquete(self, huella):
+        """Devuelve {codigo: CategoriaCompilada} del paquete de datos con esa huella"""
+        paquete = self._paquetes.get(huella)
+        if paquete is None:
+            paquete = {}
+            try:
+                with open(self._ruta_paquete(huella), "r", encoding="utf-8") as f:
+                    datos = json.load(f)
+                paquete = {cat.codigo: cat for cat in self._compilar_categorias(datos, huella).values()}
+            except Exception as e:
+                print(f"Error al cargar paquete de datos {huella.hex()}: {e}")
+            self._paquetes[huella] = paquete
+        return paquete
+    
+    def _ruta_paquete(self, huella):
+        """Copia del paquete de datos que guarda el historial junto al diario"""
+        base, _ = os.path.splitext(self._abrir_diario().ruta)
+        return os.path.join(base + ".datos", huella.hex() + ".json")
+    
+    def _guardar_paquete(self):
+        """Guarda (una vez) la copia del paquete de datos actual para el historial"""
+        ruta = self._ruta_paquete(self.huella_datos)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = ruta + ".tmp"
+            with open(temporal, "w", encoding="utf-8") as f:
+                json.dump(self.data, f, ensure_ascii=False)
+            os.replace(temporal, ruta)
+        self._paquete_guardado = True
+    
+    def _columnas_lote_python(self, n, genero, estilo):
+        """Sortea las columnas de un lote pequeño personaje a personaje
+        
+        Para unos pocos personajes importar NumPy cuesta más que sortearlos.
+        """
+        columnas = {columna: [] for columna in LotePersonajes.COLUMNAS}
+        listas = tuple(columnas.values())
+        for _ in range(n):
+            semilla = self._rng.getrandbits(64)
+            p = self.personaje_desde_semilla(semilla, genero, estilo, 0)
+            fila = (self.GENEROS.index(p.cat.genero), p.nombre_idx, p.apellido_idx, p.titulo_idx,
+                    p.profesion_idx, p.rasgo_idx, p.motivacion_idx, p.edad, semilla)
+            for lista, valor in zip(listas, fila):
+                lista.append(valor)
+        return columnas
+    
+    def generar_lote_offline(self, n, genero="aleatorio", estilo="fantasia", agregar_historial=False):
+        """Genera n personajes detallados offline en una sola pasada vectorizada
+        
+        Devuelve un LotePersonajes; los personajes solo se añaden al historial
+        si se solicita, ya que los lotes suelen ser de cientos de miles. Los
+        lotes de menos de LOTE_MINIMO_NUMPY personajes se sortean sin NumPy.
+        Cada personaje sale de su propia semilla igual que en personaje_desde_semilla.
+        """
+        n = max(0, int(n))
         
         # Comprobar que existe la categoría seleccionada
-        if estilo not in self.data["categorias"]:
+        if (estilo, "neutro") not in self.indice:
             estilo = "fantasia"  # Fallback a fantasía
         
-        # Obtener los datos de la categoría seleccionada
-        cat_data = self.data["categorias"][estilo]
+        if n < self.LOTE_MINIMO_NUMPY:
+            categorias = tuple(self.indice[(estilo, g)] for g in self.GENEROS)
+            columnas = self._columnas_lote_python(n, genero, estilo)
+            lote = LotePersonajes(categorias, columnas, int(time.time()))
+            if agregar_historial:
+                self.history.extend(lote)
+            return lote
         
-        # Generar título
-        titulo = ""
-        if "titulos" in cat_data:
-            titulos = cat_data["titulos"].get(genero + "s", [])
-            if not titulos:
-                titulos = cat_data["titulos"].get("neutros", [])
-            
-            if titulos and random.random() > 0.5:  # 50% de probabilidad de tener título
-                titulo = random.choice(titulos)
-        
-        # Generar profesión
-        profesion = ""
-        if "profesiones" in self.data and estilo in self.data["profesiones"]:
-            profesion = random.choice(self.data["profesiones"][estilo])
-        
-        # Generar edad apropiada para el contexto
-        if estilo == "medieval":
-            edad = random.randint(16, 60)
-        elif estilo == "moderno":
-            edad = random.randint(18, 75)
+        import numpy as np
+        
+        pools = self._pools_lote.get(estilo)
+        if pools is None:
+            pools = self._pools_lote[estilo] = self._compilar_pools_lote(estilo)
+        
+        if self._np_rng is None:
+            self._np_rng = np.random.default_rng(self._semilla)
+        semillas = self._np_rng.integers(0, 1 << 64, n, dtype=np.uint64)
+        palabras = palabras_semilla_lote(semillas)
+        
+        # Género por personaje
+        if genero == "aleatorio":
+            generos = indices_lote(palabras[CAMPO_GENERO], len(self.GENEROS)).astype(np.int8)
         else:
-            edad = random.randint(20, 500)  # Para fantasía y ciencia ficción
-        
-        # Generar rasgo distintivo
-        rasgo = ""
-        if "rasgos" in cat_data:
-            rasgo = random.choice(cat_data["rasgos"])
-        
-        # Generar motivación
-        motivacion = ""
-        if "motivaciones" in self.data:
-            motivacion = random.choice(self.data["motivaciones"])
-        
-        # Crear objeto de personaje
-        personaje = {
-            "nombre": nombre_completo,
-            "titulo": titulo,
-            "edad": edad,
-            "profesion": profesion,
-            "rasgo": rasgo,
-            "motivacion": motivacion,
-            "estilo": estilo,
-            "genero": genero,
-            "fecha_generacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            genero_idx = self.GENEROS.index(genero if genero in self.GENEROS else "neutro")
+            generos = np.full(n, genero_idx, dtype=np.int8)
+        
+        # Título: 50% de probabilidad, solo si el género tiene títulos
+        titulos = indices_lote(palabras[CAMPO_TITULO], pools["titulos_len"][generos])
+        titulos = np.where(palabras[CAMPO_CON_TITULO] >> np.uint64(31) == 1, titulos, -1)
+        
+        edad_min, edad_max = pools["rango_edad"]
+        
+        columnas = {
+            "genero": generos,
+            # Nombre: índice dentro del pool del género de cada personaje
+            "nombre": indices_lote(palabras[CAMPO_NOMBRE], pools["nombres_len"][generos]),
+            "apellido": indices_lote(palabras[CAMPO_APELLIDO], len(pools["apellidos"])),
+            "titulo": titulos,
+            "profesion": indices_lote(palabras[CAMPO_PROFESION], len(pools["profesiones"])),
+            "rasgo": indices_lote(palabras[CAMPO_RASGO], len(pools["rasgos"])),
+            "motivacion": indices_lote(palabras[CAMPO_MOTIVACION], len(pools["motivaciones"])),
+            "edad": edad_min + indices_lote(palabras[CAMPO_EDAD], edad_max - edad_min + 1),
+            "semilla": semillas
         }
         
-        # Agregar al historial
-        self.history.append(personaje)
+        lote = LotePersonajes(pools["categorias"], columnas, int(time.time()))
         
-        return personaje
+        if agregar_historial:
+            self.history.extend(lote)
+        
+        return lote
     
-    def generar_personaje_con_ia(self, genero="aleatorio", estilo="fantasia", detallado=False):
-        """Genera un personaje usando la API de IA"""
-        # Determinar género si es aleatorio
+    def _api_config(self):
+        """Devuelve la configuración del endpoint de IA"""
+        return self.config.get("api", {}).get("grok-2-latest", {})
+    
+    def _limitador_ia(self):
+        """Devuelve (creándolo una vez) el limitador de tasa de la API"""
+        from cliente_ia import LimitadorTasa
+        
+        with self._lock_ia:
+            if self._limitador is None:
+                api_config = self._api_config()
+                self._limitador = LimitadorTasa(
+                    peticiones_por_segundo=api_config.get("requests_per_second", 1.0),
+                    tokens_por_minuto=api_config.get("tokens_per_minute", 0)
+                )
+            return self._limitador
+    
+    def _cliente_ia(self, api_config):
+        """Devuelve el cliente HTTP persistente del endpoint configurado"""
+        # requests solo se importa cuando se usa la IA por primera vez
+        from cliente_ia import ClienteAPI
+        
+        clave = (api_config["api_base_url"], api_config["api_key"])
+        with self._lock_ia:
+            cliente = self._clientes.get(clave)
+            if cliente is None:
+                cliente = self._clientes[clave] = ClienteAPI(api_config)
+            return cliente
+    
+    def _cache_ia(self):
+        """Devuelve la caché de respuestas si está habilitada en la configuración"""
+        opciones = self.config["settings"].get("ai_cache", {})
+        if not opciones.get("enabled", False):
+            return None
+        with self._lock_ia:
+            if self._cache is None:
+                from cache_ia import CacheRespuestas
+                self._cache = CacheRespuestas(
+                    opciones.get("file", "cache_ia.sqlite3"),
+                    ttl=opciones.get("ttl_seconds", 86400),
+                    max_entradas=opciones.get("max_entries", 5000),
+                    variedad=opciones.get("variety", 1),
+                    max_bytes=opciones.get("max_bytes", 0)
+                )
+            return self._cache
+    
+    def estadisticas_cache(self):
+        """Devuelve los contadores de aciertos y fallos de la caché de IA"""
+        cache = self._cache_ia()
+        return cache.estadisticas() if cache else {}
+    
+    def precargar_ia(self, genero="aleatorio", estilo="fantasia", detallado=False):
+        """Empieza a precargar personajes de IA para la combinación indicada"""
+        opciones = self.config["settings"].get("ai_prefetch", {})
+        if not opciones.get("enabled", False) or not self._api_config().get("api_key"):
+            return
+        with self._lock_ia:
+            if self._precarga is None:
+                from cliente_ia import PrecargaIA
+                self._precarga = PrecargaIA(
+                    lambda g, e, d: self.generar_personaje_con_ia(g, e, d, agregar_historial=False),
+                    profundidad=opciones.get("depth", 2),
+                    caducidad=opciones.get("expiry_seconds", 300)
+                )
+        self._precarga.objetivo(genero, estilo, detallado)
+    
+    def tomar_precargado(self, genero="aleatorio", estilo="fantasia", detallado=False):
+        """Devuelve un personaje precargado (y lo añade al historial), o None"""
+        if self._precarga is None:
+            return None
+        
+        resultado = self._precarga.tomar(genero, estilo, detallado)
+        if isinstance(resultado, dict):
+            resultado["fecha_generacion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            self.history.append(resultado)
+        return resultado
+    
+    def generar_lote_con_ia(self, cantidad, genero="aleatorio", estilo="fantasia", detallado=False):
+        """Genera varios personajes con IA en paralelo
+        
+        Las peticiones se reparten entre max_concurrency hilos respetando el
+        limitador de tasa; solo se reintentan las que fallan por un 429 (los
+        5xx y los errores de conexión los reintenta ya la sesión HTTP, ver
+        ClienteAPI). Con batch_size > 1 cada petición
+        pide hasta batch_size personajes a la vez. Devuelve un iterador con
+        los resultados en el orden de la solicitud según van llegando.
+        """
+        from cliente_ia import generar_en_paralelo
+        
+        api_config = self._api_config()
+        por_solicitud = api_config.get("batch_size", 1)
+        
+        if por_solicitud <= 1:
+            return generar_en_paralelo(
+                lambda i: self.generar_personaje_con_ia(genero, estilo, detallado),
+                cantidad,
+                concurrencia=api_config.get("max_concurrency", 4),
+                reintentos=api_config.get("max_retries", 3)
+            )
+        
+        # Modo por grupos: varios personajes por solicitud, en trozos de batch_size.
+        # Con género aleatorio se sortea el de cada personaje y se agrupan por
+        # género, para que cada grupo no salga entero de un único género
         if genero == "aleatorio":
-            genero = random.choice(["masculino", "femenino", "neutro"])
+            sorteo = Counter(self.resolver_categoria(genero, estilo).genero for _ in range(cantidad))
+        else:
+            sorteo = {genero: cantidad}
+        grupos = [
+            (min(por_solicitud, n - i), genero_grupo)
+            for genero_grupo, n in sorteo.items()
+            for i in range(0, n, por_solicitud)
+        ]
+        resultados = generar_en_paralelo(
+            lambda i: self.generar_grupo_con_ia(grupos[i][0], grupos[i][1], estilo, detallado),
+            len(grupos),
+            concurrencia=api_config.get("max_concurrency", 4),
+            reintentos=0  # generar_grupo_con_ia ya reintenta lo que falta
+        )
+        return (resultado for grupo in resultados for resultado in grupo)
+    
+    def generar_personaje_con_ia(self, genero="aleatorio", estilo="fantasia", detallado=False, agregar_historial=True, on_campo=None):
+        """Genera un personaje usando la API de IA
         
-        # Comprobar que existe la categoría seleccionada
-        if estilo not in self.data["categorias"]:
-            estilo = "fantasia"  # Fallback a fantasía
+        Con "stream" activado en la configuración de la API, on_campo(campo, valor)
+        se llama con cada campo de la ficha en cuanto llega completo.
+        """
+        from extractor import extraer_personaje
+        
+        # Determinar género y estilo (con fallback a fantasía)
+        cat = self.resolver_categoria(genero, estilo)
+        genero, estilo = cat.genero, cat.estilo
         
         # Obtener la configuración de la API
-        api_config = self.config.get("api", {}).get("grok-2-latest", {})
+        api_config = self._api_config()
         prompts = self.config.get("api", {}).get("prompts", {})
         
         if not api_config or not api_config.get("api_key"):
@@ -284,163 +1006,37 @@ class PersonajeGenerator:
         prompt = prompt_template.format(genero=genero, estilo=estilo)
         
         try:
-            # Hacer la petición a la API
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_config['api_key']}"
-            }
+            # Consultar la caché antes de ir a la API
+            cache = self._cache_ia()
+            clave = cache.clave(api_config["model"], prompt_template, genero, estilo, detallado) if cache else None
+            content = cache.obtener(clave) if cache else None
             
-            payload = {
-                "model": api_config["model"],
-                "messages": [{"role": "system", "content": "Eres un asistente que genera nombres y personajes de ficcion."},
-                             {"role": "user", "content": prompt}],
-                "temperature": 0.8,
-                "max_tokens": 500
-            }
-            
-            print(f"Enviando solicitud a API: {api_config['api_base_url']}")
-            
-            response = requests.post(
-                f"{api_config['api_base_url']}/chat/completions",
-                headers=headers,
-                json=payload
-            )
-            
-            print(f"Estado de respuesta: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"Error en API: {response.text}")
-                return {"error": f"Error en API ({response.status_code}): {response.text[:100]}..."}
-            
-            result = response.json()
-            
-            # Verificar que la respuesta tiene la estructura esperada
-            if "choices" not in result or not result["choices"]:
-                print(f"Respuesta sin choices: {result}")
-                return {"error": "Formato de respuesta inválido"}
-            
-            content = result["choices"][0].get("message", {}).get("content", "")
-            
-            if not content:
-                return {"error": "Respuesta vacía de la API"}
+            if content is None:
+                content = self._solicitar_ia(prompt, on_campo=on_campo if detallado else None)
+                if isinstance(content, dict):
+                    return content  # Error de la API
+                if cache:
+                    cache.guardar(clave, content)
             
             print(f"Contenido recibido: {content[:50]}...")
             
             if detallado:
                 try:
-                    # Intentar extraer el JSON de la respuesta
-                    content_clean = content
-                    if "```json" in content:
-                        content_clean = content.split("```json")[1].split("```")[0]
-                    elif "```" in content:
-                        content_clean = content.split("```")[1].split("```")[0]
-                    
-                    # Limpiar espacios en blanco al inicio y fin
-                    content_clean = content_clean.strip()
-                    
-                    print(f"Contenido JSON después de limpieza: {content_clean[:50]}...")
+                    # Extraer (y reparar si hace falta) la ficha de la respuesta
+                    personaje, metodo = extraer_personaje(content)
+                    if metodo != "json":
+                        print(f"Personaje recuperado por el método '{metodo}'")
                     
-                    # Verificar si comienza con una llave para ser un JSON válido
-                    if not content_clean.startswith("{"):
-                        if "{" in content_clean:
-                            # Intentar encontrar el inicio del JSON
-                            content_clean = content_clean[content_clean.find("{"):]
-                            print(f"Contenido JSON después de buscar llave inicial: {content_clean[:50]}...")
-                        else:
-                            # No hay JSON válido, construir manualmente
-                            raise json.JSONDecodeError("No se encontró estructura JSON", content_clean, 0)
-                    
-                    # Verificar si termina con una llave para ser un JSON válido
-                    if not content_clean.endswith("}"):
-                        if "}" in content_clean:
-                            # Intentar encontrar el final del JSON
-                            content_clean = content_clean[:content_clean.rfind("}")+1]
-                            print(f"Contenido JSON después de buscar llave final: {content_clean[:50]}...")
-                    
-                    # Convertir a JSON
-                    try:
-                        personaje = json.loads(content_clean)
-                    except:
-                        # Intento alternativo: extraer propiedades individualmente
-                        print("Intento alternativo: extracción manual de propiedades")
-                        personaje = {}
-                        
-                        # Buscar propiedades comunes
-                        for prop in ["nombre", "titulo", "edad", "profesion", "descripcion", "motivacion", "rasgo"]:
-                            # Buscar "prop": "valor" o "prop": valor
-                            prop_pattern = f'"{prop}"\\s*:\\s*"([^"]*)"'
-                            prop_pattern2 = f'"{prop}"\\s*:\\s*([^,"\\n]*)'
-                            
-                            import re
-                            # Buscar con comillas (para strings)
-                            matches = re.search(prop_pattern, content)
-                            if matches:
-                                personaje[prop] = matches.group(1)
-                            else:
-                                # Buscar sin comillas (para números)
-                                matches = re.search(prop_pattern2, content)
-                                if matches and prop == "edad":
-                                    try:
-                                        personaje[prop] = int(matches.group(1).strip())
-                                    except:
-                                        personaje[prop] = matches.group(1).strip()
-                                elif matches:
-                                    personaje[prop] = matches.group(1).strip()
-                        
-                        print(f"Propiedades extraídas manualmente: {personaje}")
-                    
-                    # Verificar campos mínimos necesarios
-                    if "nombre" not in personaje or not personaje["nombre"]:
-                        # Extraer primera línea como nombre si está vacío
-                        primera_linea = content.split("\n")[0].strip() if "\n" in content else content.strip()
-                        # Eliminar markdown, caracteres de puntuación y otras decoraciones
-                        for prefijo in ["#", "*", "_", "- ", "\"", "nombre:", "Nombre:"]:
-                            if primera_linea.startswith(prefijo):
-                                primera_linea = primera_linea[len(prefijo):].strip()
-                        personaje["nombre"] = primera_linea or "Personaje sin nombre"
+                    if metodo == "texto":
+                        # No había estructura: el texto completo queda como descripción
+                        personaje["error_formato"] = "La respuesta no tenía formato JSON válido"
                     
                     # Asegurarse de que todas las propiedades esperadas existan
-                    for prop in ["titulo", "edad", "profesion", "descripcion", "motivacion", "rasgo"]:
-                        if prop not in personaje:
-                            if prop == "edad":
-                                personaje[prop] = random.randint(20, 50)
-                            else:
-                                personaje[prop] = ""
-                    
-                    personaje["estilo"] = estilo
-                    personaje["genero"] = genero
-                    personaje["fecha_generacion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    self._completar_personaje_ia(personaje, genero, estilo)
                     
                     # Agregar al historial
-                    self.history.append(personaje)
-                    return personaje
-                except json.JSONDecodeError as e:
-                    print(f"Error de decodificación JSON: {e}")
-                    print(f"Contenido que falló: {content_clean}")
-                    
-                    # Intentar crear un personaje básico a partir del texto
-                    lineas = content.strip().split("\n")
-                    nombre = lineas[0] if lineas else "Personaje sin nombre"
-                    # Limpiar posibles caracteres markdown
-                    for prefijo in ["#", "*", "_", "- ", "\"", "nombre:", "Nombre:"]:
-                        if nombre.startswith(prefijo):
-                            nombre = nombre[len(prefijo):].strip()
-                    
-                    personaje = {
-                        "nombre": nombre,
-                        "titulo": "",
-                        "edad": random.randint(20, 50),
-                        "profesion": "",
-                        "descripcion": content,
-                        "motivacion": "",
-                        "rasgo": "",
-                        "estilo": estilo,
-                        "genero": genero,
-                        "fecha_generacion": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                        "error_formato": "La respuesta no tenía formato JSON válido"
-                    }
-                    
-                    self.history.append(personaje)
+                    if agregar_historial:
+                        self.history.append(personaje)
                     return personaje
                 except Exception as e:
                     print(f"Error al procesar JSON de IA: {e}")
@@ -457,634 +1053,572 @@ class PersonajeGenerator:
                 nombre = content.strip()
                 return nombre
             
-        except requests.exceptions.RequestException as e:
-            print(f"Error de conexión: {e}")
-            return {"error": f"Error de conexión: {str(e)}"}
         except Exception as e:
             print(f"Error general: {e}")
             return {"error": f"Error inesperado: {str(e)}"}
-
-class App:
-    """Clase principal de la aplicación con interfaz Tkinter"""
     
-    def __init__(self, root):
-        self.root = root
+    def _solicitar_ia(self, prompt, max_tokens=500, on_campo=None):
+        """Envía un prompt a la API y devuelve el contenido de la respuesta
         
-        # Cargar configuración
-        self.load_config()
+        Si algo falla devuelve un diccionario de error en lugar del texto.
+        """
+        import requests
+        from cliente_ia import ESTADOS_REINTENTADOS, parsear_retry_after
         
-        # Inicializar generador de personajes
-        self.generator = PersonajeGenerator(config_file="config.json")
+        api_config = self._api_config()
+        streaming = api_config.get("stream", False)
         
-        # Configurar la ventana principal
-        self.setup_window()
-        
-        # Aplicar tema personalizado
-        self.theme = TkinterCustomTheme(root, self.config["theme"])
-        
-        # Crear interfaz
-        self.create_ui()
-        
-        # Estado de generación
-        self.generating = False
-    
-    def load_config(self):
-        """Carga la configuración desde un archivo JSON"""
+        # Los errores de conexión y los 5xx de ESTADOS_REINTENTADOS ya los
+        # reintenta la sesión HTTP: no se marcan como reintentables aquí
+        respondida = False
         try:
-            with open("config.json", 'r', encoding='utf-8') as f:
-                self.config = json.load(f)
-        except Exception as e:
-            print(f"Error al cargar configuracion: {e}")
-            # Configuración por defecto
-            self.config = {
-                "app_name": "Generador de Personajes",
-                "theme": {
-                    "colors": {
-                        "background": "#282828",
-                        "secondary_bg": "#3c3c3c",
-                        "accent": "#ff6c37",
-                        "text": "#f8f8f8",
-                        "text_secondary": "#cccccc",
-                        "button": "#505050",
-                        "button_hover": "#656565"
-                    }
-                },
-                "settings": {"default_mode": "offline"}
+            # Hacer la petición a la API
+            payload = {
+                "model": api_config["model"],
+                "messages": [{"role": "system", "content": "Eres un asistente que genera nombres y personajes de ficcion."},
+                             {"role": "user", "content": prompt}],
+                "temperature": 0.8,
+                "max_tokens": max_tokens
             }
-    
-    def setup_window(self):
-        """Configura la ventana principal"""
-        app_name = self.config.get("app_name", "Generador de Personajes")
-        self.root.title(app_name)
-        self.root.geometry("900x650")
-        self.root.minsize(800, 600)
-        
-        # Configurar color de fondo
-        bg_color = self.config.get("theme", {}).get("colors", {}).get("background", "#282828")
-        self.root.configure(bg=bg_color)
-        
-        # Configurar para que los widgets se expandan con la ventana
-        self.root.columnconfigure(0, weight=1)
-        self.root.rowconfigure(0, weight=1)
-    
-    def create_ui(self):
-        """Crea la interfaz de usuario"""
-        # Frame principal
-        main_frame = ttk.Frame(self.root, style="Custom.TFrame")
-        main_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
-        main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(1, weight=1)
-        
-        # Título
-        app_name = self.config.get("app_name", "Generador de Personajes")
-        title_label = ttk.Label(
-            main_frame, 
-            text=app_name, 
-            style="Title.TLabel"
-        )
-        title_label.grid(row=0, column=0, pady=(0, 10), sticky="w")
-        
-        # Contenedor de pestañas
-        self.tab_control = ttk.Notebook(main_frame)
-        self.tab_control.grid(row=1, column=0, sticky="nsew")
-        
-        # Pestaña de generación
-        self.tab_generate = ttk.Frame(self.tab_control, style="Custom.TFrame")
-        self.tab_history = ttk.Frame(self.tab_control, style="Custom.TFrame")
-        
-        self.tab_control.add(self.tab_generate, text="Generador")
-        self.tab_control.add(self.tab_history, text="Historial")
-        
-        self.tab_generate.columnconfigure(0, weight=1)
-        self.tab_generate.rowconfigure(2, weight=1)
-        
-        self.tab_history.columnconfigure(0, weight=1)
-        self.tab_history.rowconfigure(1, weight=1)
-        
-        # Configurar pestaña de generación
-        self.setup_generator_tab()
-        
-        # Configurar pestaña de historial
-        self.setup_history_tab()
-        
-        # Barra de estado
-        status_frame = ttk.Frame(main_frame, style="Custom.TFrame")
-        status_frame.grid(row=2, column=0, sticky="ew", pady=(10, 0))
-        status_frame.columnconfigure(1, weight=1)
-        
-        # Etiqueta de estado
-        self.status_label = ttk.Label(
-            status_frame, 
-            text="Listo", 
-            style="Custom.TLabel"
-        )
-        self.status_label.grid(row=0, column=0, sticky="w")
-        
-        # Barra de progreso
-        self.progress = ttk.Progressbar(
-            status_frame, 
-            style="Custom.Horizontal.TProgressbar",
-            mode="indeterminate", 
-            length=200
-        )
-        self.progress.grid(row=0, column=1, sticky="e", padx=(10, 0))
-        self.progress.grid_remove()  # Ocultar inicialmente
-    
-    def setup_generator_tab(self):
-        """Configura la pestaña de generación"""
-        # Frame de opciones
-        options_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
-        options_frame.grid(row=0, column=0, sticky="ew", pady=(10, 10))
-        options_frame.columnconfigure(1, weight=1)
-        options_frame.columnconfigure(3, weight=1)
-        options_frame.columnconfigure(5, weight=1)
-        
-        # Etiquetas y controles
-        ttk.Label(options_frame, text="Modo:", style="Custom.TLabel").grid(row=0, column=0, sticky="w", padx=(0, 5))
-        
-        self.mode_var = tk.StringVar(value=self.config["settings"].get("default_mode", "offline"))
-        mode_combo = ttk.Combobox(
-            options_frame, 
-            textvariable=self.mode_var,
-            values=["offline", "ia"],
-            state="readonly",
-            style="Custom.TCombobox",
-            width=10
-        )
-        mode_combo.grid(row=0, column=1, sticky="ew", padx=(0, 10))
-        mode_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
-        
-        ttk.Label(options_frame, text="Género:", style="Custom.TLabel").grid(row=0, column=2, sticky="w", padx=(10, 5))
-        
-        self.gender_var = tk.StringVar(value=self.config["settings"].get("default_gender", "aleatorio"))
-        gender_combo = ttk.Combobox(
-            options_frame, 
-            textvariable=self.gender_var,
-            values=["aleatorio", "masculino", "femenino", "neutro"],
-            state="readonly",
-            style="Custom.TCombobox",
-            width=10
-        )
-        gender_combo.grid(row=0, column=3, sticky="ew", padx=(0, 10))
-        gender_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
-        
-        ttk.Label(options_frame, text="Estilo:", style="Custom.TLabel").grid(row=0, column=4, sticky="w", padx=(10, 5))
-        
-        self.style_var = tk.StringVar(value=self.config["settings"].get("default_style", "fantasia"))
-        style_combo = ttk.Combobox(
-            options_frame, 
-            textvariable=self.style_var,
-            values=["fantasia", "ciencia_ficcion", "medieval", "moderno"],
-            state="readonly",
-            style="Custom.TCombobox",
-            width=12
-        )
-        style_combo.grid(row=0, column=5, sticky="ew")
-        style_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
-        
-        # Frame de opciones adicionales
-        more_options_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
-        more_options_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
-        
-        # Opciones adicionales
-        self.detailed_var = tk.BooleanVar(value=True)
-        detailed_check = ttk.Checkbutton(
-            more_options_frame, 
-            text="Generar personaje detallado",
-            variable=self.detailed_var,
-            style="Custom.TCheckbutton"
-        )
-        detailed_check.grid(row=0, column=0, sticky="w")
-        
-        self.multi_var = tk.BooleanVar(value=False)
-        multi_check = ttk.Checkbutton(
-            more_options_frame, 
-            text="Generar múltiples",
-            variable=self.multi_var,
-            style="Custom.TCheckbutton",
-            command=self.toggle_multi_options
-        )
-        multi_check.grid(row=0, column=1, sticky="w", padx=(20, 0))
-        
-        # Opciones para generación múltiple (inicialmente ocultas)
-        self.multi_options_frame = ttk.Frame(more_options_frame, style="Custom.TFrame")
-        self.multi_options_frame.grid(row=0, column=2, sticky="w", padx=(10, 0))
-        self.multi_options_frame.grid_remove()  # Ocultar inicialmente
-        
-        ttk.Label(self.multi_options_frame, text="Cantidad:", style="Custom.TLabel").grid(row=0, column=0, sticky="w")
-        
-        self.quantity_var = tk.StringVar(value="5")
-        quantity_spinbox = ttk.Spinbox(
-            self.multi_options_frame, 
-            from_=1, 
-            to=50, 
-            textvariable=self.quantity_var,
-            width=5
-        )
-        quantity_spinbox.grid(row=0, column=1, sticky="w", padx=(5, 0))
-        
-        # Frame para el botón de generación
-        button_frame = ttk.Frame(more_options_frame, style="Custom.TFrame")
-        button_frame.grid(row=0, column=3, sticky="e", padx=(0, 0))
-        more_options_frame.columnconfigure(3, weight=1)
-        
-        # Botón de generación
-        self.generate_button = ttk.Button(
-            button_frame,
-            text="Generar",
-            style="Custom.TButton",
-            command=self.generate_character
-        )
-        self.generate_button.grid(row=0, column=0, sticky="e")
-        
-        # Frame de resultados
-        results_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
-        results_frame.grid(row=2, column=0, sticky="nsew")
-        results_frame.columnconfigure(0, weight=1)
-        results_frame.rowconfigure(0, weight=1)
-        
-        # Área de texto para mostrar los resultados
-        self.result_text = scrolledtext.ScrolledText(
-            results_frame,
-            wrap=tk.WORD,
-            bg=self.config["theme"]["colors"]["secondary_bg"],
-            fg=self.config["theme"]["colors"]["text"],
-            insertbackground=self.config["theme"]["colors"]["text"],
-            font=("Consolas", 10),
-            borderwidth=1,
-            relief=tk.FLAT
-        )
-        self.result_text.grid(row=0, column=0, sticky="nsew")
-        
-        # Botones de acciones
-        actions_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
-        actions_frame.grid(row=3, column=0, sticky="ew", pady=(10, 0))
-        
-        # Botón para copiar al portapapeles
-        self.copy_button = ttk.Button(
-            actions_frame,
-            text="Copiar",
-            style="Custom.TButton",
-            command=self.copy_to_clipboard
-        )
-        self.copy_button.grid(row=0, column=0, sticky="w")
-        
-        # Botón para guardar en archivo
-        self.save_button = ttk.Button(
-            actions_frame,
-            text="Guardar",
-            style="Custom.TButton",
-            command=self.save_to_file
-        )
-        self.save_button.grid(row=0, column=1, sticky="w", padx=(10, 0))
-        
-        # Botón para limpiar
-        self.clear_button = ttk.Button(
-            actions_frame,
-            text="Limpiar",
-            style="Custom.TButton",
-            command=self.clear_results
-        )
-        self.clear_button.grid(row=0, column=2, sticky="w", padx=(10, 0))
-    
-    def setup_history_tab(self):
-        """Configura la pestaña de historial"""
-        # Etiqueta
-        ttk.Label(self.tab_history, text="Personajes generados:", style="Custom.TLabel").grid(row=0, column=0, sticky="w", pady=(10, 5))
-        
-        # Lista de personajes
-        self.history_text = scrolledtext.ScrolledText(
-            self.tab_history,
-            wrap=tk.WORD,
-            bg=self.config["theme"]["colors"]["secondary_bg"],
-            fg=self.config["theme"]["colors"]["text"],
-            insertbackground=self.config["theme"]["colors"]["text"],
-            font=("Consolas", 10),
-            borderwidth=1,
-            relief=tk.FLAT
-        )
-        self.history_text.grid(row=1, column=0, sticky="nsew")
-        
-        # Botones de acciones
-        history_actions_frame = ttk.Frame(self.tab_history, style="Custom.TFrame")
-        history_actions_frame.grid(row=2, column=0, sticky="ew", pady=(10, 0))
-        
-        # Botón para refrescar historial
-        self.refresh_button = ttk.Button(
-            history_actions_frame,
-            text="Refrescar",
-            style="Custom.TButton",
-            command=self.refresh_history
-        )
-        self.refresh_button.grid(row=0, column=0, sticky="w")
-        
-        # Botón para exportar historial
-        self.export_button = ttk.Button(
-            history_actions_frame,
-            text="Exportar",
-            style="Custom.TButton",
-            command=self.export_history
-        )
-        self.export_button.grid(row=0, column=1, sticky="w", padx=(10, 0))
-        
-        # Botón para limpiar historial
-        self.clear_history_button = ttk.Button(
-            history_actions_frame,
-            text="Limpiar historial",
-            style="Custom.TButton",
-            command=self.clear_history
-        )
-        self.clear_history_button.grid(row=0, column=2, sticky="w", padx=(10, 0))
-    
-    def toggle_multi_options(self):
-        """Muestra u oculta las opciones de generación múltiple"""
-        if self.multi_var.get():
-            self.multi_options_frame.grid()
-        else:
-            self.multi_options_frame.grid_remove()
-    
-    def update_status(self, message):
-        """Actualiza el mensaje de estado"""
-        self.status_label.config(text=message)
-        self.root.update_idletasks()
-    
-    def start_progress(self):
-        """Inicia la barra de progreso"""
-        self.progress.grid()
-        self.progress.start(10)
-        self.root.update_idletasks()
-    
-    def stop_progress(self):
-        """Detiene la barra de progreso"""
-        self.progress.stop()
-        self.progress.grid_remove()
-        self.root.update_idletasks()
-    
-    def generate_character(self):
-        """Genera un personaje o múltiples personajes"""
-        if self.generating:
-            return
-        
-        self.generating = True
-        self.generate_button.config(state="disabled")
-        self.clear_results()
-        
-        # Obtener parámetros
-        mode = self.mode_var.get()
-        gender = self.gender_var.get()
-        style = self.style_var.get()
-        detailed = self.detailed_var.get()
-        multi = self.multi_var.get()
-        
-        try:
-            quantity = int(self.quantity_var.get())
-            if quantity < 1:
-                quantity = 1
-            elif quantity > 50:
-                quantity = 50
-        except:
-            quantity = 5
-        
-        # Actualizar la interfaz para mostrar estado
-        self.update_status("Generando personaje(s)...")
-        self.start_progress()
-        
-        # Iniciar generación en un hilo para no bloquear la interfaz
-        thread = threading.Thread(
-            target=self._generate_in_thread,
-            args=(mode, gender, style, detailed, multi, quantity)
-        )
-        thread.daemon = True
-        thread.start()
-    
-    def _generate_in_thread(self, mode, gender, style, detailed, multi, quantity):
-        """Genera personajes en un hilo separado"""
-        try:
-            results = []
             
-            if multi:
-                self.result_text.insert(tk.END, f"Generando {quantity} personajes...\n\n")
-                self.result_text.update_idletasks()
-                
-                for i in range(quantity):
-                    try:
-                        if mode == "offline":
-                            result = self.generator.generar_personaje_offline(gender, style, detailed)
-                        else:  # mode == "ia"
-                            result = self.generator.generar_personaje_con_ia(gender, style, detailed)
-                        
-                        results.append(result)
-                        
-                        # Mostrar progreso
-                        if detailed and isinstance(result, dict) and "nombre" in result:
-                            nombre = result.get("nombre", "Sin nombre")
-                            self.result_text.insert(tk.END, f"{i+1}. {nombre}\n")
-                        elif isinstance(result, dict) and "error" in result:
-                            self.result_text.insert(tk.END, f"{i+1}. Error: {result['error']}\n")
-                        else:
-                            self.result_text.insert(tk.END, f"{i+1}. {result}\n")
-                        
-                        self.result_text.see(tk.END)
-                        self.result_text.update_idletasks()
-                        
-                        # Pequeña pausa para no saturar la API
-                        if mode == "ia" and i < quantity - 1:
-                            time.sleep(1)
-                    except Exception as e:
-                        error_msg = f"Error en personaje {i+1}: {str(e)}"
-                        print(error_msg)
-                        self.result_text.insert(tk.END, f"{error_msg}\n")
-                        results.append({"error": str(e), "nombre": f"Error en personaje {i+1}"})
-            else:
-                try:
-                    if mode == "offline":
-                        result = self.generator.generar_personaje_offline(gender, style, detailed)
-                    else:  # mode == "ia"
-                        result = self.generator.generar_personaje_con_ia(gender, style, detailed)
-                    
-                    results.append(result)
-                except Exception as e:
-                    error_msg = f"Error: {str(e)}"
-                    print(error_msg)
-                    results.append({"error": str(e), "nombre": "Error en personaje"})
+            # Esperar turno en el limitador (tokens estimados: prompt + respuesta)
+            limitador = self._limitador_ia()
+            limitador.adquirir(tokens=len(prompt) // 4 + payload["max_tokens"])
             
-            # Mostrar resultados completos
-            self.result_text.delete(1.0, tk.END)
+            print(f"Enviando solicitud a API: {api_config['api_base_url']}")
             
-            for i, result in enumerate(results):
-                if detailed and isinstance(result, dict) and not "error" in result:
-                    # Formato para personaje detallado
-                    self.result_text.insert(tk.END, f"{'=' * 40}\n")
-                    self.result_text.insert(tk.END, f"PERSONAJE {i+1 if multi else ''}\n")
-                    self.result_text.insert(tk.END, f"{'=' * 40}\n\n")
-                    
-                    self.result_text.insert(tk.END, f"Nombre: {result.get('nombre', 'Sin nombre')}\n")
-                    
-                    if result.get('titulo'):
-                        self.result_text.insert(tk.END, f"Título: {result['titulo']}\n")
-                    
-                    self.result_text.insert(tk.END, f"Edad: {result.get('edad', 'Desconocida')}\n")
-                    
-                    if result.get('profesion'):
-                        self.result_text.insert(tk.END, f"Profesión: {result['profesion']}\n")
-                    
-                    if result.get('rasgo'):
-                        self.result_text.insert(tk.END, f"Rasgo distintivo: {result['rasgo']}\n")
-                    
-                    if result.get('motivacion'):
-                        self.result_text.insert(tk.END, f"Motivación: {result['motivacion']}\n")
-                    
-                    # Si hay descripción (generada por IA)
-                    if result.get('descripcion'):
-                        self.result_text.insert(tk.END, f"\nDescripción: {result['descripcion']}\n")
-                    
-                    # Si hubo un error de formato pero se logró recuperar
-                    if result.get('error_formato'):
-                        self.result_text.insert(tk.END, f"\nNota: {result['error_formato']}\n")
-                    
-                    self.result_text.insert(tk.END, f"\n")
-                else:
-                    # Formato simple o error
-                    if isinstance(result, dict) and "error" in result:
-                        if multi:
-                            self.result_text.insert(tk.END, f"{i+1}. Error: {result['error']}\n\n")
-                        else:
-                            self.result_text.insert(tk.END, f"Error: {result['error']}\n\n")
-                            # Mostrar respuesta cruda si está disponible
-                            if result.get('descripcion'):
-                                self.result_text.insert(tk.END, f"Respuesta recibida:\n{result['descripcion']}\n\n")
-                    else:
-                        if multi:
-                            self.result_text.insert(tk.END, f"{i+1}. {result}\n")
-                        else:
-                            self.result_text.insert(tk.END, f"{result}\n")
+            if streaming:
+                payload["stream"] = True
             
-            # Guardar historial si está habilitado
-            self.generator.save_history()
+            inicio = time.perf_counter()
+            cliente = self._cliente_ia(api_config)
+            response = cliente.chat(payload, stream=streaming)
+            respondida = True
             
-            # Actualizar la pestaña de historial
-            if self.tab_control.index("current") == 1:  # Si estamos en la pestaña de historial
-                self.refresh_history()
+            print(f"Estado de respuesta: {response.status_code}")
             
-            # Mostrar mensaje de finalización
-            self.update_status(f"Generados {len(results)} personaje(s)")
+            if response.status_code != 200:
+                print(f"Error en API: {response.text}")
+                retry_after = parsear_retry_after(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    limitador.penalizar(retry_after)
+                return {
+                    "error": f"Error en API ({response.status_code}): {response.text[:100]}...",
+                    "codigo": response.status_code,
+                    "retry_after": retry_after,
+                    "reintentable": response.status_code == 429 or (
+                        response.status_code >= 500 and response.status_code not in ESTADOS_REINTENTADOS
+                    )
+                }
             
-        except Exception as e:
-            import traceback
-            error_detail = traceback.format_exc()
-            print(f"Error durante la generación: {str(e)}")
-            print(f"Detalles: {error_detail}")
-            self.result_text.insert(tk.END, f"Error durante la generación: {str(e)}\n")
-            self.result_text.insert(tk.END, f"Detalles del error:\n{error_detail}\n")
-            self.update_status(f"Error: {str(e)}")
-        finally:
-            self.stop_progress()
-            self.generate_button.config(state="normal")
-            self.generating = False
-    
-    def copy_to_clipboard(self):
-        """Copia el contenido del área de resultados al portapapeles"""
-        text = self.result_text.get(1.0, tk.END).strip()
-        if text:
-            self.root.clipboard_clear()
-            self.root.clipboard_append(text)
-            self.update_status("Copiado al portapapeles")
-    
-    def save_to_file(self):
-        """Guarda el contenido del área de resultados a un archivo"""
-        text = self.result_text.get(1.0, tk.END).strip()
-        if not text:
-            return
-        
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".txt",
-            filetypes=[("Archivos de texto", "*.txt"), ("Todos los archivos", "*.*")],
-            title="Guardar personaje(s)"
-        )
-        
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(text)
-                self.update_status(f"Guardado en {file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al guardar: {str(e)}")
-    
-    def clear_results(self):
-        """Limpia el área de resultados"""
-        self.result_text.delete(1.0, tk.END)
-        self.update_status("Listo")
-    
-    def refresh_history(self):
-        """Actualiza la lista de historial"""
-        self.history_text.delete(1.0, tk.END)
-        
-        if not self.generator.history:
-            self.history_text.insert(tk.END, "No hay personajes en el historial.")
-            return
-        
-        for i, personaje in enumerate(reversed(self.generator.history), 1):
-            self.history_text.insert(tk.END, f"{'=' * 40}\n")
-            self.history_text.insert(tk.END, f"PERSONAJE {i} - {personaje.get('fecha_generacion', 'Fecha desconocida')}\n")
-            self.history_text.insert(tk.END, f"{'=' * 40}\n\n")
+            limitador.exito()
             
-            self.history_text.insert(tk.END, f"Nombre: {personaje.get('nombre', 'Sin nombre')}\n")
+            if streaming:
+                return self._leer_stream_ia(cliente, response, inicio, on_campo)
             
-            if personaje.get('titulo'):
-                self.history_text.insert(tk.END, f"Título: {personaje['titulo']}\n")
+            result = response.json()
             
-            if 'edad' in personaje:
-                self.history_text.insert(tk.END, f"Edad: {personaje['edad']}\n")
+            # Verificar que la respuesta tiene la estructura esperada
+            if "choices" not in result or not result["choices"]:
+                print(f"Respuesta sin choices: {result}")
+                return {"error": "Formato de respuesta inválido"}
             
-            if personaje.get('profesion'):
-                self.history_text.insert(tk.END, f"Profesión: {personaje['profesion']}\n")
+            content = result["choices"][0].get("message", {}).get("content", "")
             
-            if personaje.get('rasgo'):
-                self.history_text.insert(tk.END, f"Rasgo distintivo: {personaje['rasgo']}\n")
+            if not content:
+                return {"error": "Respuesta vacía de la API"}
             
-            if personaje.get('motivacion'):
-                self.history_text.insert(tk.END, f"Motivación: {personaje['motivacion']}\n")
+            return content
+        except requests.exceptions.RequestException as e:
+            print(f"Error de conexión: {e}")
+            # Solo un corte a mitad de la respuesta (en streaming) no lo ha reintentado ya la sesión
+            return {"error": f"Error de conexión: {str(e)}", "reintentable": respondida}
+    
+    def _leer_stream_ia(self, cliente, response, inicio, on_campo=None):
+        """Acumula una respuesta en streaming notificando cada campo completo"""
+        from extractor import ParserCamposIncremental
+        
+        parser = ParserCamposIncremental() if on_campo else None
+        partes = []
+        primer_campo = None
+        
+        with response:
+            for fragmento in cliente.chat_stream(response):
+                partes.append(fragmento)
+                if parser is None:
+                    continue
+                for campo, valor in parser.alimentar(fragmento):
+                    if primer_campo is None:
+                        primer_campo = time.perf_counter() - inicio
+                        print(f"Primer campo recibido en {primer_campo:.2f}s")
+                    try:
+                        on_campo(campo, valor)
+                    except Exception as e:
+                        print(f"Error al mostrar campo: {e}")
+        
+        print(f"Respuesta completa en {time.perf_counter() - inicio:.2f}s")
+        
+        content = "".join(partes)
+        if not content:
+            return {"error": "Respuesta vacía de la API"}
+        return content
+    
+    def _completar_personaje_ia(self, personaje, genero, estilo):
+        """Rellena los campos que falten en un personaje devuelto por la IA"""
+        for prop in ["titulo", "edad", "profesion", "descripcion", "motivacion", "rasgo"]:
+            if prop not in personaje:
+                if prop == "edad":
+                    personaje[prop] = self._rng.randint(20, 50)
+                else:
+                    personaje[prop] = ""
+        
+        personaje["estilo"] = estilo
+        personaje["genero"] = genero
+        personaje["fecha_generacion"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        return personaje
+    
+    def generar_grupo_con_ia(self, cantidad, genero="aleatorio", estilo="fantasia", detallado=False):
+        """Pide varios personajes a la IA en una sola solicitud
+        
+        Los nombres se piden con el prompt lista_nombres (separados por comas)
+        y las fichas detalladas como un array JSON. Si la respuesta trae menos
+        personajes de los pedidos se solicitan solo los que faltan. Con la
+        caché activada se toman primero los personajes guardados y se guardan
+        los recibidos, uno por entrada. Devuelve una lista de resultados
+        individuales (o de errores para los que no se pudieron obtener).
+        """
+        from extractor import extraer_personajes
+        
+        # Un único género y estilo para todo el grupo (generar_lote_con_ia
+        # sortea el género por personaje antes de agrupar)
+        cat = self.resolver_categoria(genero, estilo)
+        genero, estilo = cat.genero, cat.estilo
+        
+        api_config = self._api_config()
+        prompts = self.config.get("api", {}).get("prompts", {})
+        
+        if not api_config or not api_config.get("api_key"):
+            return [{"error": "No hay configuracion API disponible"}] * cantidad
+        
+        prompt_template = prompts.get("lista_personajes_detallados" if detallado else "lista_nombres", "")
+        if not prompt_template:
+            return [{"error": "No hay prompt definido"}] * cantidad
+        
+        # La caché guarda un personaje por entrada, con la misma clave que las
+        # peticiones individuales, así que ambas comparten las respuestas
+        cache = self._cache_ia()
+        clave = None
+        if cache:
+            plantilla = prompts.get("personaje_detallado" if detallado else "personaje", "")
+            clave = cache.clave(api_config["model"], plantilla, genero, estilo, detallado)
+        
+        resultados = self._grupo_desde_cache(cache, clave, cantidad, genero, estilo, detallado) if cache else []
+        error = None
+        for intento in range(api_config.get("max_retries", 3) + 1):
+            faltan = cantidad - len(resultados)
+            if faltan <= 0:
+                break
             
-            if personaje.get('descripcion'):
-                self.history_text.insert(tk.END, f"\nDescripción: {personaje['descripcion']}\n")
+            prompt = prompt_template.format(cantidad=faltan, genero=genero, estilo=estilo)
+            # Presupuesto de respuesta proporcional al número de personajes
+            content = self._solicitar_ia(prompt, max_tokens=100 + faltan * (350 if detallado else 20))
+            if isinstance(content, dict):
+                error = content
+                if not content.get("reintentable"):
+                    break
+                continue
             
-            self.history_text.insert(tk.END, f"\nGénero: {personaje.get('genero', 'No especificado')}\n")
-            self.history_text.insert(tk.END, f"Estilo: {personaje.get('estilo', 'No especificado')}\n")
+            print(f"Contenido recibido: {content[:50]}...")
             
-            self.history_text.insert(tk.END, f"\n\n")
+            if detallado:
+                for personaje in extraer_personajes(content)[:faltan]:
+                    if cache:
+                        cache.guardar(clave, json.dumps(personaje, ensure_ascii=False))
+                    self._completar_personaje_ia(personaje, genero, estilo)
+                    self.history.append(personaje)
+                    resultados.append(personaje)
+            else:
+                for nombre in self._separar_nombres_ia(content)[:faltan]:
+                    if cache:
+                        cache.guardar(clave, nombre)
+                    resultados.append(nombre)
+        
+        error = error or {"error": "La respuesta no incluía todos los personajes solicitados"}
+        return resultados + [error] * (cantidad - len(resultados))
     
-    def export_history(self):
-        """Exporta el historial a un archivo JSON"""
-        if not self.generator.history:
-            messagebox.showinfo("Información", "No hay personajes en el historial para exportar.")
-            return
+    def _grupo_desde_cache(self, cache, clave, cantidad, genero, estilo, detallado):
+        """Toma de la caché hasta cantidad personajes distintos para un grupo
+        
+        Se para al primer fallo o al volver a una respuesta ya tomada (la
+        caché las rota), para no repetir personajes dentro del grupo.
+        """
+        from extractor import extraer_personaje
+        
+        resultados = []
+        tomadas = set()
+        while len(resultados) < cantidad:
+            content = cache.obtener(clave)
+            if content is None or content in tomadas:
+                break
+            tomadas.add(content)
+            if detallado:
+                personaje, _ = extraer_personaje(content)
+                self._completar_personaje_ia(personaje, genero, estilo)
+                self.history.append(personaje)
+                resultados.append(personaje)
+            else:
+                resultados.append(content.strip())
+        return resultados
+    
+    @staticmethod
+    def _separar_nombres_ia(content):
+        """Divide una lista de nombres separados por comas o líneas"""
+        nombres = []
+        for nombre in content.replace("\n", ",").split(","):
+            # Eliminar numeración, viñetas y comillas
+            nombre = nombre.strip().lstrip("0123456789.-*) ").strip(" \"'")
+            if nombre:
+                nombres.append(nombre)
+        return nombres
+
+# Campos de las salidas jsonl/csv del comando generate
+CAMPOS_SALIDA = ("nombre", "titulo", "edad", "profesion", "descripcion", "rasgo", "motivacion", "estilo", "genero", "fecha_generacion")
+CAMPOS_SALIDA_NOMBRE = ("nombre", "estilo", "genero")
+FORMATOS_SALIDA = ("jsonl", "texto", "csv")
+
+def crear_parser():
+    """Parser de la línea de comandos; sin subcomando se abre la interfaz gráfica"""
+    parser = argparse.ArgumentParser(prog="chargen", description="Generador de personajes ficticios")
+    subparsers = parser.add_subparsers(dest="comando")
+    
+    generate = subparsers.add_parser(
+        "generate",
+        help="Genera personajes sin interfaz gráfica",
+        description="Genera personajes y los escribe según se producen, sin cargar Tkinter"
+    )
+    generate.add_argument("--mode", choices=("offline", "ia"), help="Modo de generación (por defecto, el de config.json)")
+    generate.add_argument("--gender", choices=("aleatorio",) + PersonajeGenerator.GENEROS, help="Género de los personajes")
+    generate.add_argument("--style", help="Estilo: fantasia, ciencia_ficcion, medieval, moderno...")
+    generate.add_argument("--detailed", action="store_true", help="Ficha completa en lugar de solo el nombre")
+    generate.add_argument("-n", "--count", type=int, default=1, help="Número de personajes")
+    generate.add_argument("--seed", type=int, help="Semilla para reproducir la generación offline")
+    generate.add_argument("--format", choices=FORMATOS_SALIDA, default="jsonl", help="Formato de salida")
+    generate.add_argument("-o", "--output", default="-", help="Archivo de salida (- para la salida estándar)")
+    generate.add_argument("--chunk-size", type=int, default=10000, help="Personajes generados y escritos por bloque")
+    generate.add_argument("--unique", action="store_true",
+                          help="Nombres offline sin repeticiones (error si se piden más de los que hay); no admite --detailed")
+    generate.add_argument("--processes", type=int, default=1,
+                          help="Reparte la generación offline en este número de procesos (y de fragmentos)")
+    generate.add_argument("--save-history", action="store_true", help="Guardar también los personajes en el historial")
+    generate.add_argument("--config", default="config.json", help="Archivo de configuración")
+    generate.add_argument("--startup-report", action="store_true",
+                          help="Ejecuta el comando con -X importtime y resume el coste del arranque")
+    
+    serve = subparsers.add_parser(
+        "serve",
+        help="Sirve la generación por HTTP",
+        description="Servicio HTTP local con las rutas /offline, /lote, /ia, /estadisticas, /historial/estadisticas y /salud"
+    )
+    serve.add_argument("--host", help="Dirección de escucha (por defecto, settings.server.host)")
+    serve.add_argument("--port", type=int, help="Puerto (0 para uno libre; por defecto, settings.server.port)")
+    serve.add_argument("--workers", type=int, help="Procesos para los lotes grandes")
+    serve.add_argument("--save-history", action="store_true", help="Guardar en el historial los personajes servidos")
+    serve.add_argument("--config", default="config.json", help="Archivo de configuración")
+    
+    stats = subparsers.add_parser(
+        "stats",
+        help="Muestra las estadísticas del historial",
+        description="Escribe en JSON las distribuciones del historial guardado (estilo, género, profesión, nombres, edades)"
+    )
+    stats.add_argument("--top", type=int, default=10, help="Profesiones y nombres repetidos que se listan")
+    stats.add_argument("--config", default="config.json", help="Archivo de configuración")
+    
+    export = subparsers.add_parser(
+        "export",
+        help="Exporta el historial",
+        description="Exporta el historial guardado por bloques (la memoria no depende de su tamaño)"
+    )
+    export.add_argument("-o", "--output", required=True,
+                        help="Archivo de salida; el formato sale de la extensión (.jsonl, .csv, .json; con .gz, comprimido)")
+    export.add_argument("--format", choices=("jsonl", "csv", "json"), help="Formato (por defecto, según la extensión)")
+    export.add_argument("--gzip", action="store_true", help="Comprimir con gzip aunque la extensión no sea .gz")
+    export.add_argument("--start", type=int, default=0, help="Primera posición del historial que se recorre")
+    export.add_argument("--end", type=int, help="Posición del historial en la que se detiene la exportación (sin incluirla)")
+    export.add_argument("--search", help="Solo los personajes con estas palabras (nombre, título, profesión, rasgo, motivación)")
+    export.add_argument("--style", help="Solo los personajes de este estilo")
+    export.add_argument("--gender", choices=PersonajeGenerator.GENEROS, help="Solo los personajes de este género")
+    export.add_argument("--since", help="Solo los generados desde esta fecha (AAAA-MM-DD[ HH:MM:SS])")
+    export.add_argument("--until", help="Solo los generados hasta esta fecha, incluida")
+    export.add_argument("--chunk-size", type=int, default=5000, help="Personajes leídos y escritos por bloque")
+    export.add_argument("--config", default="config.json", help="Archivo de configuración")
+    return parser
+
+def generar_bloques(generador, cantidad, modo, genero, estilo, detallado, tamano_bloque, guardar_historial, con_fecha=True,
+                    unicos=False):
+    """Genera cantidad personajes en bloques de tamano_bloque
+    
+    Cada bloque es una lista de diccionarios (o de errores de la IA); el
+    generador no conserva nada entre bloques, así que la memoria no depende
+    de la cantidad total. Sin con_fecha, los personajes offline se devuelven
+    sin fecha_generacion para que la salida de una semilla sea reproducible.
+    Con unicos (solo nombres offline) no se repite ningún nombre y se lanza
+    ValueError antes del primer bloque si no hay combinaciones suficientes.
+    """
+    tamano_bloque = max(1, tamano_bloque)
+    if unicos:
+        nombres = generador._recorrer_nombres_unicos(cantidad, genero, estilo)
+        while True:
+            bloque = [{"nombre": nombre, "estilo": cat.estilo, "genero": cat.genero}
+                      for nombre, cat in islice(nombres, tamano_bloque)]
+            if not bloque:
+                return
+            yield bloque
+
+    if modo == "ia":
+        # Suficiente para mantener ocupadas las peticiones concurrentes
+        tamano_bloque = min(tamano_bloque, 100)
+    
+    restantes = cantidad
+    while restantes > 0:
+        n = min(tamano_bloque, restantes)
+        restantes -= n
+        
+        if modo == "offline":
+            # Como en la interfaz, solo las fichas completas van al historial
+            lote = generador.generar_lote_offline(n, genero, estilo, agregar_historial=guardar_historial and detallado)
+            if detallado:
+                bloque = lote.como_dicts()
+                if not con_fecha:
+                    for personaje in bloque:
+                        del personaje["fecha_generacion"]
+            else:
+                bloque = [{"nombre": p["nombre"], "estilo": p["estilo"], "genero": p["genero"]} for p in lote]
+        else:
+            bloque = [
+                resultado if isinstance(resultado, Mapping) else {"nombre": resultado}
+                for resultado in generador.generar_lote_con_ia(n, genero, estilo, detallado)
+            ]
         
-        file_path = filedialog.asksaveasfilename(
-            defaultextension=".json",
-            filetypes=[("Archivos JSON", "*.json"), ("Todos los archivos", "*.*")],
-            title="Exportar historial"
-        )
+        if guardar_historial:
+            generador.liberar_historial()
+        elif modo == "ia":
+            generador.history.clear()  # La IA añade al historial en memoria
         
-        if file_path:
-            try:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    json.dump(self.generator.history, f, ensure_ascii=False, indent=2)
-                self.update_status(f"Historial exportado a {file_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error al exportar: {str(e)}")
+        yield bloque
+
+def escribir_bloque(salida, bloque, formato, detallado, escritor_csv=None):
+    """Escribe un bloque en el formato pedido; los errores van a stderr"""
+    validos = []
+    for personaje in bloque:
+        if "error" in personaje:
+            print(f"Error: {personaje['error']}", file=sys.stderr)
+        else:
+            validos.append(personaje)
     
-    def clear_history(self):
-        """Limpia el historial de personajes"""
-        if not self.generator.history:
-            return
+    if formato == "jsonl":
+        salida.write("".join(json.dumps(p, ensure_ascii=False) + "\n" for p in validos))
+    elif formato == "csv":
+        escritor_csv.writerows(validos)
+    elif detallado:
+        for p in validos:
+            lineas = [f"Nombre: {p.get('nombre', 'Sin nombre')}"]
+            if p.get("titulo"):
+                lineas.append(f"Título: {p['titulo']}")
+            lineas.append(f"Edad: {p.get('edad', 'Desconocida')}")
+            if p.get("profesion"):
+                lineas.append(f"Profesión: {p['profesion']}")
+            if p.get("rasgo"):
+                lineas.append(f"Rasgo distintivo: {p['rasgo']}")
+            if p.get("motivacion"):
+                lineas.append(f"Motivación: {p['motivacion']}")
+            if p.get("descripcion"):
+                lineas.append(f"Descripción: {p['descripcion']}")
+            salida.write("\n".join(lineas) + "\n\n")
+    else:
+        salida.write("".join(p["nombre"] + "\n" for p in validos))
+    
+    salida.flush()
+    return len(bloque) - len(validos)
+
+def comando_generate(args):
+    """Implementa `chargen generate`: devuelve el código de salida del proceso"""
+    salida = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8", newline="")
+    errores = 0
+    
+    # Los mensajes de diagnóstico del generador van a stderr para no mezclarse con los datos
+    with contextlib.redirect_stdout(sys.stderr):
+        inicio = time.perf_counter()
+        generador = PersonajeGenerator(args.config, semilla=args.seed, historial=args.save_history)
+        fases = [("inicialización del generador", time.perf_counter() - inicio)]
+        settings = generador.config.get("settings", {})
+        modo = "offline" if args.unique else args.mode or settings.get("default_mode", "offline")
+        genero = args.gender or settings.get("default_gender", "aleatorio")
+        estilo = args.style or settings.get("default_style", "fantasia")
+        
+        escritor_csv = None
+        if args.format == "csv":
+            escritor_csv = csv.DictWriter(
+                salida,
+                CAMPOS_SALIDA if args.detailed else CAMPOS_SALIDA_NOMBRE,
+                restval="",
+                extrasaction="ignore"
+            )
+            escritor_csv.writeheader()
         
-        if messagebox.askyesno("Confirmar", "¿Está seguro de borrar todo el historial?"):
-            self.generator.history = []
-            self.generator.save_history()
-            self.refresh_history()
-            self.update_status("Historial borrado")
+        try:
+            if args.processes > 1 and modo == "offline" and not args.unique:
+                from paralelo import generar_en_procesos
+                if args.save_history:
+                    print("Aviso: con --processes los personajes no se guardan en el historial")
+                errores += generar_en_procesos(args.config, salida, args.count, args.processes, args.seed, genero, estilo,
+                                               args.detailed, args.format, args.chunk_size)
+            else:
+                for bloque in generar_bloques(generador, args.count, modo, genero, estilo, args.detailed,
+                                              args.chunk_size, args.save_history, con_fecha=args.seed is None,
+                                              unicos=args.unique):
+                    errores += escribir_bloque(salida, bloque, args.format, args.detailed, escritor_csv)
+                    if len(fases) == 1:
+                        fases.append(("primer bloque", time.perf_counter() - inicio - fases[0][1]))
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            errores += 1
+        except BrokenPipeError:
+            # El consumidor (head, por ejemplo) ha cerrado la tubería: descartar
+            # lo que quede en el buffer en lugar de fallar al salir
+            os.dup2(os.open(os.devnull, os.O_WRONLY), salida.fileno())
+        finally:
+            generador.cerrar()
+            if args.output != "-":
+                salida.close()
+    
+    if os.environ.get(VARIABLE_INFORME_ARRANQUE):
+        for fase, segundos in fases:
+            print(f"{PREFIJO_FASE}{fase}: {segundos * 1000:.1f}", file=sys.stderr)
+    
+    return 1 if errores else 0
+
+# Comunicación con el proceso hijo de --startup-report
+VARIABLE_INFORME_ARRANQUE = "CHARGEN_INFORME_ARRANQUE"
+PREFIJO_FASE = "chargen-fase: "
+PATRON_IMPORTTIME = re.compile(r"import time:\s*(\d+) \|\s*(\d+) \| (\s*)(\S+)")
+
+def informe_arranque(argv, limite=15):
+    """Repite el comando con -X importtime y resume el coste del arranque
+    
+    La salida del comando se deja pasar; el informe (tiempo total, fases del
+    generador e importaciones más costosas) se escribe en stderr.
+    """
+    import subprocess
+    
+    comando = [sys.executable, "-X", "importtime", os.path.abspath(__file__)]
+    comando += [arg for arg in argv if arg != "--startup-report"]
+    entorno = dict(os.environ, **{VARIABLE_INFORME_ARRANQUE: "1"})
+    
+    inicio = time.perf_counter()
+    proceso = subprocess.run(comando, stderr=subprocess.PIPE, text=True, env=entorno)
+    total = time.perf_counter() - inicio
+    
+    importaciones = []  # (acumulado_us, propio_us, nivel, modulo)
+    fases = []
+    for linea in proceso.stderr.splitlines():
+        coincidencia = PATRON_IMPORTTIME.match(linea)
+        if coincidencia:
+            propio, acumulado, sangria, modulo = coincidencia.groups()
+            importaciones.append((int(acumulado), int(propio), len(sangria) // 2, modulo))
+        elif linea.startswith("import time:"):
+            continue  # Cabecera de -X importtime
+        elif linea.startswith(PREFIJO_FASE):
+            fases.append(linea[len(PREFIJO_FASE):])
+        else:
+            print(linea, file=sys.stderr)
+    
+    raiz = sum(acumulado for acumulado, _, nivel, _ in importaciones if nivel == 0)
+    print(f"\nArranque: {total * 1000:.1f} ms en total (con la sobrecarga de -X importtime)", file=sys.stderr)
+    print(f"  importaciones: {raiz / 1000:.1f} ms en {len(importaciones)} módulos", file=sys.stderr)
+    for fase in fases:
+        print(f"  {fase} ms", file=sys.stderr)
+    
+    print("Importaciones de primer nivel más costosas (acumulado, propio):", file=sys.stderr)
+    primer_nivel = sorted((i for i in importaciones if i[2] == 0), reverse=True)
+    for acumulado, propio, _, modulo in primer_nivel[:limite]:
+        print(f"  {acumulado / 1000:8.1f} ms {propio / 1000:8.1f} ms  {modulo}", file=sys.stderr)
+    
+    return proceso.returncode
+
+def comando_export(args):
+    """Implementa `chargen export`: devuelve el código de salida del proceso"""
+    from busqueda import filtro_personajes
+    from exportadores import exportar
+    
+    with contextlib.redirect_stdout(sys.stderr):
+        # Solo lectura: la interfaz o el servidor pueden estar escribiendo en el historial
+        generador = PersonajeGenerator(args.config, historial=False)
+        try:
+            filtros = {"texto": args.search, "estilo": args.style, "genero": args.gender,
+                       "desde": args.since, "hasta": args.until}
+            # Los filtros se aplican al recorrer el historial, bloque a bloque
+            filtro = filtro_personajes(**filtros) if any(filtros.values()) else None
+            
+            def progreso(leidos, total):
+                print(f"\r{leidos}/{total}", end="", file=sys.stderr, flush=True)
+            
+            exportados = exportar(
+                generador.abrir_historial_lectura(), args.output, args.format, True if args.gzip else None,
+                None, args.start, args.end, args.chunk_size, progreso if sys.stderr.isatty() else None,
+                filtro=filtro
+            )
+            if sys.stderr.isatty():
+                print(file=sys.stderr)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+    
+    print(f"{exportados} personajes exportados a {args.output}", file=sys.stderr)
+    return 0
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    
+    if args.comando == "generate":
+        if args.unique and (args.detailed or args.mode == "ia"):
+            parser.error("--unique solo genera nombres offline: no admite --detailed ni --mode ia")
+        if args.startup_report:
+            return informe_arranque(sys.argv[1:] if argv is None else argv)
+        return comando_generate(args)
+    
+    if args.comando == "serve":
+        from servidor import servir
+        servir(args.config, args.host, args.port, args.workers, args.save_history)
+        return 0
+    
+    if args.comando == "export":
+        return comando_export(args)
+    
+    if args.comando == "stats":
+        # Solo lectura: la interfaz o el servidor pueden estar escribiendo en el historial
+        with contextlib.redirect_stdout(sys.stderr):
+            generador = PersonajeGenerator(args.config, historial=False)
+            historial = generador.abrir_historial_lectura()
+            ruta = generador.ruta_historial()
+            estadisticas = EstadisticasHistorial.al_dia(historial, ruta)
+            if (isinstance(historial, HistorialPerezoso) and os.path.exists(ruta)
+                    and estadisticas.cubierto != historial.fin_diario()):
+                # Guardar lo contado para que la próxima vez no haya que volver a recorrerlo
+                try:
+                    estadisticas.sellar(ruta, historial.fin_diario())
+                    estadisticas.guardar(ruta_estadisticas(ruta))
+                except OSError as e:
+                    print(f"No se pudieron guardar las estadísticas del historial: {e}")
+            resumen = estadisticas.resumen(args.top)
+        json.dump(resumen, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    
+    # La interfaz gráfica se importa solo aquí: el modo de comandos no carga Tkinter
+    from interfaz import iniciar_interfaz
+    iniciar_interfaz()
+    return 0
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = App(root)
-    root.mainloop()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,294 @@
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Estados que reintenta la propia sesión HTTP; el resto de la aplicación no
+# debe volver a reintentarlos, o los reintentos se multiplicarían
+ESTADOS_REINTENTADOS = (500, 502, 503, 504)
+
+
+def parsear_retry_after(valor):
+    """Convierte la cabecera Retry-After (en segundos) a float, o None"""
+    try:
+        return max(0.0, float(valor))
+    except (TypeError, ValueError):
+        return None
+
+
+class ClienteAPI:
+    """Cliente HTTP de larga duración para un endpoint compatible con OpenAI
+
+    Mantiene una requests.Session con un pool de conexiones keep-alive, de
+    modo que cada personaje no paga un nuevo handshake TCP+TLS; aplica
+    timeouts de conexión y lectura y reintenta con retroceso exponencial los
+    errores de conexión y los estados de ESTADOS_REINTENTADOS; es la única
+    capa que los reintenta. Los 429 no se reintentan aquí: los gestiona el
+    LimitadorTasa y los reintenta generar_en_paralelo.
+    """
+
+    def __init__(self, api_config):
+        self.base_url = api_config["api_base_url"].rstrip("/")
+        self.timeout = (
+            api_config.get("connect_timeout", 5.0),
+            api_config.get("read_timeout", 60.0)
+        )
+
+        reintentos = Retry(
+            total=api_config.get("http_retries", 2),
+            backoff_factor=api_config.get("retry_backoff", 0.5),
+            status_forcelist=ESTADOS_REINTENTADOS,
+            allowed_methods=frozenset(["POST"]),
+            raise_on_status=False,
+            respect_retry_after_header=False  # Los 429 con Retry-After van al limitador
+        )
+        adaptador = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=api_config.get("pool_size", api_config.get("max_concurrency", 4)),
+            max_retries=reintentos
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_config['api_key']}"
+        })
+
+    def chat(self, payload, **kwargs):
+        """Envía una petición a /chat/completions y devuelve la respuesta"""
+        return self.session.post(
+            f"{self.base_url}/chat/completions",
+            json=payload,
+            timeout=self.timeout,
+            **kwargs
+        )
+
+    def chat_stream(self, response):
+        """Itera los fragmentos de texto de una respuesta en streaming (SSE)"""
+        for linea in response.iter_lines(decode_unicode=True):
+            if not linea or not linea.startswith("data:"):
+                continue
+            datos = linea[5:].strip()
+            if datos == "[DONE]":
+                break
+            try:
+                fragmento = json.loads(datos)
+            except ValueError:
+                continue
+            choices = fragmento.get("choices") or [{}]
+            texto = (choices[0].get("delta") or {}).get("content")
+            if texto:
+                yield texto
+
+    def cerrar(self):
+        self.session.close()
+
+
+class LimitadorTasa:
+    """Token bucket de peticiones por segundo y tokens por minuto
+
+    Ante un HTTP 429 pausa todas las peticiones durante el Retry-After indicado
+    (o un retroceso exponencial si no lo hay) y reduce la tasa a la mitad; cada
+    respuesta correcta la recupera poco a poco hasta la configurada.
+    """
+
+    def __init__(self, peticiones_por_segundo=1.0, tokens_por_minuto=0, retroceso_base=1.0, retroceso_max=60.0):
+        self.tasa_maxima = max(0.01, float(peticiones_por_segundo))
+        self.tasa = self.tasa_maxima
+        self.tokens_por_minuto = tokens_por_minuto or 0
+        self.retroceso_base = retroceso_base
+        self.retroceso_max = retroceso_max
+
+        self._cond = threading.Condition()
+        self._fichas = 1.0
+        self._fichas_tokens = float(self.tokens_por_minuto)
+        self._ultimo = time.monotonic()
+        self._pausa_hasta = 0.0
+        self._errores_seguidos = 0
+
+    def _rellenar(self, ahora):
+        transcurrido = ahora - self._ultimo
+        self._ultimo = ahora
+        # Capacidad de ráfaga: un segundo de peticiones (mínimo una)
+        self._fichas = min(max(1.0, self.tasa), self._fichas + transcurrido * self.tasa)
+        if self.tokens_por_minuto:
+            self._fichas_tokens = min(
+                float(self.tokens_por_minuto),
+                self._fichas_tokens + transcurrido * self.tokens_por_minuto / 60.0
+            )
+
+    def adquirir(self, tokens=0):
+        """Bloquea hasta que se pueda enviar una petición de ~tokens tokens"""
+        if self.tokens_por_minuto:
+            tokens = min(tokens, self.tokens_por_minuto)
+        with self._cond:
+            while True:
+                ahora = time.monotonic()
+                self._rellenar(ahora)
+
+                if ahora < self._pausa_hasta:
+                    espera = self._pausa_hasta - ahora
+                elif self._fichas < 1.0:
+                    espera = (1.0 - self._fichas) / self.tasa
+                elif self.tokens_por_minuto and self._fichas_tokens < tokens:
+                    espera = (tokens - self._fichas_tokens) * 60.0 / self.tokens_por_minuto
+                else:
+                    self._fichas -= 1.0
+                    if self.tokens_por_minuto:
+                        self._fichas_tokens -= tokens
+                    return
+
+                self._cond.wait(espera)
+
+    def penalizar(self, retry_after=None):
+        """Registra un 429: pausa global y reducción multiplicativa de la tasa"""
+        with self._cond:
+            self._errores_seguidos += 1
+            if retry_after is None:
+                retry_after = min(self.retroceso_max, self.retroceso_base * 2 ** (self._errores_seguidos - 1))
+            self._pausa_hasta = max(self._pausa_hasta, time.monotonic() + retry_after)
+            self.tasa = max(self.tasa_maxima / 64, self.tasa / 2)
+            self._cond.notify_all()
+
+    def exito(self):
+        """Registra una respuesta correcta: recuperación aditiva de la tasa"""
+        with self._cond:
+            self._errores_seguidos = 0
+            if self.tasa < self.tasa_maxima:
+                self.tasa = min(self.tasa_maxima, self.tasa + self.tasa_maxima / 10)
+
+
+def generar_en_paralelo(tarea, cantidad, concurrencia=4, reintentos=3, retroceso_base=1.0):
+    """Ejecuta tarea(i) para i en [0, cantidad) con un pool acotado de hilos
+
+    Devuelve los resultados en orden a medida que están listos. Solo se
+    reintentan los elementos cuyo resultado es un diccionario con
+    "reintentable" a True (los 429 y los errores que la sesión HTTP no
+    reintenta ya por su cuenta); el resto de errores se devuelven tal cual.
+    """
+    def ejecutar(i):
+        for intento in range(reintentos + 1):
+            try:
+                resultado = tarea(i)
+            except Exception as e:
+                resultado = {"error": f"Error inesperado: {str(e)}", "reintentable": False}
+
+            if not (isinstance(resultado, dict) and resultado.get("reintentable")):
+                return resultado
+
+            # Los 429 ya los espera el limitador; el resto de errores
+            # transitorios se espacian con retroceso exponencial
+            if resultado.get("codigo") != 429 and intento < reintentos:
+                time.sleep(retroceso_base * 2 ** intento)
+        return resultado
+
+    pool = ThreadPoolExecutor(max_workers=max(1, concurrencia), thread_name_prefix="ia")
+    futuros = [pool.submit(ejecutar, i) for i in range(cantidad)]
+    try:
+        for futuro in futuros:
+            yield futuro.result()
+    finally:
+        # Si el consumidor deja de iterar, cancelar lo que aún no ha empezado
+        for futuro in futuros:
+            futuro.cancel()
+        pool.shutdown(wait=False)
+
+
+class PrecargaIA:
+    """Reserva de personajes de IA generados en segundo plano
+
+    Un hilo mantiene hasta `profundidad` personajes listos para la
+    combinación (género, estilo, detallado) seleccionada; al cambiarla se
+    empieza a rellenar la nueva de forma especulativa. Los personajes con más
+    de `caducidad` segundos se descartan.
+    """
+
+    def __init__(self, generar, profundidad=2, caducidad=300):
+        self._generar = generar  # generar(genero, estilo, detallado) -> resultado
+        self.profundidad = max(1, profundidad)
+        self.caducidad = caducidad
+
+        self._reservas = {}
+        self._objetivo = None
+        self._activa = True
+        self._cond = threading.Condition()
+
+        self._hilo = threading.Thread(target=self._trabajador, name="precarga-ia", daemon=True)
+        self._hilo.start()
+
+    def objetivo(self, genero, estilo, detallado):
+        """Fija la combinación que se debe mantener precargada"""
+        with self._cond:
+            self._objetivo = (genero, estilo, bool(detallado))
+            self._cond.notify_all()
+
+    def tomar(self, genero, estilo, detallado):
+        """Devuelve un personaje precargado para la combinación, o None"""
+        combinacion = (genero, estilo, bool(detallado))
+        with self._cond:
+            reserva = self._reservas.get(combinacion)
+            self._descartar_caducados(reserva)
+            resultado = reserva.popleft()[1] if reserva else None
+            self._objetivo = combinacion
+            self._cond.notify_all()  # Reponer lo que se acaba de consumir
+            return resultado
+
+    def disponibles(self, genero, estilo, detallado):
+        """Número de personajes listos para la combinación"""
+        with self._cond:
+            reserva = self._reservas.get((genero, estilo, bool(detallado)))
+            self._descartar_caducados(reserva)
+            return len(reserva) if reserva else 0
+
+    def detener(self):
+        with self._cond:
+            self._activa = False
+            self._cond.notify_all()
+
+    def _descartar_caducados(self, reserva):
+        if not reserva:
+            return
+        limite = time.monotonic() - self.caducidad
+        while reserva and reserva[0][0] < limite:
+            reserva.popleft()
+
+    def _trabajador(self):
+        errores_seguidos = 0
+        while True:
+            with self._cond:
+                while self._activa:
+                    combinacion = self._objetivo
+                    if combinacion is not None:
+                        reserva = self._reservas.setdefault(combinacion, deque())
+                        self._descartar_caducados(reserva)
+                        if len(reserva) < self.profundidad:
+                            break
+                        # Despertar cuando caduque el más antiguo
+                        self._cond.wait(max(0.1, reserva[0][0] + self.caducidad - time.monotonic()))
+                    else:
+                        self._cond.wait()
+                if not self._activa:
+                    return
+
+            try:
+                resultado = self._generar(*combinacion)
+            except Exception as e:
+                resultado = {"error": str(e)}
+
+            if isinstance(resultado, dict) and "error" in resultado:
+                # No guardar errores; esperar antes de volver a intentarlo
+                errores_seguidos += 1
+                with self._cond:
+                    self._cond.wait(min(60, 2 ** errores_seguidos))
+                continue
+
+            errores_seguidos = 0
+            with self._cond:
+                self._reservas.setdefault(combinacion, deque()).append((time.monotonic(), resultado))
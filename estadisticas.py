@@ -0,0 +1,198 @@
+import json
+import os
+from collections import Counter
+
+from historial import huella_diario, offsets_diario
+
+VERSION_ESTADISTICAS = 2
+
+# Anchura en años de cada barra del histograma de edades
+ANCHO_EDAD = 10
+
+
+def ruta_estadisticas(ruta_diario):
+    """Devuelve la ruta del archivo de estadísticas asociado a un diario"""
+    return ruta_diario + ".stats"
+
+
+class EstadisticasHistorial:
+    """Contadores e histogramas del historial, actualizados personaje a personaje
+
+    agregar() cuesta O(1) por personaje, así que un informe no necesita
+    recorrer el historial: basta con leer los contadores. total indica
+    cuántos personajes del historial están ya contados; cubierto y huella, a
+    qué bytes del diario corresponden (ver sellar()).
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.origen = Counter()
+        self.estilo = Counter()
+        self.genero = Counter()
+        self.profesion = Counter()
+        self.nombres = Counter()
+        self.repetidos = 0  # Nombres que aparecen más de una vez
+        self.edades = Counter()  # Inicio de cada tramo de ANCHO_EDAD años -> personajes
+        self.edad_suma = 0
+        self.edad_cuenta = 0
+        self.edad_minima = None
+        self.edad_maxima = None
+        self.cubierto = None  # Bytes del diario ya contados
+        self.huella = None  # huella_diario() de esos bytes
+
+    def agregar(self, personaje):
+        """Cuenta un personaje del historial"""
+        self.total += 1
+        # Las fichas de la IA traen descripción; las offline (y los personajes
+        # compactos, que siempre son offline) no
+        ia = isinstance(personaje, dict) and "descripcion" in personaje
+        self.origen["ia" if ia else "offline"] += 1
+
+        for campo, contador in (("estilo", self.estilo), ("genero", self.genero), ("profesion", self.profesion)):
+            valor = personaje.get(campo)
+            if valor:
+                contador[valor] += 1
+
+        nombre = personaje.get("nombre")
+        if nombre:
+            self.nombres[nombre] += 1
+            if self.nombres[nombre] == 2:
+                self.repetidos += 1
+
+        try:
+            edad = int(personaje.get("edad"))
+        except (TypeError, ValueError):
+            return
+        self.edades[edad // ANCHO_EDAD * ANCHO_EDAD] += 1
+        self.edad_suma += edad
+        self.edad_cuenta += 1
+        if self.edad_minima is None or edad < self.edad_minima:
+            self.edad_minima = edad
+        if self.edad_maxima is None or edad > self.edad_maxima:
+            self.edad_maxima = edad
+
+    def agregar_varios(self, personajes):
+        for personaje in personajes:
+            self.agregar(personaje)
+
+    @classmethod
+    def desde_historial(cls, historial):
+        """Cuenta desde cero todos los personajes de un historial"""
+        estadisticas = cls()
+        estadisticas.agregar_varios(historial)
+        return estadisticas
+
+    def resumen(self, top=10):
+        """Informe de distribuciones listo para mostrar o servir como JSON"""
+        return {
+            "total": self.total,
+            "origen": dict(self.origen),
+            "proporcion_ia": self.origen["ia"] / self.total if self.total else 0.0,
+            "estilo": dict(self.estilo.most_common()),
+            "genero": dict(self.genero.most_common()),
+            "profesion": dict(self.profesion.most_common(top)),
+            "profesiones_distintas": len(self.profesion),
+            "nombres_distintos": len(self.nombres),
+            "nombres_repetidos": self.repetidos,
+            "nombres_mas_repetidos": {
+                nombre: veces for nombre, veces in self.nombres.most_common(top) if veces > 1
+            },
+            "edad": {
+                "histograma": {
+                    f"{inicio}-{inicio + ANCHO_EDAD - 1}": self.edades[inicio] for inicio in sorted(self.edades)
+                },
+                "media": self.edad_suma / self.edad_cuenta if self.edad_cuenta else None,
+                "minima": self.edad_minima,
+                "maxima": self.edad_maxima
+            }
+        }
+
+    def sellar(self, ruta_diario, cubierto):
+        """Asocia las estadísticas a los primeros cubierto bytes del diario
+
+        Deben contar exactamente los personajes de esos bytes; al cargarlas,
+        al_dia() comprueba que el diario sigue empezando igual.
+        """
+        self.cubierto = cubierto
+        self.huella = huella_diario(ruta_diario, cubierto)
+
+    def _pendientes(self, ruta_diario):
+        """Personajes del diario posteriores a los contados, o None si no corresponden
+
+        Devuelve None si no están selladas, si el diario se ha compactado o
+        sustituido desde entonces o si después se borró el historial.
+        """
+        if self.cubierto is None:
+            return None
+        try:
+            if os.path.getsize(ruta_diario) < self.cubierto or huella_diario(ruta_diario, self.cubierto) != self.huella:
+                return None
+            cola, reiniciado = offsets_diario(ruta_diario, self.cubierto)
+        except OSError:
+            return None
+        return None if reiniciado else len(cola)
+
+    def guardar(self, ruta):
+        """Escribe los contadores en ruta (de forma atómica)"""
+        datos = {
+            "version": VERSION_ESTADISTICAS,
+            "total": self.total,
+            "cubierto": self.cubierto,
+            "huella": self.huella,
+            "origen": self.origen,
+            "estilo": self.estilo,
+            "genero": self.genero,
+            "profesion": self.profesion,
+            "nombres": self.nombres,
+            "edades": self.edades,
+            "edad_suma": self.edad_suma,
+            "edad_cuenta": self.edad_cuenta,
+            "edad_minima": self.edad_minima,
+            "edad_maxima": self.edad_maxima
+        }
+        temporal = ruta + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def al_dia(cls, historial, ruta_diario=None):
+        """Estadísticas guardadas junto al diario, completadas con lo que falte del historial
+
+        Solo se cuentan los personajes posteriores a los ya guardados. Si no
+        hay archivo, o no corresponde al diario (se ha compactado, o borrado y
+        vuelto a llenar, desde que se guardó), se reconstruyen recorriendo el
+        historial entero. No escribe nada.
+        """
+        estadisticas = cls.cargar(ruta_estadisticas(ruta_diario)) if ruta_diario else None
+        if estadisticas is not None:
+            pendientes = estadisticas._pendientes(ruta_diario)
+            if pendientes is None or estadisticas.total + pendientes > len(historial):
+                estadisticas = None
+        if estadisticas is None:
+            return cls.desde_historial(historial)
+        estadisticas.agregar_varios(historial[estadisticas.total:])
+        return estadisticas
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee unas estadísticas guardadas; devuelve None si faltan o no son válidas"""
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+            if datos.get("version") != VERSION_ESTADISTICAS:
+                return None
+
+            estadisticas = cls()
+            estadisticas.total = datos["total"]
+            estadisticas.cubierto = datos["cubierto"]
+            estadisticas.huella = datos["huella"]
+            for campo in ("origen", "estilo", "genero", "profesion", "nombres"):
+                setattr(estadisticas, campo, Counter(datos[campo]))
+            estadisticas.edades = Counter({int(inicio): n for inicio, n in datos["edades"].items()})
+            estadisticas.repetidos = sum(1 for veces in estadisticas.nombres.values() if veces > 1)
+            for campo in ("edad_suma", "edad_cuenta", "edad_minima", "edad_maxima"):
+                setattr(estadisticas, campo, datos[campo])
+            return estadisticas
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
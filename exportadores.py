@@ -0,0 +1,179 @@
+import csv
+import gzip
+import io
+import json
+import os
+
+from chargen import CAMPOS_SALIDA
+from historial import a_dict
+
+
+class ExportacionCancelada(Exception):
+    """La exportación se ha detenido a petición del usuario"""
+
+
+class Exportador:
+    """Escribe personajes en un archivo de texto abierto, bloque a bloque
+
+    Las subclases implementan bloque() (el texto de un bloque de personajes ya
+    convertidos en diccionario) y, si el formato lo necesita, cabecera() y
+    pie(). Ninguna guarda los personajes ya escritos, así que la memoria solo
+    depende del tamaño de bloque.
+    """
+
+    extension = ""
+
+    def __init__(self, salida):
+        self.salida = salida
+        self.escritos = 0
+
+    def cabecera(self):
+        return ""
+
+    def bloque(self, personajes):
+        raise NotImplementedError
+
+    def pie(self):
+        return ""
+
+    def escribir(self, personajes):
+        if not personajes:
+            return  # Bloque vacío (p. ej. todo filtrado): no hay separadores que escribir
+        self.salida.write(self.bloque(personajes))
+        self.escritos += len(personajes)
+
+
+class ExportadorJSONL(Exportador):
+    """Un objeto JSON por línea"""
+
+    extension = ".jsonl"
+
+    def bloque(self, personajes):
+        return "".join(json.dumps(p, ensure_ascii=False) + "\n" for p in personajes)
+
+
+class ExportadorJSON(Exportador):
+    """Un array JSON indentado, como el antiguo "Exportar" del historial"""
+
+    extension = ".json"
+
+    def cabecera(self):
+        return "["
+
+    def bloque(self, personajes):
+        separador = ",\n" if self.escritos else "\n"
+        elementos = (_indentar(json.dumps(p, ensure_ascii=False, indent=2)) for p in personajes)
+        return separador + ",\n".join(elementos)
+
+    def pie(self):
+        return "\n]\n" if self.escritos else "]\n"
+
+
+class ExportadorCSV(Exportador):
+    """CSV con las columnas de `chargen generate --format csv --detailed`"""
+
+    extension = ".csv"
+
+    def __init__(self, salida):
+        super().__init__(salida)
+        self._buffer = io.StringIO()
+        self._escritor = csv.DictWriter(self._buffer, CAMPOS_SALIDA, restval="", extrasaction="ignore")
+
+    def cabecera(self):
+        self._escritor.writeheader()
+        return self._vaciar()
+
+    def bloque(self, personajes):
+        self._escritor.writerows(personajes)
+        return self._vaciar()
+
+    def _vaciar(self):
+        texto = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return texto
+
+
+def _indentar(texto):
+    """Sangra con dos espacios cada línea de un objeto JSON dentro del array"""
+    return "  " + texto.replace("\n", "\n  ")
+
+
+# Exportadores disponibles por nombre de formato; se pueden registrar otros
+EXPORTADORES = {
+    "jsonl": ExportadorJSONL,
+    "json": ExportadorJSON,
+    "csv": ExportadorCSV,
+}
+
+
+def registrar_exportador(formato, clase):
+    """Añade (o sustituye) el exportador de un formato"""
+    EXPORTADORES[formato] = clase
+
+
+def formato_de_ruta(ruta):
+    """Deduce (formato, comprimir) de la extensión de ruta, p. ej. "x.csv.gz" -> ("csv", True)"""
+    base, extension = os.path.splitext(ruta.lower())
+    comprimir = extension == ".gz"
+    if comprimir:
+        base, extension = os.path.splitext(base)
+    for formato, clase in EXPORTADORES.items():
+        if clase.extension == extension:
+            return formato, comprimir
+    raise ValueError(f"No se reconoce el formato de exportación de {ruta!r}")
+
+
+def exportar(historial, ruta, formato=None, comprimir=None, indices=None, inicio=0, fin=None,
+             tamano_bloque=5000, progreso=None, cancelar=None, filtro=None):
+    """Exporta personajes del historial a ruta en bloques de tamano_bloque
+
+    Se exportan las posiciones de indices (p. ej. el resultado de una
+    búsqueda) o, si no se indican, el tramo [inicio, fin) del historial; con
+    filtro (p. ej. busqueda.filtro_personajes) solo se escriben los personajes
+    para los que devuelve True. El formato y la compresión gzip se deducen de
+    la extensión de ruta cuando no se indican. Tras cada bloque se llama a
+    progreso(leidos, total) y, si cancelar (un threading.Event) está
+    activado, se abandona la exportación con ExportacionCancelada. Se escribe
+    en un archivo temporal que solo sustituye a ruta al terminar. Devuelve el
+    número de personajes exportados.
+    """
+    if formato is None:
+        formato, comprimir_ruta = formato_de_ruta(ruta)
+    else:
+        comprimir_ruta = ruta.lower().endswith(".gz")
+    if comprimir is None:
+        comprimir = comprimir_ruta
+    if formato not in EXPORTADORES:
+        raise ValueError(f"Formato de exportación desconocido: {formato}")
+
+    if indices is None:
+        indices = range(*slice(inicio, fin).indices(len(historial)))
+    total = len(indices)
+    tamano_bloque = max(1, tamano_bloque)
+
+    temporal = ruta + ".tmp"
+    try:
+        if comprimir:
+            salida = gzip.open(temporal, "wt", encoding="utf-8", newline="")
+        else:
+            salida = open(temporal, "w", encoding="utf-8", newline="")
+        with salida:
+            exportador = EXPORTADORES[formato](salida)
+            salida.write(exportador.cabecera())
+            for desde in range(0, total, tamano_bloque):
+                if cancelar is not None and cancelar.is_set():
+                    raise ExportacionCancelada("Exportación cancelada")
+                personajes = [a_dict(historial[int(i)]) for i in indices[desde:desde + tamano_bloque]]
+                if filtro is not None:
+                    personajes = [p for p in personajes if filtro(p)]
+                exportador.escribir(personajes)
+                if progreso is not None:
+                    progreso(min(desde + tamano_bloque, total), total)
+            salida.write(exportador.pie())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    return exportador.escritos
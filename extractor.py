@@ -0,0 +1,229 @@
+import json
+import re
+from collections import namedtuple
+
+# Campos de una ficha detallada devuelta por la IA
+CAMPOS_PERSONAJE = ("nombre", "titulo", "edad", "profesion", "descripcion", "motivacion", "rasgo")
+
+# Resultado de una extracción; metodo indica cómo se obtuvo:
+#   "json"     el objeto era JSON válido
+#   "reparado" JSON con defectos corregidos (comas finales, comillas, cortes...)
+#   "campos"   propiedades sueltas recuperadas con expresiones regulares
+#   "texto"    no había estructura: solo el texto de la respuesta
+Extraccion = namedtuple("Extraccion", ["datos", "metodo"])
+
+# Cadenas JSON completas (o una cadena sin cerrar al final del texto),
+# llaves y corchetes; las cadenas se consumen enteras para no confundir
+# las llaves que contienen con las de la estructura
+PATRON_TOKENS = re.compile(r'(?P<cadena>"(?:[^"\\]|\\.)*(?P<cierre>")?)|[{}\[\]]', re.S)
+
+# Reparaciones de defectos habituales. Las comillas tipográficas solo se
+# sustituyen donde hacen de comillas JSON (alrededor de una clave): dentro
+# de un valor son texto y se conservan
+COMILLAS_ABRE = "\u201c\u201e\u2033"
+COMILLAS_CIERRA = "\u201d\u2033"
+PATRON_CLAVE_TIPOGRAFICA = re.compile(
+    r'([{,]\s*)[' + COMILLAS_ABRE + r'"]([^"\\\n' + COMILLAS_ABRE + COMILLAS_CIERRA + r']+)[' + COMILLAS_CIERRA + r'"](\s*:)'
+)
+PATRON_COMA_FINAL = re.compile(r",(\s*[}\]])")
+PATRON_COMENTARIO = re.compile(r"^\s*//[^\n]*$|/\*.*?\*/", re.M | re.S)
+PATRON_CLAVE_SIN_COMILLAS = re.compile(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_]*)(\s*:)')
+PATRON_COMA_OLVIDADA = re.compile(r'("|\d|true|false|null|[}\]])(\s*\n\s*")')
+PATRON_COMILLAS_SIMPLES = re.compile(r"'((?:[^'\\\n]|\\.)*)'")
+PATRON_LITERALES_PYTHON = re.compile(r"(:\s*)(True|False|None)\b")
+LITERALES_PYTHON = {"True": "true", "False": "false", "None": "null"}
+
+# Par "clave": valor completo dentro de un objeto JSON; un número solo está
+# completo cuando le sigue un separador
+PATRON_CAMPO = re.compile(
+    r'["\u201c\u201e\u2033](?P<clave>[^"\\\u201c\u201d\u201e\u2033]+)["\u201d\u2033]\s*:\s*(?:(?P<cadena>"(?:[^"\\]|\\.)*")|(?P<numero>-?\d+(?:\.\d+)?)(?=\s*[,}\n]))'
+)
+
+# Último recurso: campos sueltos con o sin comillas; un valor sin comillas
+# llega hasta el fin de línea, "}" o la coma que precede a la siguiente clave
+PATRON_CAMPO_SUELTO = re.compile(
+    r'["\'\u201c\u201e\u2033]?(?P<clave>' + "|".join(CAMPOS_PERSONAJE) + r')["\'\u201d\u2033]?\s*:\s*'
+    r'(?:"(?P<cadena>(?:[^"\\]|\\.)*)"'
+    r'|(?P<resto>[^"\n}]+?)(?=\s*,\s*["\'\u201c\u201e\u2033]?[A-Za-z_]+["\'\u201d\u2033]?\s*:|\s*[}\n]|\s*$))',
+    re.I
+)
+
+# Decoraciones que se eliminan de la primera línea al usarla como nombre
+PATRON_DECORACION_NOMBRE = re.compile(r'^(?:[#*_\-"\s]+|nombre\s*:\s*)+', re.I)
+
+
+def _localizar(texto, abre):
+    """Localiza en una sola pasada la primera estructura que empieza por `abre`
+
+    Devuelve (fragmento, completo); si la respuesta está cortada, el fragmento
+    se devuelve cerrado con las comillas y llaves/corchetes que faltaban.
+    """
+    inicio = texto.find(abre)
+    if inicio == -1:
+        return None, False
+
+    cierres = {"{": "}", "[": "]"}
+    pila = []
+    for token in PATRON_TOKENS.finditer(texto, inicio):
+        if token.group("cadena") is not None:
+            if token.group("cierre") is None:
+                # Cadena sin cerrar: la respuesta se cortó a mitad
+                return texto[inicio:].rstrip("\\") + '"' + "".join(reversed(pila)), False
+            continue
+
+        valor = token.group()
+        if valor in cierres:
+            pila.append(cierres[valor])
+        elif pila and pila[-1] == valor:
+            pila.pop()
+            if not pila:
+                return texto[inicio:token.end()], True
+
+    return texto[inicio:].rstrip().rstrip(",") + "".join(reversed(pila)), False
+
+
+def reparar_json(fragmento):
+    """Corrige defectos habituales del JSON generado por modelos de lenguaje"""
+    fragmento = PATRON_COMENTARIO.sub("", fragmento)
+    fragmento = PATRON_CLAVE_TIPOGRAFICA.sub(r'\1"\2"\3', fragmento)
+    fragmento = PATRON_CLAVE_SIN_COMILLAS.sub(r'\1"\2"\3', fragmento)
+    if '"' not in fragmento:
+        fragmento = PATRON_COMILLAS_SIMPLES.sub(r'"\1"', fragmento)
+    fragmento = PATRON_LITERALES_PYTHON.sub(lambda m: m.group(1) + LITERALES_PYTHON[m.group(2)], fragmento)
+    fragmento = PATRON_COMA_OLVIDADA.sub(r"\1,\2", fragmento)
+    fragmento = PATRON_COMA_FINAL.sub(r"\1", fragmento)
+    return fragmento
+
+
+def extraer_json(texto, abre="{"):
+    """Extrae y decodifica el primer objeto (o array, con abre="[") de una respuesta
+
+    Devuelve una Extraccion con metodo "json" o "reparado", o None si no se
+    pudo decodificar ninguna estructura.
+    """
+    fragmento, completo = _localizar(texto, abre)
+    if fragmento is None:
+        return None
+
+    if completo:
+        try:
+            return Extraccion(json.loads(fragmento), "json")
+        except ValueError:
+            pass
+
+    try:
+        return Extraccion(json.loads(reparar_json(fragmento)), "reparado")
+    except ValueError:
+        return None
+
+
+def _normalizar_edad(personaje):
+    edad = personaje.get("edad")
+    if isinstance(edad, str):
+        cifras = re.search(r"\d+", edad)
+        if cifras:
+            personaje["edad"] = int(cifras.group())
+    elif isinstance(edad, float):
+        personaje["edad"] = int(edad)
+    return personaje
+
+
+def extraer_campos(texto):
+    """Recupera las propiedades de una ficha campo a campo (último recurso estructurado)"""
+    personaje = {}
+    for coincidencia in PATRON_CAMPO_SUELTO.finditer(texto):
+        clave = coincidencia.group("clave").lower()
+        if clave in personaje:
+            continue
+        if coincidencia.group("cadena") is not None:
+            try:
+                personaje[clave] = json.loads(f'"{coincidencia.group("cadena")}"')
+            except ValueError:
+                personaje[clave] = coincidencia.group("cadena")
+        else:
+            personaje[clave] = coincidencia.group("resto").strip().strip("'")
+    return _normalizar_edad(personaje)
+
+
+def nombre_desde_texto(texto):
+    """Usa la primera línea de la respuesta como nombre, sin decoraciones markdown"""
+    primera_linea = texto.strip().split("\n", 1)[0]
+    return PATRON_DECORACION_NOMBRE.sub("", primera_linea).strip(' "*_#') or "Personaje sin nombre"
+
+
+def extraer_personaje(texto):
+    """Extrae una ficha de personaje de la respuesta de la IA
+
+    Prueba, en este orden, JSON válido, JSON reparado y extracción campo a
+    campo. Si nada funciona devuelve solo el nombre (primera línea) y el
+    texto completo como descripción, con metodo "texto".
+    """
+    resultado = extraer_json(texto)
+    if resultado is not None and isinstance(resultado.datos, dict):
+        personaje, metodo = resultado.datos, resultado.metodo
+    else:
+        personaje, metodo = extraer_campos(texto), "campos"
+        if not personaje:
+            return Extraccion({"nombre": nombre_desde_texto(texto), "descripcion": texto}, "texto")
+
+    _normalizar_edad(personaje)
+    if not personaje.get("nombre"):
+        personaje["nombre"] = nombre_desde_texto(texto)
+    return Extraccion(personaje, metodo)
+
+
+def extraer_personajes(texto):
+    """Extrae la lista de fichas de una respuesta con un array JSON de personajes"""
+    resultado = extraer_json(texto, abre="[")
+    if resultado is not None and isinstance(resultado.datos, list):
+        candidatos = resultado.datos
+    else:
+        # Array irrecuperable: decodificar cada objeto por separado
+        candidatos = []
+        posicion = 0
+        while True:
+            inicio = texto.find("{", posicion)
+            if inicio == -1:
+                break
+            fragmento, _ = _localizar(texto[inicio:], "{")
+            posicion = inicio + max(1, len(fragmento))
+            resultado = extraer_json(fragmento)
+            if resultado is not None:
+                candidatos.append(resultado.datos)
+
+    return [_normalizar_edad(p) for p in candidatos if isinstance(p, dict) and p.get("nombre")]
+
+
+class ParserCamposIncremental:
+    """Extrae los campos de un objeto JSON a medida que llega por streaming
+
+    Cada llamada a alimentar() añade texto y devuelve los pares (campo, valor)
+    que se han completado desde la anterior, sin volver a analizar lo ya visto.
+    """
+
+    def __init__(self):
+        self._texto = ""
+        self._posicion = 0
+        self._vistos = set()
+
+    def alimentar(self, fragmento):
+        self._texto += fragmento
+        campos = []
+        while True:
+            coincidencia = PATRON_CAMPO.search(self._texto, self._posicion)
+            if not coincidencia:
+                break
+            self._posicion = coincidencia.end()
+            clave = coincidencia.group("clave")
+            if clave in self._vistos:
+                continue
+            try:
+                if coincidencia.group("cadena") is not None:
+                    valor = json.loads(coincidencia.group("cadena"))
+                else:
+                    valor = json.loads(coincidencia.group("numero"))
+            except ValueError:
+                continue
+            self._vistos.add(clave)
+            campos.append((clave, valor))
+        return campos
@@ -0,0 +1,558 @@
+import atexit
+import hashlib
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from array import array
+from collections.abc import Sequence
+from functools import lru_cache
+
+# Línea especial del diario que marca un borrado completo del historial
+MARCA_LIMPIAR = {"_op": "limpiar"}
+
+# Cabecera del índice lateral: firma, versión y bytes del diario ya indexados
+CABECERA_INDICE = struct.Struct("<4sIQ")
+FIRMA_INDICE = b"CHIX"
+VERSION_INDICE = 1
+
+
+def ruta_diario(history_file):
+    """Devuelve la ruta del diario JSONL asociado a un archivo de historial"""
+    base, _ = os.path.splitext(history_file)
+    return base + ".jsonl"
+
+
+def a_dict(registro):
+    """Convierte un personaje compacto (tipo Mapping) en diccionario serializable"""
+    if hasattr(registro, "a_dict"):
+        return registro.a_dict()
+    return dict(registro)
+
+
+def serializar_registro(registro):
+    """Serializa un personaje como una línea JSON del diario
+
+    Los personajes que se pueden regenerar (clave_compacta() no es None) se
+    guardan como una cadena JSON con su clave en lugar de la ficha completa.
+    """
+    clave = registro.clave_compacta() if hasattr(registro, "clave_compacta") else None
+    if clave is not None:
+        return json.dumps(clave) + "\n"
+    return json.dumps(registro, ensure_ascii=False, default=a_dict) + "\n"
+
+
+LINEA_LIMPIAR = serializar_registro(MARCA_LIMPIAR).encode("utf-8")
+
+
+def reparar_final(ruta):
+    """Recorta una última línea incompleta (escritura interrumpida) del diario"""
+    if not os.path.exists(ruta):
+        return
+    with open(ruta, "r+b") as f:
+        fin = f.seek(0, os.SEEK_END)
+        posicion = fin
+        while posicion > 0:
+            bloque = min(4096, posicion)
+            f.seek(posicion - bloque)
+            datos = f.read(bloque)
+            salto = datos.rfind(b"\n")
+            if salto != -1:
+                posicion = posicion - bloque + salto + 1
+                break
+            posicion -= bloque
+        if posicion != fin:
+            f.truncate(posicion)
+
+
+def migrar_historial_json(history_file, ruta):
+    """Importa (una sola vez) un historial en formato JSON clásico al diario"""
+    if os.path.exists(ruta) or not os.path.exists(history_file):
+        return
+    try:
+        with open(history_file, "r", encoding="utf-8") as f:
+            personajes = json.load(f)
+        with open(ruta, "wb") as f:
+            for personaje in personajes:
+                f.write(serializar_registro(personaje).encode("utf-8"))
+    except Exception as e:
+        print(f"Error al migrar historial: {e}")
+
+
+def offsets_diario(ruta, desde=0, offsets=None):
+    """Offsets de las líneas completas del diario a partir del byte desde
+
+    Una marca de borrado vacía lo acumulado. Devuelve (offsets, reiniciado),
+    donde reiniciado indica si se encontró alguna marca.
+    """
+    offsets = array("Q") if offsets is None else offsets
+    reiniciado = False
+    with open(ruta, "rb") as f:
+        f.seek(desde)
+        posicion = desde
+        for linea in f:
+            if not linea.endswith(b"\n"):
+                break  # Línea incompleta al final: se ignora
+            if linea == LINEA_LIMPIAR:
+                offsets = array("Q")
+                reiniciado = True
+            else:
+                offsets.append(posicion)
+            posicion += len(linea)
+    return offsets, reiniciado
+
+
+def huella_diario(ruta, cubierto, tamano=256):
+    """Huella de los bytes del diario anteriores a cubierto
+
+    Sirve para reconocer el diario que tenía un archivo asociado (como las
+    estadísticas): si se ha compactado o sustituido, los bytes ya no coinciden.
+    """
+    with open(ruta, "rb") as f:
+        f.seek(max(0, cubierto - tamano))
+        datos = f.read(min(cubierto, tamano))
+    return hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+
+def historial_solo_lectura(ruta, expandir=None):
+    """Abre el historial de un diario sin modificar nada en disco
+
+    A diferencia de DiarioHistorial no repara el final del diario, no
+    actualiza el índice .idx ni arranca el hilo escritor, así que se puede
+    usar mientras otro proceso (la interfaz o el servidor) sigue escribiendo.
+    Usa el índice si es válido y escanea solo las líneas que aún no cubre;
+    sin índice, escanea el diario entero.
+    """
+    if not os.path.exists(ruta):
+        return HistorialPerezoso(ruta, 0, expandir)
+
+    total = cubierto = None
+    try:
+        with open(ruta + ".idx", "rb") as f:
+            datos = f.read(CABECERA_INDICE.size)
+            tamano_idx = f.seek(0, os.SEEK_END)
+        firma, version, cubierto = CABECERA_INDICE.unpack(datos)
+        if firma == FIRMA_INDICE and version == VERSION_INDICE and cubierto <= os.path.getsize(ruta):
+            total = (tamano_idx - CABECERA_INDICE.size) // 8
+    except (OSError, struct.error):
+        pass
+
+    if total is None:
+        offsets, _ = offsets_diario(ruta)
+        return HistorialPerezoso(ruta, len(offsets), expandir, offsets)
+
+    cola, reiniciado = offsets_diario(ruta, cubierto)
+    if not cola and not reiniciado:
+        return HistorialPerezoso(ruta, total, expandir)
+
+    # Líneas escritas después de la última actualización del índice
+    if reiniciado:
+        offsets = cola
+    else:
+        offsets = array("Q")
+        with open(ruta + ".idx", "rb") as f:
+            f.seek(CABECERA_INDICE.size)
+            offsets.frombytes(f.read(total * 8))
+        offsets.extend(cola)
+    return HistorialPerezoso(ruta, len(offsets), expandir, offsets)
+
+
+class IndiceOffsets:
+    """Índice lateral (.idx) con el offset en bytes de cada personaje del diario
+
+    El archivo es una cabecera seguida de un uint64 por personaje vivo; la
+    cabecera guarda hasta qué byte del diario está indexado, de modo que al
+    arrancar solo se escanea lo que se haya escrito sin actualizar el índice.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self.ruta_idx = ruta + ".idx"
+        modo = "r+b" if os.path.exists(self.ruta_idx) else "w+b"
+        self._archivo = open(self.ruta_idx, modo)
+        self.cubierto = self._leer_cabecera()
+        self.actualizar()
+
+    @property
+    def total(self):
+        """Número de personajes indexados"""
+        self._archivo.seek(0, os.SEEK_END)
+        return (self._archivo.tell() - CABECERA_INDICE.size) // 8
+
+    def _leer_cabecera(self):
+        self._archivo.seek(0)
+        datos = self._archivo.read(CABECERA_INDICE.size)
+        try:
+            tamano_diario = os.path.getsize(self.ruta)
+        except OSError:
+            tamano_diario = 0
+
+        if len(datos) == CABECERA_INDICE.size:
+            firma, version, cubierto = CABECERA_INDICE.unpack(datos)
+            if firma == FIRMA_INDICE and version == VERSION_INDICE and cubierto <= tamano_diario:
+                return cubierto
+
+        # Índice ausente, dañado o de un diario ya compactado: rehacer
+        self.reiniciar(0)
+        return 0
+
+    def actualizar(self):
+        """Indexa las líneas del diario posteriores a lo ya cubierto"""
+        if not os.path.exists(self.ruta):
+            return
+        offsets = []
+        with open(self.ruta, "rb") as f:
+            f.seek(self.cubierto)
+            posicion = self.cubierto
+            for linea in f:
+                if not linea.endswith(b"\n"):
+                    break  # Línea incompleta al final: se ignora
+                if linea == LINEA_LIMPIAR:
+                    offsets = []
+                    self.reiniciar(posicion)
+                else:
+                    offsets.append(posicion)
+                posicion += len(linea)
+        self.agregar(offsets, posicion)
+
+    def agregar(self, offsets, cubierto):
+        """Añade offsets al índice y avanza la marca de bytes cubiertos"""
+        if offsets:
+            self._archivo.seek(0, os.SEEK_END)
+            self._archivo.write(struct.pack(f"<{len(offsets)}Q", *offsets))
+        self._escribir_cabecera(cubierto)
+
+    def reiniciar(self, cubierto):
+        """Vacía el índice (p. ej. tras un borrado del historial)"""
+        self._archivo.truncate(CABECERA_INDICE.size)
+        self._escribir_cabecera(cubierto)
+
+    def _escribir_cabecera(self, cubierto):
+        self.cubierto = cubierto
+        self._archivo.seek(0)
+        self._archivo.write(CABECERA_INDICE.pack(FIRMA_INDICE, VERSION_INDICE, cubierto))
+        self._archivo.flush()
+
+    def sincronizar(self):
+        os.fsync(self._archivo.fileno())
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+class HistorialPerezoso(Sequence):
+    """Historial respaldado por el diario, decodificado solo al acceder
+
+    Los personajes de sesiones anteriores se leen del diario y de su índice
+    mediante mmap, y solo se decodifican cuando se accede a ellos; los de la
+    sesión actual se guardan en memoria como hasta ahora. Abrirlo cuesta lo
+    mismo con diez personajes que con millones. Las líneas que son una clave
+    compacta se convierten en personaje con expandir(clave). Con offsets
+    (un array('Q')) se usan esos offsets en lugar de mapear el índice .idx.
+    """
+
+    def __init__(self, ruta, total, expandir=None, offsets=None):
+        self._nuevos = []
+        self._expandir = expandir
+        self._mapa = None
+        self._mapa_idx = None
+        self._offsets = None
+        self._base = 0
+        self._decodificar = lru_cache(maxsize=1024)(self._leer)
+
+        if total:
+            try:
+                self._mapa, self._mapa_idx, self._offsets = self._mapear(ruta, total, offsets)
+                self._base = total
+            except Exception as e:
+                print(f"Error al abrir historial: {e}")
+                self._cerrar_mapas()
+
+    @staticmethod
+    def _mapear(ruta, total, offsets=None):
+        """Mapea el diario y los offsets de sus total primeros personajes"""
+        with open(ruta, "rb") as f:
+            mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if offsets is not None:
+            return mapa, None, memoryview(offsets)[:total]
+        try:
+            with open(ruta + ".idx", "rb") as f:
+                mapa_idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            mapa.close()
+            raise
+        fin = CABECERA_INDICE.size + total * 8
+        if len(mapa_idx) < fin:
+            mapa.close()
+            mapa_idx.close()
+            raise ValueError("el índice del diario no cubre el historial")
+        return mapa, mapa_idx, memoryview(mapa_idx)[CABECERA_INDICE.size:fin].cast("Q")
+
+    def __len__(self):
+        return self._base + len(self._nuevos)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError("indice fuera del historial")
+        if i >= self._base:
+            return self._nuevos[i - self._base]
+        return self._decodificar(i)
+
+    def fin_diario(self):
+        """Byte del diario que sigue al último personaje leído de él (0 si ninguno)"""
+        if not self._base:
+            return 0
+        return self._mapa.find(b"\n", self._offsets[self._base - 1]) + 1
+
+    def _leer(self, i):
+        """Decodifica el personaje i del diario mapeado en memoria"""
+        inicio = self._offsets[i]
+        fin = self._mapa.find(b"\n", inicio)
+        try:
+            registro = json.loads(self._mapa[inicio:fin])
+        except ValueError:
+            return {"nombre": "Registro dañado", "error_formato": "No se pudo leer del historial"}
+        if isinstance(registro, str) and self._expandir is not None:
+            return self._expandir(registro)
+        return registro
+
+    def append(self, personaje):
+        self._nuevos.append(personaje)
+
+    def extend(self, personajes):
+        self._nuevos.extend(personajes)
+
+    def clear(self):
+        self._nuevos = []
+        self._cerrar_mapas()
+
+    def consolidar(self, ruta, total):
+        """Pasa a leer del diario los total primeros personajes, ya escritos en él
+
+        Los personajes de la sesión que quedan cubiertos se quitan de memoria,
+        así que una generación de millones de personajes no los acumula. El
+        diario y su índice deben estar vaciados a disco hasta total; si no se
+        pueden mapear, el historial se queda como estaba.
+        """
+        if total <= self._base or total > len(self):
+            return
+        try:
+            mapas = self._mapear(ruta, total)
+        except Exception as e:
+            print(f"Error al consolidar historial: {e}")
+            return
+        nuevos = self._nuevos[total - self._base:]
+        self._cerrar_mapas()
+        self._mapa, self._mapa_idx, self._offsets = mapas
+        self._base = total
+        self._nuevos = nuevos
+
+    def _cerrar_mapas(self):
+        self._decodificar.cache_clear()
+        self._base = 0
+        if self._offsets is not None:
+            self._offsets.release()
+            self._offsets = None
+        for mapa in (self._mapa, self._mapa_idx):
+            if mapa is not None:
+                mapa.close()
+        self._mapa = self._mapa_idx = None
+
+
+class DiarioHistorial:
+    """Diario de historial de solo anexado con escritura diferida
+
+    Los personajes se encolan en O(1) y un hilo de fondo los escribe en grupos
+    (todo lo pendiente en una sola llamada a write), hace fsync como mucho una
+    vez por intervalo y compacta el archivo cuando acumula demasiadas líneas
+    anteriores a un borrado.
+    """
+
+    def __init__(self, ruta, intervalo_fsync=1.0, compactar_min_bytes=1024 * 1024):
+        self.ruta = ruta
+        self.intervalo_fsync = intervalo_fsync
+        self.compactar_min_bytes = compactar_min_bytes
+
+        self._cola = queue.Queue()
+        self._cerrado = False
+
+        # Abrir en modo binario para conocer los offsets exactos en bytes
+        reparar_final(ruta)
+        self._archivo = open(ruta, "ab")
+        self.indice = IndiceOffsets(ruta)
+        self._bytes_muertos = 0  # Bytes previos al último borrado (solo esta sesión)
+        self._bytes_vivos = 0
+        self._ultimo_fsync = time.monotonic()
+        self._pendiente_fsync = False
+
+        self._hilo = threading.Thread(target=self._escritor, name="diario-historial", daemon=True)
+        self._hilo.start()
+
+        atexit.register(self.cerrar)
+
+    def agregar(self, registro):
+        """Encola un personaje para escribirlo en el diario"""
+        self._cola.put(("registro", registro))
+
+    def agregar_varios(self, registros):
+        """Encola de una vez una lista de personajes"""
+        if registros:
+            self._cola.put(("registros", registros))
+
+    def limpiar(self):
+        """Marca el historial como borrado (se aplica al compactar)"""
+        self._cola.put(("limpiar", None))
+
+    def compactar(self):
+        """Solicita una compactación del diario"""
+        self._cola.put(("compactar", None))
+
+    def vaciar(self, timeout=None):
+        """Espera a que todo lo encolado esté escrito y sincronizado en disco"""
+        if self._cerrado:
+            return
+        hecho = threading.Event()
+        self._cola.put(("vaciar", hecho))
+        hecho.wait(timeout)
+
+    def cerrar(self):
+        """Vacía la cola, compacta si hace falta y cierra el diario"""
+        if self._cerrado:
+            return
+        hecho = threading.Event()
+        self._cola.put(("cerrar", hecho))
+        hecho.wait(10)
+        self._cerrado = True
+
+    def _escritor(self):
+        """Bucle del hilo de fondo: agrupa las escrituras pendientes"""
+        while True:
+            try:
+                # Si hay datos sin sincronizar, despertar a tiempo para el fsync
+                timeout = self.intervalo_fsync if self._pendiente_fsync else None
+                operaciones = [self._cola.get(timeout=timeout)]
+            except queue.Empty:
+                self._sincronizar()
+                continue
+
+            # Commit en grupo: recoger todo lo que ya esté encolado
+            while True:
+                try:
+                    operaciones.append(self._cola.get_nowait())
+                except queue.Empty:
+                    break
+
+            lineas = []
+            for tipo, dato in operaciones:
+                if tipo in ("registro", "registros"):
+                    for registro in (dato,) if tipo == "registro" else dato:
+                        try:
+                            lineas.append(serializar_registro(registro))
+                        except Exception as e:
+                            print(f"Error al serializar personaje del historial: {e}")
+                    continue
+
+                # Cualquier otra operación se aplica tras escribir lo anterior
+                self._escribir(lineas)
+                lineas = []
+
+                if tipo == "limpiar":
+                    self._escribir([serializar_registro(MARCA_LIMPIAR)], indexar=False)
+                    self.indice.reiniciar(self._archivo.tell())
+                    self._bytes_muertos += self._bytes_vivos
+                    self._bytes_vivos = 0
+                elif tipo == "compactar":
+                    self._compactar()
+                elif tipo == "vaciar":
+                    self._sincronizar()
+                    dato.set()
+                elif tipo == "cerrar":
+                    if self._bytes_muertos:
+                        self._compactar()
+                    self._sincronizar()
+                    self._archivo.close()
+                    self.indice.cerrar()
+                    dato.set()
+                    return
+
+            self._escribir(lineas)
+
+            if self._bytes_muertos >= max(self.compactar_min_bytes, self._bytes_vivos):
+                self._compactar()
+            elif time.monotonic() - self._ultimo_fsync >= self.intervalo_fsync:
+                self._sincronizar()
+
+    def _escribir(self, lineas, indexar=True):
+        """Escribe un grupo de líneas con una sola llamada y las indexa"""
+        if not lineas:
+            return
+        lineas = [linea.encode("utf-8") for linea in lineas]
+        try:
+            posicion = self._archivo.tell()
+            self._archivo.write(b"".join(lineas))
+            self._archivo.flush()
+
+            offsets = []
+            for linea in lineas:
+                offsets.append(posicion)
+                posicion += len(linea)
+                self._bytes_vivos += len(linea)
+            if indexar:
+                self.indice.agregar(offsets, posicion)
+            self._pendiente_fsync = True
+        except Exception as e:
+            print(f"Error al escribir historial: {e}")
+
+    def _sincronizar(self):
+        """Fuerza los datos escritos a disco"""
+        if not self._pendiente_fsync:
+            return
+        try:
+            os.fsync(self._archivo.fileno())
+            self.indice.sincronizar()
+        except Exception as e:
+            print(f"Error al sincronizar historial: {e}")
+        self._ultimo_fsync = time.monotonic()
+        self._pendiente_fsync = False
+
+    def _compactar(self):
+        """Reescribe el diario conservando solo los personajes posteriores al último borrado"""
+        try:
+            self._archivo.flush()
+            vivas = []
+            with open(self.ruta, "rb") as f:
+                for linea in f:
+                    try:
+                        registro = json.loads(linea)
+                    except ValueError:
+                        continue  # Línea incompleta (p. ej. tras un corte de luz)
+                    if registro == MARCA_LIMPIAR:
+                        vivas = []
+                    else:
+                        vivas.append(linea if linea.endswith(b"\n") else linea + b"\n")
+
+            temporal = self.ruta + ".tmp"
+            with open(temporal, "wb") as f:
+                f.writelines(vivas)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._archivo.close()
+            os.replace(temporal, self.ruta)
+            self._archivo = open(self.ruta, "ab")
+            self.indice.reiniciar(0)
+            self.indice.actualizar()
+
+            self._bytes_muertos = 0
+            self._bytes_vivos = sum(len(linea) for linea in vivas)
+            self._pendiente_fsync = False
+            self._ultimo_fsync = time.monotonic()
+        except Exception as e:
+            print(f"Error al compactar historial: {e}")
@@ -0,0 +1,1308 @@
+import tkinter as tk
+from tkinter import ttk, scrolledtext, messagebox, filedialog
+import queue
+import threading
+import time
+from collections.abc import Mapping
+
+from busqueda import IndiceBusqueda
+from chargen import PersonajeGenerator
+from exportadores import exportar, formato_de_ruta
+
+class TkinterCustomTheme:
+    """Clase para aplicar tema personalizado a Tkinter"""
+    
+    def __init__(self, root, theme_data):
+        self.root = root
+        self.colors = theme_data["colors"]
+        
+        # Configurar estilos
+        self.style = ttk.Style()
+        self.style.theme_use('clam')  # Usar clam como base
+        
+        # Configurar colores del tema
+        self.configure_styles()
+        
+        # Configurar opciones globales para los menús desplegables
+        self.root.option_add('*TCombobox*Listbox.background', '#d0d0d0')  # Fondo gris claro
+        self.root.option_add('*TCombobox*Listbox.foreground', '#000000')  # Texto negro
+        self.root.option_add('*TCombobox*Listbox.selectBackground', self.colors["accent"])
+        self.root.option_add('*TCombobox*Listbox.selectForeground', '#ffffff')
+        
+        # Aplicar color de fondo a la ventana principal
+        root.configure(bg=self.colors["background"])
+    
+    def configure_styles(self):
+        # Estilo de widget TFrame
+        self.style.configure(
+            "Custom.TFrame",
+            background=self.colors["background"]
+        )
+        
+        # Estilo de widget TLabel
+        self.style.configure(
+            "Custom.TLabel",
+            background=self.colors["background"],
+            foreground=self.colors["text"]
+        )
+        
+        # Estilo de widget TLabel para títulos
+        self.style.configure(
+            "Title.TLabel",
+            background=self.colors["background"],
+            foreground=self.colors["accent"],
+            font=("Helvetica", 14, "bold")
+        )
+        
+        # Estilo de widget TButton
+        self.style.configure(
+            "Custom.TButton",
+            background=self.colors["button"],
+            foreground=self.colors["text"],
+            borderwidth=1,
+            focusthickness=3,
+            focuscolor=self.colors["accent"]
+        )
+        self.style.map(
+            "Custom.TButton",
+            background=[("active", self.colors["accent"]), ("pressed", self.colors["button_hover"])],
+            foreground=[("active", self.colors["text"])]
+        )
+        
+        # Estilo de widget TCombobox
+        self.style.configure(
+            "Custom.TCombobox",
+            fieldbackground=self.colors["secondary_bg"],
+            background=self.colors["accent"],
+            foreground=self.colors["text"],
+            arrowcolor=self.colors["text"],
+            borderwidth=1
+        )
+        
+        # Estilo de widget TCheckbutton
+        self.style.configure(
+            "Custom.TCheckbutton",
+            background=self.colors["background"],
+            foreground=self.colors["text"]
+        )
+        
+        # Estilo de separador
+        self.style.configure(
+            "Custom.TSeparator",
+            background=self.colors["accent"]
+        )
+        
+        # Estilo de progreso
+        self.style.configure(
+            "Custom.Horizontal.TProgressbar",
+            troughcolor=self.colors["secondary_bg"],
+            background=self.colors["accent"],
+            borderwidth=0
+        )
+        
+        # Estilo de la lista del historial
+        self.style.configure(
+            "Custom.Treeview",
+            background=self.colors["secondary_bg"],
+            fieldbackground=self.colors["secondary_bg"],
+            foreground=self.colors["text"],
+            borderwidth=0
+        )
+        self.style.configure(
+            "Custom.Treeview.Heading",
+            background=self.colors["button"],
+            foreground=self.colors["text"]
+        )
+        self.style.map(
+            "Custom.Treeview",
+            background=[("selected", self.colors["accent"])],
+            foreground=[("selected", self.colors["text"])]
+        )
+
+class App:
+    """Clase principal de la aplicación con interfaz Tkinter"""
+    
+    # Cada cuánto se vacía la cola de resultados y cuántos mensajes como mucho por vez
+    UI_QUEUE_INTERVAL_MS = 50
+    UI_QUEUE_BATCH = 5000
+    
+    # Límite de la generación múltiple; en modo IA cada personaje es una
+    # petición de pago, así que se mantiene el límite original
+    MAX_QUANTITY = 10000
+    MAX_QUANTITY_IA = 50
+    
+    def __init__(self, root):
+        self.root = root
+        
+        # Inicializar generador de personajes (carga config.json una sola vez)
+        self.generator = PersonajeGenerator(config_file="config.json")
+        
+        # Compartir su configuración, con los valores de la interfaz por defecto
+        self.load_config()
+        
+        # Índice de búsqueda del historial; se construye la primera vez que
+        # se entra en el historial o se busca, para no decodificarlo al arrancar
+        self.search_index = IndiceBusqueda(self.generator.history)
+        self.search_index_started = False
+        
+        # Configurar la ventana principal
+        self.setup_window()
+        
+        # Aplicar tema personalizado
+        self.theme = TkinterCustomTheme(root, self.config["theme"])
+        
+        # Crear interfaz
+        self.create_ui()
+        
+        # Estado de generación
+        self.generating = False
+        
+        # Canal de los hilos de generación hacia la interfaz (Tk no es seguro entre hilos)
+        self.ui_queue = queue.Queue()
+        self.root.after(self.UI_QUEUE_INTERVAL_MS, self.process_ui_queue)
+        
+        # Cerrar el diario del historial al salir
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Precargar personajes de IA para la combinación seleccionada
+        for var in (self.mode_var, self.gender_var, self.style_var, self.detailed_var):
+            var.trace_add("write", self.on_options_changed)
+        self.on_options_changed()
+    
+    def load_config(self):
+        """Toma la configuración del generador y completa los valores de la interfaz"""
+        self.config = self.generator.config
+        self.config.setdefault("app_name", "Generador de Personajes")
+        self.config.setdefault("settings", {"default_mode": "offline"})
+        self.config.setdefault("theme", {
+            "colors": {
+                "background": "#282828",
+                "secondary_bg": "#3c3c3c",
+                "accent": "#ff6c37",
+                "text": "#f8f8f8",
+                "text_secondary": "#cccccc",
+                "button": "#505050",
+                "button_hover": "#656565"
+            }
+        })
+    
+    def setup_window(self):
+        """Configura la ventana principal"""
+        app_name = self.config.get("app_name", "Generador de Personajes")
+        self.root.title(app_name)
+        self.root.geometry("900x650")
+        self.root.minsize(800, 600)
+        
+        # Configurar color de fondo
+        bg_color = self.config.get("theme", {}).get("colors", {}).get("background", "#282828")
+        self.root.configure(bg=bg_color)
+        
+        # Configurar para que los widgets se expandan con la ventana
+        self.root.columnconfigure(0, weight=1)
+        self.root.rowconfigure(0, weight=1)
+    
+    def create_ui(self):
+        """Crea la interfaz de usuario"""
+        # Frame principal
+        main_frame = ttk.Frame(self.root, style="Custom.TFrame")
+        main_frame.grid(row=0, column=0, sticky="nsew", padx=10, pady=10)
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(1, weight=1)
+        
+        # Título
+        app_name = self.config.get("app_name", "Generador de Personajes")
+        title_label = ttk.Label(
+            main_frame, 
+            text=app_name, 
+            style="Title.TLabel"
+        )
+        title_label.grid(row=0, column=0, pady=(0, 10), sticky="w")
+        
+        # Contenedor de pestañas
+        self.tab_control = ttk.Notebook(main_frame)
+        self.tab_control.grid(row=1, column=0, sticky="nsew")
+        
+        # Pestaña de generación
+        self.tab_generate = ttk.Frame(self.tab_control, style="Custom.TFrame")
+        self.tab_history = ttk.Frame(self.tab_control, style="Custom.TFrame")
+        self.tab_stats = ttk.Frame(self.tab_control, style="Custom.TFrame")
+        
+        self.tab_control.add(self.tab_generate, text="Generador")
+        self.tab_control.add(self.tab_history, text="Historial")
+        self.tab_control.add(self.tab_stats, text="Estadísticas")
+        
+        self.tab_generate.columnconfigure(0, weight=1)
+        self.tab_generate.rowconfigure(2, weight=1)
+        
+        self.tab_history.columnconfigure(0, weight=1)
+        self.tab_history.rowconfigure(2, weight=1)
+        
+        self.tab_stats.columnconfigure(0, weight=1)
+        self.tab_stats.rowconfigure(0, weight=1)
+        
+        # Configurar pestaña de generación
+        self.setup_generator_tab()
+        
+        # Configurar pestaña de historial
+        self.setup_history_tab()
+        
+        # Configurar pestaña de estadísticas
+        self.setup_stats_tab()
+        
+        # Barra de estado
+        status_frame = ttk.Frame(main_frame, style="Custom.TFrame")
+        status_frame.grid(row=2, column=0, sticky="ew", pady=(10, 0))
+        status_frame.columnconfigure(1, weight=1)
+        
+        # Etiqueta de estado
+        self.status_label = ttk.Label(
+            status_frame, 
+            text="Listo", 
+            style="Custom.TLabel"
+        )
+        self.status_label.grid(row=0, column=0, sticky="w")
+        
+        # Barra de progreso
+        self.progress = ttk.Progressbar(
+            status_frame, 
+            style="Custom.Horizontal.TProgressbar",
+            mode="indeterminate", 
+            length=200
+        )
+        self.progress.grid(row=0, column=1, sticky="e", padx=(10, 0))
+        self.progress.grid_remove()  # Ocultar inicialmente
+    
+    def setup_generator_tab(self):
+        """Configura la pestaña de generación"""
+        # Frame de opciones
+        options_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
+        options_frame.grid(row=0, column=0, sticky="ew", pady=(10, 10))
+        options_frame.columnconfigure(1, weight=1)
+        options_frame.columnconfigure(3, weight=1)
+        options_frame.columnconfigure(5, weight=1)
+        
+        # Etiquetas y controles
+        ttk.Label(options_frame, text="Modo:", style="Custom.TLabel").grid(row=0, column=0, sticky="w", padx=(0, 5))
+        
+        self.mode_var = tk.StringVar(value=self.config["settings"].get("default_mode", "offline"))
+        mode_combo = ttk.Combobox(
+            options_frame, 
+            textvariable=self.mode_var,
+            values=["offline", "ia"],
+            state="readonly",
+            style="Custom.TCombobox",
+            width=10
+        )
+        mode_combo.grid(row=0, column=1, sticky="ew", padx=(0, 10))
+        mode_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
+        
+        ttk.Label(options_frame, text="Género:", style="Custom.TLabel").grid(row=0, column=2, sticky="w", padx=(10, 5))
+        
+        self.gender_var = tk.StringVar(value=self.config["settings"].get("default_gender", "aleatorio"))
+        gender_combo = ttk.Combobox(
+            options_frame, 
+            textvariable=self.gender_var,
+            values=["aleatorio", "masculino", "femenino", "neutro"],
+            state="readonly",
+            style="Custom.TCombobox",
+            width=10
+        )
+        gender_combo.grid(row=0, column=3, sticky="ew", padx=(0, 10))
+        gender_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
+        
+        ttk.Label(options_frame, text="Estilo:", style="Custom.TLabel").grid(row=0, column=4, sticky="w", padx=(10, 5))
+        
+        self.style_var = tk.StringVar(value=self.config["settings"].get("default_style", "fantasia"))
+        style_combo = ttk.Combobox(
+            options_frame, 
+            textvariable=self.style_var,
+            values=["fantasia", "ciencia_ficcion", "medieval", "moderno"],
+            state="readonly",
+            style="Custom.TCombobox",
+            width=12
+        )
+        style_combo.grid(row=0, column=5, sticky="ew")
+        style_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
+        
+        # Frame de opciones adicionales
+        more_options_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
+        more_options_frame.grid(row=1, column=0, sticky="ew", pady=(0, 10))
+        
+        # Opciones adicionales
+        self.detailed_var = tk.BooleanVar(value=True)
+        detailed_check = ttk.Checkbutton(
+            more_options_frame, 
+            text="Generar personaje detallado",
+            variable=self.detailed_var,
+            style="Custom.TCheckbutton"
+        )
+        detailed_check.grid(row=0, column=0, sticky="w")
+        
+        self.multi_var = tk.BooleanVar(value=False)
+        multi_check = ttk.Checkbutton(
+            more_options_frame, 
+            text="Generar múltiples",
+            variable=self.multi_var,
+            style="Custom.TCheckbutton",
+            command=self.toggle_multi_options
+        )
+        multi_check.grid(row=0, column=1, sticky="w", padx=(20, 0))
+        
+        # Opciones para generación múltiple (inicialmente ocultas)
+        self.multi_options_frame = ttk.Frame(more_options_frame, style="Custom.TFrame")
+        self.multi_options_frame.grid(row=0, column=2, sticky="w", padx=(10, 0))
+        self.multi_options_frame.grid_remove()  # Ocultar inicialmente
+        
+        ttk.Label(self.multi_options_frame, text="Cantidad:", style="Custom.TLabel").grid(row=0, column=0, sticky="w")
+        
+        self.quantity_var = tk.StringVar(value="5")
+        self.quantity_spinbox = quantity_spinbox = ttk.Spinbox(
+            self.multi_options_frame, 
+            from_=1, 
+            to=self.max_quantity(), 
+            textvariable=self.quantity_var,
+            width=5
+        )
+        quantity_spinbox.grid(row=0, column=1, sticky="w", padx=(5, 0))
+        
+        # Frame para el botón de generación
+        button_frame = ttk.Frame(more_options_frame, style="Custom.TFrame")
+        button_frame.grid(row=0, column=3, sticky="e", padx=(0, 0))
+        more_options_frame.columnconfigure(3, weight=1)
+        
+        # Botón de generación
+        self.generate_button = ttk.Button(
+            button_frame,
+            text="Generar",
+            style="Custom.TButton",
+            command=self.generate_character
+        )
+        self.generate_button.grid(row=0, column=0, sticky="e")
+        
+        # Frame de resultados
+        results_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
+        results_frame.grid(row=2, column=0, sticky="nsew")
+        results_frame.columnconfigure(0, weight=1)
+        results_frame.rowconfigure(0, weight=1)
+        
+        # Área de texto para mostrar los resultados
+        self.result_text = scrolledtext.ScrolledText(
+            results_frame,
+            wrap=tk.WORD,
+            bg=self.config["theme"]["colors"]["secondary_bg"],
+            fg=self.config["theme"]["colors"]["text"],
+            insertbackground=self.config["theme"]["colors"]["text"],
+            font=("Consolas", 10),
+            borderwidth=1,
+            relief=tk.FLAT
+        )
+        self.result_text.grid(row=0, column=0, sticky="nsew")
+        
+        # Botones de acciones
+        actions_frame = ttk.Frame(self.tab_generate, style="Custom.TFrame")
+        actions_frame.grid(row=3, column=0, sticky="ew", pady=(10, 0))
+        
+        # Botón para copiar al portapapeles
+        self.copy_button = ttk.Button(
+            actions_frame,
+            text="Copiar",
+            style="Custom.TButton",
+            command=self.copy_to_clipboard
+        )
+        self.copy_button.grid(row=0, column=0, sticky="w")
+        
+        # Botón para guardar en archivo
+        self.save_button = ttk.Button(
+            actions_frame,
+            text="Guardar",
+            style="Custom.TButton",
+            command=self.save_to_file
+        )
+        self.save_button.grid(row=0, column=1, sticky="w", padx=(10, 0))
+        
+        # Botón para limpiar
+        self.clear_button = ttk.Button(
+            actions_frame,
+            text="Limpiar",
+            style="Custom.TButton",
+            command=self.clear_results
+        )
+        self.clear_button.grid(row=0, column=2, sticky="w", padx=(10, 0))
+    
+    def setup_history_tab(self):
+        """Configura la pestaña de historial
+        
+        La lista solo contiene una página de HISTORY_PAGE_SIZE personajes (los
+        más recientes primero) y la ficha completa se lee al seleccionar uno,
+        así que abrir la pestaña cuesta lo mismo con diez personajes que con
+        un millón.
+        """
+        # Barra de búsqueda
+        search_frame = ttk.Frame(self.tab_history, style="Custom.TFrame")
+        search_frame.grid(row=0, column=0, sticky="ew", pady=(10, 0))
+        search_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(search_frame, text="Buscar:", style="Custom.TLabel").grid(row=0, column=0, sticky="w", padx=(0, 5))
+        
+        self.search_var = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.grid(row=0, column=1, sticky="ew", padx=(0, 10))
+        
+        self.search_style_var = tk.StringVar()
+        search_style_combo = ttk.Combobox(
+            search_frame,
+            textvariable=self.search_style_var,
+            values=["", "fantasia", "ciencia_ficcion", "medieval", "moderno"],
+            state="readonly",
+            style="Custom.TCombobox",
+            width=12
+        )
+        search_style_combo.grid(row=0, column=2, sticky="w", padx=(0, 5))
+        search_style_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
+        
+        self.search_gender_var = tk.StringVar()
+        search_gender_combo = ttk.Combobox(
+            search_frame,
+            textvariable=self.search_gender_var,
+            values=["", "masculino", "femenino", "neutro"],
+            state="readonly",
+            style="Custom.TCombobox",
+            width=10
+        )
+        search_gender_combo.grid(row=0, column=3, sticky="w", padx=(0, 10))
+        search_gender_combo.config(foreground='#000000')  # Texto negro para el valor seleccionado
+        
+        ttk.Label(search_frame, text="Desde:", style="Custom.TLabel").grid(row=0, column=4, sticky="w", padx=(0, 5))
+        self.search_from_var = tk.StringVar()
+        search_from_entry = ttk.Entry(search_frame, textvariable=self.search_from_var, width=11)
+        search_from_entry.grid(row=0, column=5, sticky="w", padx=(0, 5))
+        
+        ttk.Label(search_frame, text="Hasta:", style="Custom.TLabel").grid(row=0, column=6, sticky="w", padx=(0, 5))
+        self.search_to_var = tk.StringVar()
+        search_to_entry = ttk.Entry(search_frame, textvariable=self.search_to_var, width=11)
+        search_to_entry.grid(row=0, column=7, sticky="w", padx=(0, 10))
+        
+        self.search_button = ttk.Button(
+            search_frame,
+            text="Buscar",
+            style="Custom.TButton",
+            command=self.search_history
+        )
+        self.search_button.grid(row=0, column=8, sticky="e")
+        
+        ttk.Button(
+            search_frame,
+            text="✕",
+            style="Custom.TButton",
+            width=3,
+            command=self.clear_search
+        ).grid(row=0, column=9, sticky="e", padx=(5, 0))
+        
+        for entry in (search_entry, search_from_entry, search_to_entry):
+            entry.bind("<Return>", lambda event: self.search_history())
+        
+        # Resultado de la búsqueda activa (posiciones, más recientes primero) o None
+        self.history_results = None
+        
+        # Etiqueta y paginación
+        header_frame = ttk.Frame(self.tab_history, style="Custom.TFrame")
+        header_frame.grid(row=1, column=0, sticky="ew", pady=(10, 5))
+        header_frame.columnconfigure(1, weight=1)
+        
+        ttk.Label(header_frame, text="Personajes generados:", style="Custom.TLabel").grid(row=0, column=0, sticky="w")
+        
+        self.history_page_label = ttk.Label(header_frame, text="", style="Custom.TLabel")
+        self.history_page_label.grid(row=0, column=1, sticky="e", padx=(0, 10))
+        
+        self.prev_page_button = ttk.Button(
+            header_frame,
+            text="◀ Anterior",
+            style="Custom.TButton",
+            command=lambda: self.show_history_page(self.history_page - 1)
+        )
+        self.prev_page_button.grid(row=0, column=2, sticky="e")
+        
+        self.next_page_button = ttk.Button(
+            header_frame,
+            text="Siguiente ▶",
+            style="Custom.TButton",
+            command=lambda: self.show_history_page(self.history_page + 1)
+        )
+        self.next_page_button.grid(row=0, column=3, sticky="e", padx=(5, 0))
+        
+        # Lista de personajes (una fila por personaje, solo la página visible)
+        list_frame = ttk.Frame(self.tab_history, style="Custom.TFrame")
+        list_frame.grid(row=2, column=0, sticky="nsew")
+        list_frame.columnconfigure(0, weight=1)
+        list_frame.rowconfigure(0, weight=1)
+        
+        self.history_tree = ttk.Treeview(
+            list_frame,
+            columns=("numero", "nombre", "estilo", "genero", "fecha"),
+            show="headings",
+            selectmode="browse",
+            style="Custom.Treeview"
+        )
+        for column, heading, width, stretch in (
+            ("numero", "#", 70, False),
+            ("nombre", "Nombre", 260, True),
+            ("estilo", "Estilo", 120, False),
+            ("genero", "Género", 100, False),
+            ("fecha", "Fecha", 150, False)
+        ):
+            self.history_tree.heading(column, text=heading, anchor="w")
+            self.history_tree.column(column, width=width, stretch=stretch, anchor="w")
+        self.history_tree.grid(row=0, column=0, sticky="nsew")
+        self.history_tree.bind("<<TreeviewSelect>>", self.on_history_select)
+        
+        history_scroll = ttk.Scrollbar(list_frame, orient="vertical", command=self.history_tree.yview)
+        history_scroll.grid(row=0, column=1, sticky="ns")
+        self.history_tree.configure(yscrollcommand=history_scroll.set)
+        
+        # Ficha del personaje seleccionado
+        self.history_text = scrolledtext.ScrolledText(
+            self.tab_history,
+            wrap=tk.WORD,
+            height=10,
+            bg=self.config["theme"]["colors"]["secondary_bg"],
+            fg=self.config["theme"]["colors"]["text"],
+            insertbackground=self.config["theme"]["colors"]["text"],
+            font=("Consolas", 10),
+            borderwidth=1,
+            relief=tk.FLAT
+        )
+        self.history_text.grid(row=3, column=0, sticky="nsew", pady=(10, 0))
+        
+        # Botones de acciones
+        history_actions_frame = ttk.Frame(self.tab_history, style="Custom.TFrame")
+        history_actions_frame.grid(row=4, column=0, sticky="ew", pady=(10, 0))
+        
+        # Botón para refrescar historial
+        self.refresh_button = ttk.Button(
+            history_actions_frame,
+            text="Refrescar",
+            style="Custom.TButton",
+            command=self.refresh_history
+        )
+        self.refresh_button.grid(row=0, column=0, sticky="w")
+        
+        # Botón para exportar historial
+        self.export_button = ttk.Button(
+            history_actions_frame,
+            text="Exportar",
+            style="Custom.TButton",
+            command=self.export_history
+        )
+        self.export_button.grid(row=0, column=1, sticky="w", padx=(10, 0))
+        
+        # Botón para limpiar historial
+        self.clear_history_button = ttk.Button(
+            history_actions_frame,
+            text="Limpiar historial",
+            style="Custom.TButton",
+            command=self.clear_history
+        )
+        self.clear_history_button.grid(row=0, column=2, sticky="w", padx=(10, 0))
+        
+        # Primera página; después solo se añaden los personajes nuevos
+        self.show_history_page(0)
+        
+        # Poner al día la lista al entrar en la pestaña
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+    
+    def setup_stats_tab(self):
+        """Configura la pestaña de estadísticas del historial
+        
+        El informe sale de los contadores que el generador mantiene al guardar
+        el historial, así que no hace falta recorrerlo para mostrarlo.
+        """
+        self.stats_text = scrolledtext.ScrolledText(
+            self.tab_stats,
+            wrap=tk.WORD,
+            bg=self.config["theme"]["colors"]["secondary_bg"],
+            fg=self.config["theme"]["colors"]["text"],
+            insertbackground=self.config["theme"]["colors"]["text"],
+            font=("Consolas", 10),
+            borderwidth=1,
+            relief=tk.FLAT
+        )
+        self.stats_text.grid(row=0, column=0, sticky="nsew", pady=(10, 0))
+        
+        stats_actions_frame = ttk.Frame(self.tab_stats, style="Custom.TFrame")
+        stats_actions_frame.grid(row=1, column=0, sticky="ew", pady=(10, 0))
+        
+        ttk.Button(
+            stats_actions_frame,
+            text="Refrescar",
+            style="Custom.TButton",
+            command=self.refresh_stats
+        ).grid(row=0, column=0, sticky="w")
+    
+    def toggle_multi_options(self):
+        """Muestra u oculta las opciones de generación múltiple"""
+        if self.multi_var.get():
+            self.multi_options_frame.grid()
+        else:
+            self.multi_options_frame.grid_remove()
+    
+    def max_quantity(self, mode=None):
+        """Límite de la generación múltiple para el modo dado (o el seleccionado)"""
+        if (mode or self.mode_var.get()) == "ia":
+            return self.MAX_QUANTITY_IA
+        return self.MAX_QUANTITY
+    
+    def on_options_changed(self, *args):
+        """Ajusta el límite de cantidad y rellena la reserva de IA para las nuevas opciones"""
+        limit = self.max_quantity()
+        self.quantity_spinbox.config(to=limit)
+        try:
+            if int(self.quantity_var.get()) > limit:
+                self.quantity_var.set(str(limit))
+        except ValueError:
+            pass
+        if self.mode_var.get() == "ia":
+            self.generator.precargar_ia(self.gender_var.get(), self.style_var.get(), self.detailed_var.get())
+    
+    def update_status(self, message):
+        """Actualiza el mensaje de estado"""
+        self.status_label.config(text=message)
+        self.root.update_idletasks()
+    
+    def start_progress(self):
+        """Inicia la barra de progreso"""
+        self.progress.grid()
+        self.progress.start(10)
+        self.root.update_idletasks()
+    
+    def stop_progress(self):
+        """Detiene la barra de progreso"""
+        self.progress.stop()
+        self.progress.grid_remove()
+        self.root.update_idletasks()
+    
+    def generate_character(self):
+        """Genera un personaje o múltiples personajes"""
+        if self.generating:
+            return
+        
+        self.generating = True
+        self.generate_button.config(state="disabled")
+        self.clear_results()
+        
+        # Obtener parámetros
+        mode = self.mode_var.get()
+        gender = self.gender_var.get()
+        style = self.style_var.get()
+        detailed = self.detailed_var.get()
+        multi = self.multi_var.get()
+        
+        try:
+            quantity = int(self.quantity_var.get())
+            if quantity < 1:
+                quantity = 1
+            elif quantity > self.max_quantity(mode):
+                quantity = self.max_quantity(mode)
+        except:
+            quantity = 5
+        
+        # Actualizar la interfaz para mostrar estado
+        self.update_status("Generando personaje(s)...")
+        self.start_progress()
+        
+        # Iniciar generación en un hilo para no bloquear la interfaz
+        thread = threading.Thread(
+            target=self._generate_in_thread,
+            args=(mode, gender, style, detailed, multi, quantity)
+        )
+        thread.daemon = True
+        thread.start()
+    
+    def _generate_in_thread(self, mode, gender, style, detailed, multi, quantity):
+        """Genera personajes en un hilo separado
+        
+        No toca ningún widget: envía el texto ya formateado a la cola de la
+        interfaz, que el hilo principal vacía en process_ui_queue.
+        """
+        post = self.ui_queue.put
+        results = []
+        try:
+            if multi:
+                post(("text", f"Generando {quantity} personajes...\n\n"))
+                
+                # En modo IA las peticiones van en paralelo y llegan en orden
+                if mode == "ia":
+                    lote_ia = self.generator.generar_lote_con_ia(quantity, gender, style, detailed)
+                
+                for i in range(quantity):
+                    try:
+                        if mode == "offline":
+                            result = self.generator.generar_personaje_offline(gender, style, detailed)
+                        else:  # mode == "ia"
+                            result = next(lote_ia)
+                    except Exception as e:
+                        error_msg = f"Error en personaje {i+1}: {str(e)}"
+                        print(error_msg)
+                        result = {"error": str(e), "nombre": f"Error en personaje {i+1}"}
+                    
+                    results.append(result)
+                    post(("text", self.format_result(result, i, detailed, multi)))
+            else:
+                try:
+                    if mode == "offline":
+                        result = self.generator.generar_personaje_offline(gender, style, detailed)
+                    else:  # mode == "ia"
+                        # Usar un personaje precargado si hay alguno listo
+                        result = self.generator.tomar_precargado(gender, style, detailed)
+                        if result is None:
+                            result = self.generator.generar_personaje_con_ia(
+                                gender, style, detailed, on_campo=self.show_streamed_field
+                            )
+                except Exception as e:
+                    error_msg = f"Error: {str(e)}"
+                    print(error_msg)
+                    result = {"error": str(e), "nombre": "Error en personaje"}
+                
+                results.append(result)
+                # Sustituye los campos que se hayan mostrado por streaming
+                post(("replace", self.format_result(result, 0, detailed, multi)))
+            
+            # Guardar historial si está habilitado
+            self.generator.save_history()
+            
+            # Mostrar mensaje de finalización
+            post(("status", f"Generados {len(results)} personaje(s)"))
+            
+        except Exception as e:
+            import traceback
+            error_detail = traceback.format_exc()
+            print(f"Error durante la generación: {str(e)}")
+            print(f"Detalles: {error_detail}")
+            post(("text", f"Error durante la generación: {str(e)}\nDetalles del error:\n{error_detail}\n"))
+            post(("status", f"Error: {str(e)}"))
+        finally:
+            post(("done", None))
+    
+    @staticmethod
+    def format_result(result, i, detailed, multi):
+        """Devuelve el texto con el que se muestra un resultado"""
+        if detailed and isinstance(result, Mapping) and not "error" in result:
+            # Formato para personaje detallado
+            lines = [
+                "=" * 40,
+                f"PERSONAJE {i+1 if multi else ''}",
+                "=" * 40,
+                "",
+                f"Nombre: {result.get('nombre', 'Sin nombre')}"
+            ]
+            
+            if result.get('titulo'):
+                lines.append(f"Título: {result['titulo']}")
+            
+            lines.append(f"Edad: {result.get('edad', 'Desconocida')}")
+            
+            if result.get('profesion'):
+                lines.append(f"Profesión: {result['profesion']}")
+            
+            if result.get('rasgo'):
+                lines.append(f"Rasgo distintivo: {result['rasgo']}")
+            
+            if result.get('motivacion'):
+                lines.append(f"Motivación: {result['motivacion']}")
+            
+            # Si hay descripción (generada por IA)
+            if result.get('descripcion'):
+                lines.append(f"\nDescripción: {result['descripcion']}")
+            
+            # Si hubo un error de formato pero se logró recuperar
+            if result.get('error_formato'):
+                lines.append(f"\nNota: {result['error_formato']}")
+            
+            return "\n".join(lines) + "\n\n"
+        
+        # Formato simple o error
+        if isinstance(result, Mapping) and "error" in result:
+            if multi:
+                return f"{i+1}. Error: {result['error']}\n\n"
+            text = f"Error: {result['error']}\n\n"
+            # Mostrar respuesta cruda si está disponible
+            if result.get('descripcion'):
+                text += f"Respuesta recibida:\n{result['descripcion']}\n\n"
+            return text
+        
+        if multi:
+            return f"{i+1}. {result}\n"
+        return f"{result}\n"
+    
+    def process_ui_queue(self):
+        """Vacía la cola de la interfaz (hilo principal) y se vuelve a programar
+        
+        Los textos consecutivos se insertan como un único bloque, así que el
+        coste por refresco no depende de cuántos personajes hayan llegado.
+        """
+        pending = []
+        
+        def flush():
+            if pending:
+                self.result_text.insert(tk.END, "".join(pending))
+                self.result_text.see(tk.END)
+                pending.clear()
+        
+        try:
+            for _ in range(self.UI_QUEUE_BATCH):
+                try:
+                    kind, payload = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                
+                if kind == "text":
+                    pending.append(payload)
+                    continue
+                
+                flush()
+                if kind == "replace":
+                    self.result_text.delete(1.0, tk.END)
+                    self.result_text.insert(tk.END, payload)
+                elif kind == "status":
+                    self.update_status(payload)
+                elif kind == "done":
+                    self.finish_generation()
+                elif kind == "search":
+                    self.show_search_results(*payload)
+                elif kind == "export_done":
+                    self.finish_export(*payload)
+                elif kind == "stats":
+                    self.show_stats(payload)
+                elif kind == "search_error":
+                    self.search_button.config(state="normal")
+                    messagebox.showerror("Error", payload)
+            flush()
+        finally:
+            self.root.after(self.UI_QUEUE_INTERVAL_MS, self.process_ui_queue)
+    
+    def finish_generation(self):
+        """Restablece la interfaz al terminar una generación"""
+        self.stop_progress()
+        self.generate_button.config(state="normal")
+        self.generating = False
+        
+        # Actualizar la pestaña de historial o la de estadísticas
+        if self.tab_control.index("current") == 1:  # Si estamos en la pestaña de historial
+            self.refresh_history()
+        elif self.tab_control.index("current") == 2:
+            self.refresh_stats()
+    
+    # Etiquetas de los campos de una ficha, en el orden en que se muestran
+    FIELD_LABELS = {
+        "nombre": "Nombre",
+        "titulo": "Título",
+        "edad": "Edad",
+        "profesion": "Profesión",
+        "rasgo": "Rasgo distintivo",
+        "motivacion": "Motivación",
+        "descripcion": "Descripción"
+    }
+    
+    def show_streamed_field(self, field, value):
+        """Muestra un campo recibido por streaming (llamado desde el hilo de generación)"""
+        label = self.FIELD_LABELS.get(field)
+        if label and value != "":
+            self.ui_queue.put(("text", f"{label}: {value}\n"))
+    
+    def copy_to_clipboard(self):
+        """Copia el contenido del área de resultados al portapapeles"""
+        text = self.result_text.get(1.0, tk.END).strip()
+        if text:
+            self.root.clipboard_clear()
+            self.root.clipboard_append(text)
+            self.update_status("Copiado al portapapeles")
+    
+    def save_to_file(self):
+        """Guarda el contenido del área de resultados a un archivo"""
+        text = self.result_text.get(1.0, tk.END).strip()
+        if not text:
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".txt",
+            filetypes=[("Archivos de texto", "*.txt"), ("Todos los archivos", "*.*")],
+            title="Guardar personaje(s)"
+        )
+        
+        if file_path:
+            try:
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+                self.update_status(f"Guardado en {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Error al guardar: {str(e)}")
+    
+    def clear_results(self):
+        """Limpia el área de resultados"""
+        self.result_text.delete(1.0, tk.END)
+        self.update_status("Listo")
+    
+    # Personajes por página en la pestaña de historial
+    HISTORY_PAGE_SIZE = 200
+    
+    def on_tab_changed(self, event=None):
+        """Pone al día el historial o las estadísticas al entrar en su pestaña"""
+        current = self.tab_control.index("current")
+        if current == 1:
+            self.start_search_index()
+            self.refresh_history()
+        elif current == 2:
+            self.refresh_stats()
+    
+    def refresh_history(self):
+        """Pone al día la lista de historial sin reconstruirla
+        
+        En la primera página los personajes nuevos se insertan arriba y se
+        quitan los que salen por abajo; en cualquier otra página solo se
+        actualizan el contador y los botones. Con una búsqueda activa se
+        repite la búsqueda, que solo indexa los personajes nuevos.
+        """
+        if self.history_results is not None:
+            self.search_history()
+            return
+        
+        total = len(self.generator.history)
+        new = total - self.history_shown
+        
+        if new < 0 or (self.history_page == 0 and new >= self.HISTORY_PAGE_SIZE):
+            # Historial borrado o demasiados nuevos: redibujar la página
+            self.show_history_page(0 if new < 0 else self.history_page)
+            return
+        
+        if self.history_page == 0 and new > 0:
+            if not self.history_shown:
+                self.history_text.delete(1.0, tk.END)
+            for index in range(self.history_shown, total):
+                self.history_tree.insert("", 0, iid=str(index), values=self.history_row(index))
+            rows = self.history_tree.get_children()
+            if len(rows) > self.HISTORY_PAGE_SIZE:
+                self.history_tree.delete(*rows[self.HISTORY_PAGE_SIZE:])
+        
+        self.history_shown = total
+        self.update_history_pager()
+    
+    def show_history_page(self, page):
+        """Dibuja una página del historial o de los resultados de la búsqueda
+        
+        La página 0 es la de los personajes más recientes.
+        """
+        results = self.history_results
+        total = len(self.generator.history) if results is None else len(results)
+        pages = max(1, -(-total // self.HISTORY_PAGE_SIZE))
+        self.history_page = min(max(0, page), pages - 1)
+        
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_text.delete(1.0, tk.END)
+        
+        if not total:
+            self.history_text.insert(
+                tk.END,
+                "No hay personajes en el historial." if results is None
+                else "Ningún personaje coincide con la búsqueda."
+            )
+        
+        # Índices de la página, del más reciente al más antiguo
+        start = self.history_page * self.HISTORY_PAGE_SIZE
+        if results is None:
+            indices = range(total - 1 - start, max(-1, total - 1 - start - self.HISTORY_PAGE_SIZE), -1)
+        else:
+            indices = results[start:start + self.HISTORY_PAGE_SIZE].tolist()
+        for index in indices:
+            self.history_tree.insert("", tk.END, iid=str(index), values=self.history_row(index))
+        
+        self.history_shown = len(self.generator.history)
+        self.update_history_pager()
+    
+    def update_history_pager(self):
+        """Actualiza el texto de paginación y los botones de página"""
+        if self.history_results is None:
+            total, noun = self.history_shown, "personajes"
+        else:
+            total, noun = len(self.history_results), "resultados"
+        pages = max(1, -(-total // self.HISTORY_PAGE_SIZE))
+        self.history_page_label.config(text=f"Página {self.history_page + 1} de {pages} ({total} {noun})")
+        self.prev_page_button.config(state="normal" if self.history_page > 0 else "disabled")
+        self.next_page_button.config(state="normal" if self.history_page < pages - 1 else "disabled")
+    
+    def start_search_index(self):
+        """Empieza a construir el índice de búsqueda en segundo plano (una sola vez)"""
+        if self.search_index_started:
+            return
+        self.search_index_started = True
+        threading.Thread(target=self.search_index.actualizar, daemon=True).start()
+    
+    def search_history(self):
+        """Busca en el historial con los criterios de la barra de búsqueda
+        
+        La consulta se hace en un hilo: la primera vez puede tener que
+        construir el índice o esperar a que termine de construirse.
+        """
+        criteria = {
+            "texto": self.search_var.get().strip(),
+            "estilo": self.search_style_var.get() or None,
+            "genero": self.search_gender_var.get() or None,
+            "desde": self.search_from_var.get().strip() or None,
+            "hasta": self.search_to_var.get().strip() or None
+        }
+        if not any(criteria.values()):
+            self.clear_search()
+            return
+        
+        self.search_index_started = True  # La búsqueda pone al día el índice
+        self.search_button.config(state="disabled")
+        self.update_status("Buscando en el historial...")
+        
+        thread = threading.Thread(target=self._search_in_thread, args=(criteria,))
+        thread.daemon = True
+        thread.start()
+    
+    def _search_in_thread(self, criteria):
+        """Pone al día el índice y ejecuta la búsqueda fuera del hilo de Tk"""
+        try:
+            self.search_index.actualizar()
+            start = time.perf_counter()
+            results = self.search_index.buscar(**criteria)
+            elapsed = time.perf_counter() - start
+        except ValueError as e:
+            self.ui_queue.put(("search_error", str(e)))
+            return
+        except Exception as e:
+            self.ui_queue.put(("search_error", f"Error al buscar: {str(e)}"))
+            return
+        self.ui_queue.put(("search", (results, elapsed)))
+    
+    def show_search_results(self, results, elapsed):
+        """Muestra la primera página de los resultados de una búsqueda"""
+        self.search_button.config(state="normal")
+        self.history_results = results
+        self.show_history_page(0)
+        self.update_status(f"{len(results)} personajes encontrados en {elapsed * 1000:.1f} ms")
+    
+    def clear_search(self):
+        """Quita la búsqueda y vuelve a mostrar todo el historial"""
+        for var in (self.search_var, self.search_style_var, self.search_gender_var,
+                    self.search_from_var, self.search_to_var):
+            var.set("")
+        self.history_results = None
+        self.show_history_page(0)
+    
+    def refresh_stats(self):
+        """Pide el informe de estadísticas en un hilo
+        
+        Normalmente solo lee contadores, pero la primera vez puede tener que
+        reconstruirlos desde el diario.
+        """
+        def run():
+            try:
+                self.ui_queue.put(("stats", self.generator.estadisticas_historial()))
+            except Exception as e:
+                self.ui_queue.put(("status", f"Error al calcular estadísticas: {str(e)}"))
+        
+        threading.Thread(target=run, daemon=True).start()
+    
+    def show_stats(self, report):
+        """Muestra el informe de estadísticas del historial"""
+        self.stats_text.delete(1.0, tk.END)
+        self.stats_text.insert(tk.END, self.format_stats(report))
+    
+    @staticmethod
+    def format_stats(report, bar_width=40):
+        """Devuelve el informe de EstadisticasHistorial.resumen() como texto"""
+        total = report["total"]
+        if not total:
+            return "No hay personajes en el historial."
+        
+        def table(counts):
+            width = max(len(str(key)) for key in counts)
+            return [f"  {str(key):<{width}}  {count:>8}  {count / total:6.1%}" for key, count in counts.items()]
+        
+        origin = report["origen"]
+        lines = [
+            f"Personajes: {total}",
+            f"Offline: {origin.get('offline', 0)}   IA: {origin.get('ia', 0)}   ({report['proporcion_ia']:.1%} de IA)",
+            "",
+            "Por estilo:"
+        ]
+        lines += table(report["estilo"])
+        lines += ["", "Por género:"]
+        lines += table(report["genero"])
+        
+        if report["profesion"]:
+            lines += ["", f"Profesiones más frecuentes ({report['profesiones_distintas']} distintas):"]
+            lines += table(report["profesion"])
+        
+        lines += ["", f"Nombres distintos: {report['nombres_distintos']}   Repetidos: {report['nombres_repetidos']}"]
+        if report["nombres_mas_repetidos"]:
+            width = max(len(name) for name in report["nombres_mas_repetidos"])
+            lines += [f"  {name:<{width}}  {count:>8} veces" for name, count in report["nombres_mas_repetidos"].items()]
+        
+        ages = report["edad"]
+        if ages["histograma"]:
+            lines += ["", f"Edades (media {ages['media']:.1f}, mínima {ages['minima']}, máxima {ages['maxima']}):"]
+            peak = max(ages["histograma"].values())
+            width = max(len(bucket) for bucket in ages["histograma"])
+            for bucket, count in ages["histograma"].items():
+                bar = "█" * max(1, round(count / peak * bar_width))
+                lines.append(f"  {bucket:>{width}}  {bar} {count}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def history_row(self, index):
+        """Valores de la fila de la lista para el personaje index del historial"""
+        personaje = self.generator.history[index]
+        return (
+            index + 1,
+            personaje.get('nombre', 'Sin nombre'),
+            personaje.get('estilo', ''),
+            personaje.get('genero', ''),
+            personaje.get('fecha_generacion', '')
+        )
+    
+    def on_history_select(self, event=None):
+        """Muestra la ficha completa del personaje seleccionado"""
+        selection = self.history_tree.selection()
+        if not selection:
+            return
+        index = int(selection[0])
+        if index >= len(self.generator.history):
+            return
+        
+        self.history_text.delete(1.0, tk.END)
+        self.history_text.insert(tk.END, self.format_history_entry(self.generator.history[index], index + 1))
+    
+    @staticmethod
+    def format_history_entry(personaje, number):
+        """Devuelve la ficha de un personaje del historial como texto"""
+        lines = [
+            "=" * 40,
+            f"PERSONAJE {number} - {personaje.get('fecha_generacion', 'Fecha desconocida')}",
+            "=" * 40,
+            "",
+            f"Nombre: {personaje.get('nombre', 'Sin nombre')}"
+        ]
+        
+        if personaje.get('titulo'):
+            lines.append(f"Título: {personaje['titulo']}")
+        
+        if 'edad' in personaje:
+            lines.append(f"Edad: {personaje['edad']}")
+        
+        if personaje.get('profesion'):
+            lines.append(f"Profesión: {personaje['profesion']}")
+        
+        if personaje.get('rasgo'):
+            lines.append(f"Rasgo distintivo: {personaje['rasgo']}")
+        
+        if personaje.get('motivacion'):
+            lines.append(f"Motivación: {personaje['motivacion']}")
+        
+        if personaje.get('descripcion'):
+            lines.append(f"\nDescripción: {personaje['descripcion']}")
+        
+        lines.append(f"\nGénero: {personaje.get('genero', 'No especificado')}")
+        lines.append(f"Estilo: {personaje.get('estilo', 'No especificado')}")
+        
+        return "\n".join(lines) + "\n"
+    
+    def export_history(self):
+        """Exporta el historial, o el resultado de la búsqueda activa, en un hilo
+        
+        El formato (JSONL, CSV o JSON, comprimidos con gzip si el nombre
+        termina en .gz) sale de la extensión elegida. Los personajes se leen y
+        escriben por bloques, así que ni la memoria ni la interfaz dependen del
+        tamaño del historial.
+        """
+        results = self.history_results
+        count = len(self.generator.history) if results is None else len(results)
+        if not count:
+            messagebox.showinfo("Información", "No hay personajes en el historial para exportar.")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".jsonl",
+            filetypes=[
+                ("JSON Lines", "*.jsonl"),
+                ("JSON Lines comprimido", "*.jsonl.gz"),
+                ("CSV", "*.csv"),
+                ("CSV comprimido", "*.csv.gz"),
+                ("Archivos JSON", "*.json"),
+                ("JSON comprimido", "*.json.gz"),
+                ("Todos los archivos", "*.*")
+            ],
+            title="Exportar historial" if results is None else "Exportar resultados de la búsqueda"
+        )
+        if not file_path:
+            return
+        
+        try:
+            formato_de_ruta(file_path)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        
+        # Solo lo que hay ahora: lo que se genere durante la exportación no entra
+        indices = None if results is None else results[::-1]
+        end = len(self.generator.history)
+        
+        self.export_button.config(state="disabled")
+        self.start_progress()
+        self.update_status("Exportando historial...")
+        
+        thread = threading.Thread(target=self._export_in_thread, args=(file_path, indices, end))
+        thread.daemon = True
+        thread.start()
+    
+    def _export_in_thread(self, file_path, indices, end):
+        """Escribe la exportación fuera del hilo de Tk, informando del progreso"""
+        def progress(done, total):
+            self.ui_queue.put(("status", f"Exportando historial... {done}/{total} ({done / total:.0%})"))
+        
+        try:
+            count = exportar(self.generator.history, file_path, indices=indices, fin=end, progreso=progress)
+        except Exception as e:
+            self.ui_queue.put(("export_done", (None, f"Error al exportar: {str(e)}")))
+            return
+        self.ui_queue.put(("export_done", (count, file_path)))
+    
+    def finish_export(self, count, target):
+        """Restablece la interfaz al terminar una exportación"""
+        if not self.generating:
+            self.stop_progress()
+        self.export_button.config(state="normal")
+        if count is None:
+            messagebox.showerror("Error", target)
+        else:
+            self.update_status(f"{count} personajes exportados a {target}")
+    
+    def clear_history(self):
+        """Limpia el historial de personajes"""
+        if not self.generator.history:
+            return
+        
+        if messagebox.askyesno("Confirmar", "¿Está seguro de borrar todo el historial?"):
+            self.generator.limpiar_historial()
+            # Las posiciones indexadas apuntarían a los personajes que se añadan después
+            self.search_index.reiniciar()
+            self.history_results = None
+            self.refresh_history()
+            self.update_status("Historial borrado")
+    
+    def on_close(self):
+        """Guarda el historial pendiente y cierra la ventana"""
+        self.generator.cerrar()
+        self.root.destroy()
+
+
+def iniciar_interfaz():
+    """Abre la ventana principal de la aplicación"""
+    root = tk.Tk()
+    app = App(root)
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    iniciar_interfaz()
@@ -0,0 +1,91 @@
+import hashlib
+import os
+import secrets
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from chargen import PersonajeGenerator, generar_bloques, escribir_bloque, CAMPOS_SALIDA, CAMPOS_SALIDA_NOMBRE
+
+
+def semilla_fragmento(semilla, indice):
+    """Semilla de 64 bits del fragmento indice, derivada de la semilla maestra"""
+    resumen = hashlib.sha256(f"chargen/{semilla}/{indice}".encode("utf-8")).digest()
+    return int.from_bytes(resumen[:8], "big")
+
+
+def repartir(cantidad, fragmentos):
+    """Tamaño de cada fragmento: los primeros cantidad % fragmentos llevan uno más"""
+    base, resto = divmod(cantidad, fragmentos)
+    return [base + (1 if i < resto else 0) for i in range(fragmentos)]
+
+
+def _generar_fragmento(config_file, ruta, cantidad, semilla, genero, estilo, detallado, formato, tamano_bloque, con_fecha):
+    """Genera un fragmento en su propio proceso y lo escribe en ruta; devuelve los errores"""
+    import contextlib
+    import csv
+    import sys
+
+    errores = 0
+    with contextlib.redirect_stdout(sys.stderr):
+        generador = PersonajeGenerator(config_file, semilla=semilla, historial=False)
+        with open(ruta, "w", encoding="utf-8", newline="") as salida:
+            escritor_csv = None
+            if formato == "csv":
+                # La cabecera la escribe una sola vez el proceso principal
+                escritor_csv = csv.DictWriter(
+                    salida,
+                    CAMPOS_SALIDA if detallado else CAMPOS_SALIDA_NOMBRE,
+                    restval="",
+                    extrasaction="ignore"
+                )
+            for bloque in generar_bloques(generador, cantidad, "offline", genero, estilo, detallado,
+                                          tamano_bloque, False, con_fecha):
+                errores += escribir_bloque(salida, bloque, formato, detallado, escritor_csv)
+        generador.cerrar()
+    return errores
+
+
+def generar_en_procesos(config_file, salida, cantidad, fragmentos, semilla=None, genero="aleatorio", estilo="fantasia",
+                       detallado=False, formato="jsonl", tamano_bloque=10000, procesos=None):
+    """Genera cantidad personajes offline repartidos en fragmentos procesados en paralelo
+
+    Cada fragmento tiene su propio generador con una semilla derivada de la
+    maestra y escribe en un archivo temporal; los archivos se copian a salida
+    en orden según terminan, así que la misma semilla y el mismo número de
+    fragmentos producen exactamente los mismos bytes. Con semilla, los
+    personajes no llevan fecha_generacion (dependería del momento de la
+    ejecución). Devuelve el número de errores.
+    """
+    fragmentos = max(1, min(fragmentos, cantidad))
+    con_fecha = semilla is None
+    if semilla is None:
+        semilla = secrets.randbits(64)
+
+    directorio = tempfile.mkdtemp(prefix="chargen-")
+    errores = 0
+    try:
+        with ProcessPoolExecutor(max_workers=procesos or fragmentos, mp_context=get_context("spawn")) as pool:
+            futuros = []
+            for indice, n in enumerate(repartir(cantidad, fragmentos)):
+                ruta = os.path.join(directorio, f"fragmento_{indice:05d}")
+                futuros.append((ruta, pool.submit(
+                    _generar_fragmento, config_file, ruta, n, semilla_fragmento(semilla, indice),
+                    genero, estilo, detallado, formato, tamano_bloque, con_fecha
+                )))
+
+            try:
+                for ruta, futuro in futuros:
+                    errores += futuro.result()
+                    with open(ruta, "r", encoding="utf-8", newline="") as fragmento:
+                        shutil.copyfileobj(fragmento, salida, 1 << 20)
+                    salida.flush()
+                    os.remove(ruta)
+            except BaseException:
+                # Salida cerrada o Ctrl+C: no seguir generando fragmentos
+                pool.shutdown(cancel_futures=True)
+                raise
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+    return errores
@@ -0,0 +1,325 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from urllib.parse import parse_qsl, urlsplit
+
+from chargen import PersonajeGenerator
+
+# Lotes a partir de este tamaño se generan y serializan en el pool de procesos
+LOTE_EN_PROCESO = 1000
+
+# Las peticiones solo llevan unos pocos parámetros
+CUERPO_MAXIMO = 64 * 1024
+
+MOTIVOS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+           502: "Bad Gateway"}
+
+VERDADEROS = ("1", "true", "si", "sí", "yes")
+
+
+class ErrorPeticion(Exception):
+    """Error atribuible a la petición del cliente; se responde con su código"""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+# Estado de cada proceso del pool: un generador propio con los pools ya compilados
+_generador_trabajador = None
+
+
+def _iniciar_trabajador(config_file):
+    global _generador_trabajador
+    _generador_trabajador = PersonajeGenerator(config_file, historial=False)
+
+
+def _calentar_trabajador():
+    return os.getpid()
+
+
+def _lote_trabajador(cantidad, genero, estilo, detallado, formato):
+    return serializar_lote(_generador_trabajador, cantidad, genero, estilo, detallado, formato)
+
+
+def serializar_lote(generador, cantidad, genero, estilo, detallado, formato):
+    """Genera un lote offline y devuelve el cuerpo de la respuesta en bytes (json o jsonl)"""
+    lote = generador.generar_lote_offline(cantidad, genero, estilo)
+    if detallado:
+        registros = lote.como_dicts()
+    else:
+        registros = [{"nombre": p["nombre"], "estilo": p["estilo"], "genero": p["genero"]} for p in lote]
+    if formato == "jsonl":
+        return "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in registros).encode("utf-8")
+    return json.dumps(registros, ensure_ascii=False).encode("utf-8")
+
+
+class ServidorGeneracion:
+    """Servicio HTTP de generación de personajes sobre un bucle asyncio
+
+    Mantiene caliente un PersonajeGenerator (pools compilados, cliente HTTP
+    de la IA, caché y limitador compartidos). Los personajes sueltos se
+    generan en el bucle; los lotes grandes, que son CPU, en un pool de
+    procesos; y las peticiones a la IA en un pool de hilos, combinando las
+    peticiones idénticas que llegan mientras otra igual está en curso.
+
+    Rutas: GET /salud, GET|POST /offline, POST /lote, GET|POST /ia,
+    GET /estadisticas, GET /historial/estadisticas. Los parámetros (genero, estilo, detallado, cantidad,
+    formato) van en la query string o en un cuerpo JSON.
+    """
+
+    def __init__(self, generador, config_file="config.json", trabajadores=2, lote_maximo=1000000, guardar_historial=False):
+        self.generador = generador
+        self.lote_maximo = lote_maximo
+        self.guardar_historial = guardar_historial
+
+        self._procesos = ProcessPoolExecutor(
+            max_workers=max(1, trabajadores),
+            mp_context=get_context("spawn"),
+            initializer=_iniciar_trabajador,
+            initargs=(config_file,)
+        )
+        concurrencia_ia = generador.config.get("api", {}).get("grok-2-latest", {}).get("max_concurrency", 4)
+        self._hilos_ia = ThreadPoolExecutor(max_workers=max(1, concurrencia_ia), thread_name_prefix="servidor-ia")
+        self._trabajadores = max(1, trabajadores)
+
+        self._rutas = {
+            "/salud": (("GET",), self._salud),
+            "/offline": (("GET", "POST"), self._offline),
+            "/lote": (("POST",), self._lote),
+            "/ia": (("GET", "POST"), self._ia),
+            "/estadisticas": (("GET",), self._estadisticas),
+            "/historial/estadisticas": (("GET",), self._estadisticas_historial),
+        }
+        self._en_vuelo = {}  # (genero, estilo, detallado) -> Future de la petición a la IA
+        self.peticiones = {}
+        self.ia_combinadas = 0
+
+    async def iniciar(self, host="127.0.0.1", puerto=8080):
+        """Arranca los procesos del pool y empieza a escuchar; devuelve el asyncio.Server"""
+        bucle = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            bucle.run_in_executor(self._procesos, _calentar_trabajador) for _ in range(self._trabajadores)
+        ))
+        return await asyncio.start_server(self._atender_conexion, host, puerto)
+
+    def cerrar(self):
+        self._procesos.shutdown(cancel_futures=True)
+        self._hilos_ia.shutdown(wait=False, cancel_futures=True)
+
+    # --- HTTP -------------------------------------------------------------
+
+    async def _atender_conexion(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                try:
+                    metodo, destino, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._responder(writer, 400, {"error": "Línea de petición inválida"}, False)
+                    break
+
+                cabeceras = {}
+                while True:
+                    linea = await reader.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+
+                cuerpo = b""
+                longitud = int(cabeceras.get("content-length") or 0)
+                if longitud > CUERPO_MAXIMO:
+                    await self._responder(writer, 413, {"error": "Cuerpo demasiado grande"}, False)
+                    break
+                if longitud:
+                    cuerpo = await reader.readexactly(longitud)
+
+                conexion = cabeceras.get("connection", "").lower()
+                mantener = conexion != "close" and (version == "HTTP/1.1" or conexion == "keep-alive")
+
+                estado, respuesta, tipo = await self._despachar(metodo, destino, cuerpo)
+                await self._responder(writer, estado, respuesta, mantener, tipo)
+                if not mantener:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Conexión cortada o petición que no es HTTP válido
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _responder(writer, estado, respuesta, mantener, tipo="application/json"):
+        if not isinstance(respuesta, bytes):
+            respuesta = json.dumps(respuesta, ensure_ascii=False).encode("utf-8")
+        cabecera = (
+            f"HTTP/1.1 {estado} {MOTIVOS.get(estado, '')}\r\n"
+            f"Content-Type: {tipo}; charset=utf-8\r\n"
+            f"Content-Length: {len(respuesta)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n"
+        )
+        writer.write(cabecera.encode("latin-1") + respuesta)
+        await writer.drain()
+
+    async def _despachar(self, metodo, destino, cuerpo):
+        """Devuelve (estado, respuesta, tipo de contenido) para una petición"""
+        url = urlsplit(destino)
+        ruta = url.path.rstrip("/") or "/"
+        if ruta not in self._rutas:
+            return 404, {"error": f"Ruta desconocida: {ruta}"}, "application/json"
+        self.peticiones[ruta] = self.peticiones.get(ruta, 0) + 1
+        metodos, manejador = self._rutas[ruta]
+        if metodo not in metodos:
+            return 405, {"error": f"Método no permitido: {metodo}"}, "application/json"
+
+        try:
+            parametros = dict(parse_qsl(url.query))
+            if cuerpo:
+                datos = json.loads(cuerpo)
+                if not isinstance(datos, dict):
+                    raise ErrorPeticion(400, "El cuerpo debe ser un objeto JSON")
+                parametros.update(datos)
+            return await manejador(parametros)
+        except ErrorPeticion as e:
+            return e.estado, {"error": str(e)}, "application/json"
+        except ValueError as e:
+            return 400, {"error": f"Petición inválida: {e}"}, "application/json"
+        except Exception as e:
+            print(f"Error en {ruta}: {e}")
+            return 500, {"error": f"Error inesperado: {e}"}, "application/json"
+
+    # --- Parámetros -------------------------------------------------------
+
+    def _opciones(self, parametros):
+        settings = self.generador.config.get("settings", {})
+        genero = parametros.get("genero", settings.get("default_gender", "aleatorio"))
+        if genero != "aleatorio" and genero not in PersonajeGenerator.GENEROS:
+            raise ErrorPeticion(400, f"Género desconocido: {genero}")
+        estilo = parametros.get("estilo", settings.get("default_style", "fantasia"))
+        detallado = str(parametros.get("detallado", "")).lower() in VERDADEROS
+        return genero, estilo, detallado
+
+    # --- Rutas ------------------------------------------------------------
+
+    async def _salud(self, parametros):
+        return 200, {"estado": "ok"}, "application/json"
+
+    async def _offline(self, parametros):
+        genero, estilo, detallado = self._opciones(parametros)
+        lote = self.generador.generar_lote_offline(1, genero, estilo, agregar_historial=self.guardar_historial and detallado)
+        if self.guardar_historial:
+            self.generador.save_history()
+        personaje = lote.como_dicts()[0]
+        if not detallado:
+            personaje = {"nombre": personaje["nombre"], "estilo": personaje["estilo"], "genero": personaje["genero"]}
+        return 200, personaje, "application/json"
+
+    async def _lote(self, parametros):
+        genero, estilo, detallado = self._opciones(parametros)
+        cantidad = int(parametros.get("cantidad", 1))
+        if not 1 <= cantidad <= self.lote_maximo:
+            raise ErrorPeticion(413 if cantidad > self.lote_maximo else 400,
+                                f"La cantidad debe estar entre 1 y {self.lote_maximo}")
+        formato = parametros.get("formato", "json")
+        if formato not in ("json", "jsonl"):
+            raise ErrorPeticion(400, f"Formato desconocido: {formato}")
+        if detallado and self.guardar_historial:
+            # Los lotes se generan (y en su mayoría en otros procesos) sin pasar
+            # por el historial: mejor rechazarlos que no guardarlos sin avisar
+            raise ErrorPeticion(400, "Con --save-history /lote no admite fichas detalladas, que no se "
+                                     "guardarían en el historial; use /offline o `chargen generate --save-history`")
+        tipo = "application/x-ndjson" if formato == "jsonl" else "application/json"
+
+        if cantidad < LOTE_EN_PROCESO:
+            # Lotes pequeños: más barato hacerlos aquí que enviarlos a otro proceso
+            return 200, serializar_lote(self.generador, cantidad, genero, estilo, detallado, formato), tipo
+
+        bucle = asyncio.get_running_loop()
+        cuerpo = await bucle.run_in_executor(
+            self._procesos, _lote_trabajador, cantidad, genero, estilo, detallado, formato
+        )
+        return 200, cuerpo, tipo
+
+    async def _ia(self, parametros):
+        genero, estilo, detallado = self._opciones(parametros)
+        clave = (genero, estilo, detallado)
+
+        futuro = self._en_vuelo.get(clave)
+        if futuro is not None:
+            # Otra petición idéntica ya está esperando a la API: compartir su resultado
+            self.ia_combinadas += 1
+        else:
+            bucle = asyncio.get_running_loop()
+            futuro = bucle.run_in_executor(
+                self._hilos_ia, self._generar_ia, genero, estilo, detallado
+            )
+            self._en_vuelo[clave] = futuro
+            futuro.add_done_callback(lambda _: self._en_vuelo.pop(clave, None))
+
+        resultado = await asyncio.shield(futuro)
+        if isinstance(resultado, dict) and "error" in resultado:
+            estado = 429 if resultado.get("codigo") == 429 else 502
+            return estado, {"error": resultado["error"]}, "application/json"
+        if not isinstance(resultado, dict):
+            resultado = {"nombre": resultado}
+        return 200, resultado, "application/json"
+
+    def _generar_ia(self, genero, estilo, detallado):
+        resultado = self.generador.generar_personaje_con_ia(
+            genero, estilo, detallado, agregar_historial=self.guardar_historial
+        )
+        if self.guardar_historial:
+            self.generador.save_history()
+        return resultado
+
+    async def _estadisticas(self, parametros):
+        return 200, {
+            "peticiones": self.peticiones,
+            "ia_en_curso": len(self._en_vuelo),
+            "ia_combinadas": self.ia_combinadas,
+            "cache_ia": self.generador.estadisticas_cache()
+        }, "application/json"
+
+    async def _estadisticas_historial(self, parametros):
+        top = int(parametros.get("top", 10))
+        if top < 1:
+            raise ErrorPeticion(400, "top debe ser mayor que 0")
+        # La primera consulta puede tener que reconstruirlas desde el diario
+        bucle = asyncio.get_running_loop()
+        resumen = await bucle.run_in_executor(None, self.generador.estadisticas_historial, top)
+        return 200, resumen, "application/json"
+
+
+def servir(config_file="config.json", host=None, puerto=None, trabajadores=None, guardar_historial=False):
+    """Arranca el servicio y lo mantiene hasta Ctrl+C"""
+    generador = PersonajeGenerator(config_file, historial=guardar_historial)
+    opciones = generador.config.get("settings", {}).get("server", {})
+    host = host or opciones.get("host", "127.0.0.1")
+    puerto = opciones.get("port", 8080) if puerto is None else puerto
+    servidor = ServidorGeneracion(
+        generador,
+        config_file,
+        trabajadores=trabajadores or opciones.get("workers", 2),
+        lote_maximo=opciones.get("max_batch", 1000000),
+        guardar_historial=guardar_historial
+    )
+
+    async def ejecutar():
+        servidor_tcp = await servidor.iniciar(host, puerto)
+        direccion = servidor_tcp.sockets[0].getsockname()
+        print(f"Servidor escuchando en http://{direccion[0]}:{direccion[1]}", flush=True)
+        async with servidor_tcp:
+            await servidor_tcp.serve_forever()
+
+    try:
+        asyncio.run(ejecutar())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.cerrar()
+        generador.cerrar()
@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+
+import pytest
+
+# Los módulos del proyecto están en la raíz del repositorio, sin paquete
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+
+@pytest.fixture
+def config_prueba(tmp_path):
+    """Copia de config.json con los datos del repositorio y el historial en tmp_path"""
+    with open(os.path.join(RAIZ, "config.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    config["data_file"] = os.path.join(RAIZ, "personajes_data.json")
+    config["settings"].update(
+        save_history=False,
+        history_file=str(tmp_path / "historial.json"),
+        history_journal=str(tmp_path / "historial.jsonl"),
+        ai_cache={"enabled": False},
+        ai_prefetch={"enabled": False},
+    )
+    ruta = tmp_path / "config.json"
+    ruta.write_text(json.dumps(config), encoding="utf-8")
+    return str(ruta)
@@ -0,0 +1,78 @@
+import pytest
+
+from busqueda import IndiceBusqueda, clave_fecha, filtro_personajes
+
+
+def personaje(nombre, estilo="fantasia", genero="femenino", fecha="2025-05-01 10:00:00", **campos):
+    return dict(nombre=nombre, estilo=estilo, genero=genero, fecha_generacion=fecha, **campos)
+
+
+def posiciones(indice, **criterios):
+    return [int(i) for i in indice.buscar(**criterios)]
+
+
+def test_busqueda_por_prefijo_faceta_y_fecha():
+    historial = [
+        personaje("Álvaro Pérez", estilo="medieval", genero="masculino", fecha="2025-01-10 08:00:00"),
+        personaje("Alba Ruiz", profesion="herrera", fecha="2025-03-05 12:00:00"),
+        personaje("Bruno Gil", estilo="medieval", genero="masculino", fecha="2025-03-20 09:30:00"),
+    ]
+    indice = IndiceBusqueda(historial)
+    assert indice.actualizar() == 3
+
+    assert posiciones(indice, texto="al") == [1, 0]  # Sin tildes y del más reciente al más antiguo
+    assert posiciones(indice, texto="herr") == [1]
+    assert posiciones(indice, estilo="Medieval") == [2, 0]
+    assert posiciones(indice, desde="2025-03", hasta="2025-03-05") == [1]
+    assert posiciones(indice, texto="al", estilo="medieval", genero="masculino") == [0]
+    assert posiciones(indice) == [2, 1, 0]
+
+
+def test_filtro_coincide_con_el_indice():
+    historial = [
+        personaje(f"Nombre{i} Apellido{i % 3}", estilo=("medieval", "moderno")[i % 2],
+                  fecha=f"2025-05-{i % 28 + 1:02d} 10:00:00")
+        for i in range(40)
+    ]
+    indice = IndiceBusqueda(historial)
+    indice.actualizar()
+    for criterios in ({"texto": "apellido1"}, {"estilo": "moderno", "desde": "2025-05-10"},
+                      {"texto": "nombre3", "hasta": "2025-05-20"}):
+        filtro = filtro_personajes(**criterios)
+        esperado = sorted(int(i) for i in indice.buscar(**criterios))
+        assert [i for i, p in enumerate(historial) if filtro(p)] == esperado
+
+
+def test_reiniciar_tras_borrar_y_volver_a_crecer():
+    historial = [personaje(f"Viejo {i}") for i in range(5)]
+    indice = IndiceBusqueda(historial)
+    indice.actualizar()
+
+    historial.clear()
+    indice.reiniciar()
+    historial.extend(personaje(f"Nuevo {i}", estilo="moderno") for i in range(6))
+    indice.actualizar()
+
+    assert posiciones(indice, texto="viejo") == []
+    assert len(posiciones(indice, estilo="moderno")) == 6
+
+
+def test_actualizar_solo_indexa_lo_nuevo():
+    historial = [personaje("Ana")]
+    indice = IndiceBusqueda(historial)
+    assert indice.actualizar() == 1
+    historial.append(personaje("Anabel"))
+    assert indice.actualizar() == 1
+    assert posiciones(indice, texto="ana") == [1, 0]
+
+
+@pytest.mark.parametrize("fecha", ["2025-13-45", "2023-02-29", "2025-05-01 25:00", "abc", "20250501"])
+def test_clave_fecha_rechaza_fechas_no_validas(fecha):
+    with pytest.raises(ValueError):
+        clave_fecha(fecha)
+
+
+def test_clave_fecha_completa_el_periodo():
+    assert clave_fecha("2025-05") == 20250500000000
+    assert clave_fecha("2025-05-01", fin=True) == 20250501999999
+    assert clave_fecha("2025-05-01 10:20:30") == 20250501102030
@@ -0,0 +1,33 @@
+from cache_ia import CacheRespuestas
+
+
+def test_limite_de_bytes_desaloja_las_menos_usadas(tmp_path):
+    cache = CacheRespuestas(str(tmp_path / "c.sqlite3"), max_entradas=0, variedad=1, max_bytes=250)
+    for i in range(5):
+        cache.guardar(f"clave{i}", "x" * 100)
+
+    estadisticas = cache.estadisticas()
+    assert estadisticas["entradas"] == 2
+    assert estadisticas["bytes"] <= 250
+    assert cache.obtener("clave0") is None
+    assert cache.obtener("clave4") == "x" * 100
+    cache.cerrar()
+
+
+def test_limite_de_entradas(tmp_path):
+    cache = CacheRespuestas(str(tmp_path / "c.sqlite3"), max_entradas=3)
+    for i in range(5):
+        cache.guardar(f"clave{i}", "respuesta")
+    assert cache.estadisticas()["entradas"] == 3
+    assert cache.estadisticas()["desalojadas"] == 2
+    cache.cerrar()
+
+
+def test_no_guarda_mas_de_variedad_por_clave(tmp_path):
+    cache = CacheRespuestas(str(tmp_path / "c.sqlite3"), variedad=2)
+    for i in range(4):
+        cache.guardar("clave", f"respuesta {i}")
+
+    assert cache.estadisticas()["entradas"] == 2
+    assert {cache.obtener("clave"), cache.obtener("clave")} == {"respuesta 0", "respuesta 1"}
+    cache.cerrar()
@@ -0,0 +1,75 @@
+import json
+
+from estadisticas import EstadisticasHistorial, ruta_estadisticas
+from historial import LINEA_LIMPIAR, historial_solo_lectura
+
+
+def escribir_diario(ruta, personajes, modo="ab"):
+    with open(ruta, modo) as f:
+        for personaje in personajes:
+            f.write((json.dumps(personaje, ensure_ascii=False) + "\n").encode("utf-8"))
+
+
+def personajes(prefijo, n, estilo="fantasia"):
+    return [{"nombre": f"{prefijo} {i}", "estilo": estilo, "genero": "neutro", "edad": 20 + i} for i in range(n)]
+
+
+def guardar_sellado(ruta):
+    """Lo que hace `chargen stats` tras contar el historial"""
+    historial = historial_solo_lectura(ruta)
+    estadisticas = EstadisticasHistorial.al_dia(historial, ruta)
+    estadisticas.sellar(ruta, historial.fin_diario())
+    estadisticas.guardar(ruta_estadisticas(ruta))
+    return estadisticas
+
+
+def test_al_dia_cuenta_solo_lo_nuevo(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    escribir_diario(ruta, personajes("Viejo", 5))
+    guardar_sellado(ruta)
+
+    escribir_diario(ruta, personajes("Nuevo", 3, estilo="moderno"))
+    estadisticas = EstadisticasHistorial.al_dia(historial_solo_lectura(ruta), ruta)
+
+    assert estadisticas.total == 8
+    assert estadisticas.estilo == {"fantasia": 5, "moderno": 3}
+
+
+def test_borrado_y_vuelta_a_crecer_invalida_la_copia(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    escribir_diario(ruta, personajes("Viejo", 5))
+    guardar_sellado(ruta)
+
+    # Borrado sin volver a guardar las estadísticas (p. ej. un corte) y más
+    # personajes nuevos de los que había antes
+    with open(ruta, "ab") as f:
+        f.write(LINEA_LIMPIAR)
+    escribir_diario(ruta, personajes("Nuevo", 6, estilo="moderno"))
+    estadisticas = EstadisticasHistorial.al_dia(historial_solo_lectura(ruta), ruta)
+
+    assert estadisticas.total == 6
+    assert estadisticas.estilo == {"moderno": 6}
+    assert "Viejo 0" not in estadisticas.nombres
+
+
+def test_diario_sustituido_invalida_la_copia(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    escribir_diario(ruta, personajes("Viejo", 5))
+    guardar_sellado(ruta)
+
+    escribir_diario(ruta, personajes("Otro", 7, estilo="medieval"), modo="wb")
+    estadisticas = EstadisticasHistorial.al_dia(historial_solo_lectura(ruta), ruta)
+
+    assert estadisticas.total == 7
+    assert estadisticas.estilo == {"medieval": 7}
+
+
+def test_guardar_y_cargar_conserva_los_contadores(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    escribir_diario(ruta, personajes("Ana", 3) + personajes("Ana", 2))
+    guardada = guardar_sellado(ruta)
+    cargada = EstadisticasHistorial.cargar(ruta_estadisticas(ruta))
+
+    assert cargada.resumen() == guardada.resumen()
+    assert cargada.repetidos == 2
+    assert (cargada.cubierto, cargada.huella) == (guardada.cubierto, guardada.huella)
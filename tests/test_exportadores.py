@@ -0,0 +1,97 @@
+import csv
+import gzip
+import json
+
+import pytest
+
+from busqueda import filtro_personajes
+from exportadores import ExportacionCancelada, exportar, formato_de_ruta
+
+
+def historial_mixto(n=12):
+    estilos = ("medieval", "fantasia", "moderno")
+    return [
+        {
+            "nombre": f"Personaje {i}",
+            "edad": 20 + i,
+            "profesion": "herrera",
+            "estilo": estilos[i % len(estilos)],
+            "genero": "femenino",
+            "fecha_generacion": f"2025-05-{i + 1:02d} 10:00:00",
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("tamano_bloque", [1, 2, 5, 100])
+def test_json_con_filtro_y_bloques_pequenos_es_valido(tmp_path, tamano_bloque):
+    historial = historial_mixto()
+    ruta = str(tmp_path / "x.json")
+
+    exportados = exportar(historial, ruta, tamano_bloque=tamano_bloque,
+                          filtro=filtro_personajes(estilo="medieval"))
+
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    assert exportados == len(datos) == 4
+    assert [p["nombre"] for p in datos] == [f"Personaje {i}" for i in (0, 3, 6, 9)]
+
+
+@pytest.mark.parametrize("formato", ["json", "jsonl", "csv"])
+def test_exportacion_vacia_es_valida(tmp_path, formato):
+    ruta = str(tmp_path / f"x.{formato}")
+
+    exportados = exportar(historial_mixto(), ruta, tamano_bloque=1,
+                          filtro=filtro_personajes(estilo="cyberpunk"))
+
+    assert exportados == 0
+    with open(ruta, encoding="utf-8") as f:
+        texto = f.read()
+    if formato == "json":
+        assert json.loads(texto) == []
+    elif formato == "jsonl":
+        assert texto == ""
+    else:
+        assert list(csv.DictReader(texto.splitlines())) == []
+
+
+def test_jsonl_gzip_y_tramo(tmp_path):
+    historial = historial_mixto()
+    ruta = str(tmp_path / "x.jsonl.gz")
+
+    exportados = exportar(historial, ruta, inicio=2, fin=7, tamano_bloque=2)
+
+    with gzip.open(ruta, "rt", encoding="utf-8") as f:
+        datos = [json.loads(linea) for linea in f]
+    assert exportados == 5
+    assert datos == historial[2:7]
+
+
+def test_csv_conserva_los_campos(tmp_path):
+    historial = historial_mixto(3)
+    ruta = str(tmp_path / "x.csv")
+
+    exportar(historial, ruta, tamano_bloque=2)
+
+    with open(ruta, encoding="utf-8", newline="") as f:
+        filas = list(csv.DictReader(f))
+    assert [fila["nombre"] for fila in filas] == [p["nombre"] for p in historial]
+    assert filas[1]["edad"] == "21"
+
+
+def test_cancelar_no_deja_archivo(tmp_path):
+    class Activado:
+        def is_set(self):
+            return True
+
+    ruta = tmp_path / "x.json"
+    with pytest.raises(ExportacionCancelada):
+        exportar(historial_mixto(), str(ruta), cancelar=Activado())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_formato_de_ruta():
+    assert formato_de_ruta("a.CSV.gz") == ("csv", True)
+    assert formato_de_ruta("a.jsonl") == ("jsonl", False)
+    with pytest.raises(ValueError):
+        formato_de_ruta("a.txt")
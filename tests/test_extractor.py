@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from extractor import ParserCamposIncremental, extraer_personaje, extraer_personajes
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "utils", "corpus_respuestas.jsonl")
+
+
+def cargar_corpus():
+    with open(CORPUS, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def recuperada(entrada):
+    personaje = extraer_personaje(entrada["respuesta"]).datos
+    return all(personaje.get(campo) == valor for campo, valor in entrada["esperado"].items())
+
+
+# Sin estructura alguna no siempre se puede distinguir dónde acaba cada campo
+DEFECTOS = sorted({e["defecto"] for e in cargar_corpus()} - {"texto_plano"})
+
+
+@pytest.mark.parametrize("defecto", DEFECTOS)
+def test_corpus_se_recupera_entero(defecto):
+    entradas = [e for e in cargar_corpus() if e["defecto"] == defecto]
+
+    fallidas = [e["respuesta"] for e in entradas if not recuperada(e)]
+
+    assert entradas and fallidas == []
+
+
+def test_json_valido():
+    texto = 'Aquí tienes:\n```json\n{"nombre": "Ana", "edad": "30 años"}\n```'
+
+    resultado = extraer_personaje(texto)
+
+    assert resultado.metodo == "json"
+    assert resultado.datos == {"nombre": "Ana", "edad": 30}
+
+
+def test_reparado_conserva_comillas_tipograficas_en_valores():
+    texto = '{“nombre”: "Ana", “descripcion”: "Le llaman “la Roja”",}'
+
+    resultado = extraer_personaje(texto)
+
+    assert resultado.metodo == "reparado"
+    assert resultado.datos["descripcion"] == "Le llaman “la Roja”"
+
+
+def test_respuesta_cortada():
+    resultado = extraer_personaje('{"nombre": "Ana", "profesion": "Herrera", "descripcion": "Alta y')
+
+    assert resultado.metodo == "reparado"
+    assert resultado.datos["nombre"] == "Ana" and resultado.datos["profesion"] == "Herrera"
+
+
+def test_texto_sin_estructura():
+    resultado = extraer_personaje("**Ana la Herrera**\nUna mujer alta.")
+
+    assert resultado.metodo == "texto"
+    assert resultado.datos["nombre"] == "Ana la Herrera"
+
+
+def test_array_con_un_objeto_roto():
+    texto = '[{"nombre": "Ana", "edad": 30}, {"nombre": "Bo" "edad": }, {"nombre": "Cai", "edad": 41}]'
+
+    assert [p["nombre"] for p in extraer_personajes(texto)] == ["Ana", "Cai"]
+
+
+def test_parser_incremental_por_fragmentos():
+    texto = '{"nombre": "Ana", "edad": 30, "descripcion": "Alta, \\"seria\\""}'
+    parser = ParserCamposIncremental()
+
+    campos = []
+    for i in range(0, len(texto), 3):
+        campos.extend(parser.alimentar(texto[i:i + 3]))
+
+    assert campos == [("nombre", "Ana"), ("edad", 30), ("descripcion", 'Alta, "seria"')]
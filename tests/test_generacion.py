@@ -0,0 +1,92 @@
+import pytest
+
+from chargen import PersonajeGenerator, generar_bloques, palabras_semilla, palabras_semilla_lote
+
+
+def generador(config, semilla=None):
+    return PersonajeGenerator(config, semilla=semilla, historial=False)
+
+
+def sin_fecha(personajes):
+    return [{k: v for k, v in dict(p).items() if k != "fecha_generacion"} for p in personajes]
+
+
+def test_palabras_de_numpy_y_python_coinciden():
+    np = pytest.importorskip("numpy")
+    semillas = [0, 1, 2 ** 63, 2 ** 64 - 1, 0x9E3779B97F4A7C15, 123456789]
+    lote = palabras_semilla_lote(np.array(semillas, dtype=np.uint64))
+    for i, semilla in enumerate(semillas):
+        assert [int(columna[i]) for columna in lote] == list(palabras_semilla(semilla))
+
+
+@pytest.mark.parametrize("genero", ["aleatorio", "femenino"])
+@pytest.mark.parametrize("n", [10, 1500])  # Sin NumPy y con NumPy (LOTE_MINIMO_NUMPY = 1000)
+def test_lote_coincide_con_personaje_desde_semilla(config_prueba, genero, n):
+    gen = generador(config_prueba, semilla=7)
+    lote = gen.generar_lote_offline(n, genero, "medieval")
+    assert len(lote) == n
+    for personaje in list(lote)[::97]:
+        esperado = gen.personaje_desde_semilla(personaje.semilla, genero, "medieval", lote.timestamp)
+        assert dict(personaje) == dict(esperado)
+
+
+@pytest.mark.parametrize("n", [10, 1500])
+def test_misma_semilla_mismo_lote(config_prueba, n):
+    a = generador(config_prueba, semilla=42).generar_lote_offline(n, "aleatorio", "fantasia")
+    b = generador(config_prueba, semilla=42).generar_lote_offline(n, "aleatorio", "fantasia")
+    c = generador(config_prueba, semilla=43).generar_lote_offline(n, "aleatorio", "fantasia")
+    assert sin_fecha(a) == sin_fecha(b)
+    assert sin_fecha(a) != sin_fecha(c)
+
+
+def test_generar_bloques_con_semilla_es_reproducible(config_prueba):
+    def bloques(semilla):
+        gen = generador(config_prueba, semilla=semilla)
+        return list(generar_bloques(gen, 2500, "offline", "aleatorio", "moderno", True, 1000, False, con_fecha=False))
+
+    primera = bloques(5)
+    assert [len(b) for b in primera] == [1000, 1000, 500]
+    assert all("fecha_generacion" not in p for b in primera for p in b)
+    assert primera == bloques(5)
+
+
+def test_personaje_suelto_con_semilla(config_prueba):
+    a = generador(config_prueba, semilla=3)
+    b = generador(config_prueba, semilla=3)
+    for _ in range(5):
+        assert sin_fecha([a.generar_personaje_offline("aleatorio", "fantasia", True)]) == \
+            sin_fecha([b.generar_personaje_offline("aleatorio", "fantasia", True)])
+
+
+def combinaciones_distintas(gen, estilo, generos, incluir_titulo=False):
+    """Cuenta por fuerza bruta las combinaciones (nombre, apellido, título) distintas"""
+    combinaciones = set()
+    for genero in generos:
+        cat = gen.indice[(estilo, genero)]
+        titulos = (None,) + tuple(cat.titulos) if incluir_titulo else (None,)
+        for nombre in cat.nombres:
+            for apellido in cat.apellidos or (None,):
+                for titulo in titulos:
+                    combinaciones.add((nombre, apellido, titulo))
+    return len(combinaciones)
+
+
+@pytest.mark.parametrize("genero", ["aleatorio", "neutro"])
+def test_nombres_unicos_recorren_todas_las_combinaciones(config_prueba, genero):
+    gen = generador(config_prueba, semilla=1)
+    generos = PersonajeGenerator.GENEROS if genero == "aleatorio" else (genero,)
+    total = combinaciones_distintas(gen, "ciencia_ficcion", generos)
+
+    nombres = list(gen.generar_nombres_unicos(total, genero, "ciencia_ficcion"))
+    assert len(nombres) == total
+    assert len(set(nombres)) == total
+
+    with pytest.raises(ValueError):
+        gen.generar_nombres_unicos(total + 1, genero, "ciencia_ficcion")
+
+
+def test_nombres_unicos_con_titulo(config_prueba):
+    gen = generador(config_prueba, semilla=2)
+    total = combinaciones_distintas(gen, "medieval", ("femenino",), incluir_titulo=True)
+    nombres = list(gen.generar_nombres_unicos(total, "femenino", "medieval", incluir_titulo=True))
+    assert len(set(nombres)) == total
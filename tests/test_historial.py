@@ -0,0 +1,123 @@
+import json
+import os
+
+from historial import MARCA_LIMPIAR, DiarioHistorial, HistorialPerezoso, historial_solo_lectura
+
+
+def abrir(ruta):
+    diario = DiarioHistorial(ruta, intervalo_fsync=0)
+    return diario, HistorialPerezoso(ruta, diario.indice.total)
+
+
+def test_consolidar_deja_los_personajes_en_el_diario(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, historial = abrir(ruta)
+    personajes = [{"nombre": f"P{i}", "edad": i} for i in range(10)]
+
+    historial.extend(personajes[:6])
+    diario.agregar_varios(personajes[:6])
+    diario.vaciar()
+    historial.extend(personajes[6:])  # Aún sin guardar
+    historial.consolidar(ruta, 6)
+
+    assert historial._nuevos == personajes[6:]
+    assert len(historial) == 10
+    assert list(historial) == personajes
+    diario.cerrar()
+
+
+def test_consolidar_sin_indice_suficiente_no_cambia_nada(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, historial = abrir(ruta)
+    historial.extend([{"nombre": "A"}, {"nombre": "B"}])
+
+    historial.consolidar(ruta, 2)  # Nada escrito en el diario
+
+    assert list(historial) == [{"nombre": "A"}, {"nombre": "B"}]
+    diario.cerrar()
+
+
+def lineas(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f]
+
+
+def test_diario_recupera_tras_linea_cortada(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, _ = abrir(ruta)
+    diario.agregar_varios([{"nombre": "A"}, {"nombre": "B"}])
+    diario.cerrar()
+    with open(ruta, "ab") as f:
+        f.write(b'{"nombre": "C", "ed')  # Escritura interrumpida
+
+    diario, historial = abrir(ruta)
+    assert list(historial) == [{"nombre": "A"}, {"nombre": "B"}]
+    diario.agregar({"nombre": "D"})
+    diario.cerrar()
+    assert lineas(ruta) == [{"nombre": "A"}, {"nombre": "B"}, {"nombre": "D"}]
+
+
+def test_indice_se_rehace_si_falta_o_esta_danado(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, _ = abrir(ruta)
+    diario.agregar_varios([{"nombre": f"P{i}"} for i in range(5)])
+    diario.cerrar()
+
+    os.remove(ruta + ".idx")
+    diario, historial = abrir(ruta)
+    assert [p["nombre"] for p in historial] == [f"P{i}" for i in range(5)]
+    diario.cerrar()
+
+    with open(ruta + ".idx", "r+b") as f:
+        f.write(b"XXXX")
+    diario, historial = abrir(ruta)
+    assert len(historial) == 5 and historial[4] == {"nombre": "P4"}
+    diario.cerrar()
+
+
+def test_lineas_sin_indexar_se_recuperan(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, _ = abrir(ruta)
+    diario.agregar({"nombre": "A"})
+    diario.cerrar()
+    with open(ruta, "ab") as f:
+        f.write(b'{"nombre": "B"}\n')  # Escrita sin actualizar el índice (p. ej. un corte)
+
+    diario, historial = abrir(ruta)
+    assert list(historial) == [{"nombre": "A"}, {"nombre": "B"}]
+    diario.cerrar()
+
+
+def test_limpiar_y_compactar(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, _ = abrir(ruta)
+    diario.agregar_varios([{"nombre": "Viejo"}] * 3)
+    diario.limpiar()
+    diario.agregar({"nombre": "Nuevo"})
+    diario.vaciar()
+    assert lineas(ruta)[3] == MARCA_LIMPIAR
+
+    # Antes de compactar, quien lee el diario ya no ve lo borrado
+    assert list(historial_solo_lectura(ruta)) == [{"nombre": "Nuevo"}]
+    assert list(HistorialPerezoso(ruta, diario.indice.total)) == [{"nombre": "Nuevo"}]
+
+    diario.cerrar()  # Compacta al cerrar: solo quedan las líneas vivas
+    assert lineas(ruta) == [{"nombre": "Nuevo"}]
+    diario, historial = abrir(ruta)
+    assert list(historial) == [{"nombre": "Nuevo"}]
+    diario.cerrar()
+
+
+def test_solo_lectura_no_modifica_nada(tmp_path):
+    ruta = str(tmp_path / "h.jsonl")
+    diario, _ = abrir(ruta)
+    diario.agregar_varios([{"nombre": "A"}, {"nombre": "B"}])
+    diario.cerrar()
+    with open(ruta, "ab") as f:
+        f.write(b'{"nombre": "C"}\n{"nombre": "D')
+    antes = {nombre: (tmp_path / nombre).read_bytes() for nombre in ("h.jsonl", "h.jsonl.idx")}
+
+    historial = historial_solo_lectura(ruta)
+
+    assert list(historial) == [{"nombre": "A"}, {"nombre": "B"}, {"nombre": "C"}]
+    assert {nombre: (tmp_path / nombre).read_bytes() for nombre in antes} == antes
@@ -0,0 +1,78 @@
+"""Micro-benchmark del extractor de respuestas de IA
+
+Mide el rendimiento (respuestas por segundo) y la tasa de recuperación de
+extraer_personaje sobre el corpus generado por generar_corpus.py, en total y
+por tipo de defecto. Una respuesta se considera recuperada cuando se
+obtienen todos los campos esperados con su valor exacto.
+
+Uso: python utils/bench_extractor.py [utils/corpus_respuestas.jsonl] [repeticiones]
+"""
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from extractor import extraer_personaje
+
+
+def cargar_corpus(ruta):
+    with open(ruta, "r", encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def evaluar(corpus):
+    """Devuelve {defecto: [recuperadas, campos_correctos, campos_esperados, total, metodos]}"""
+    resultados = defaultdict(lambda: [0, 0, 0, 0, defaultdict(int)])
+    for entrada in corpus:
+        personaje, metodo = extraer_personaje(entrada["respuesta"])
+        esperado = entrada["esperado"]
+        correctos = sum(1 for campo, valor in esperado.items() if personaje.get(campo) == valor)
+
+        fila = resultados[entrada["defecto"]]
+        fila[0] += correctos == len(esperado)
+        fila[1] += correctos
+        fila[2] += len(esperado)
+        fila[3] += 1
+        fila[4][metodo] += 1
+    return resultados
+
+
+def medir(corpus, repeticiones):
+    respuestas = [entrada["respuesta"] for entrada in corpus]
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for respuesta in respuestas:
+            extraer_personaje(respuesta)
+    return time.perf_counter() - inicio
+
+
+def main():
+    ruta = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, "utils", "corpus_respuestas.jsonl")
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    corpus = cargar_corpus(ruta)
+    resultados = evaluar(corpus)
+
+    print(f"{'defecto':<24}{'recuperadas':>12}{'campos':>9}  métodos")
+    totales = [0, 0, 0, 0]
+    for defecto, (recuperadas, correctos, esperados, total, metodos) in resultados.items():
+        for i, valor in enumerate((recuperadas, correctos, esperados, total)):
+            totales[i] += valor
+        resumen = ", ".join(f"{m}={n}" for m, n in sorted(metodos.items()))
+        print(f"{defecto:<24}{recuperadas / total:>11.0%} {correctos / esperados:>8.0%}  {resumen}")
+    print(f"{'TOTAL':<24}{totales[0] / totales[3]:>11.0%} {totales[1] / totales[2]:>8.0%}")
+
+    segundos = medir(corpus, repeticiones)
+    procesadas = len(corpus) * repeticiones
+    megas = sum(len(e["respuesta"].encode("utf-8")) for e in corpus) * repeticiones / 1e6
+    print(f"\n{procesadas} respuestas en {segundos:.3f} s: "
+          f"{procesadas / segundos:,.0f} respuestas/s, {megas / segundos:.1f} MB/s, "
+          f"{segundos / procesadas * 1e6:.1f} µs/respuesta")
+
+
+if __name__ == "__main__":
+    main()
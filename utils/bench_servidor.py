@@ -0,0 +1,169 @@
+"""Benchmark del servicio HTTP (chargen.py serve) en localhost
+
+Arranca el servicio en un proceso aparte con una copia temporal de
+config.json (sin historial; la IA apunta al servidor simulado de
+mock_api.py) y lo carga desde un cliente asyncio con conexiones keep-alive.
+Para cada ruta informa de peticiones por segundo y latencias p50/p95/p99.
+En /ia todas las peticiones son idénticas, así que el servicio combina las
+que coinciden en vuelo: se informa también de cuántas llegaron a la API.
+
+Uso: python utils/bench_servidor.py [--rutas salud offline offline-detallado lote ia] [--peticiones 2000] [--concurrencia 32]
+     python utils/bench_servidor.py --url http://127.0.0.1:8080 --rutas offline
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from mock_api import ServidorSimulado
+from carga_ia import percentil
+
+# Ruta -> (método, destino, cuerpo)
+ESCENARIOS = {
+    "salud": ("GET", "/salud", None),
+    "offline": ("GET", "/offline", None),
+    "offline-detallado": ("GET", "/offline?detallado=1", None),
+    "lote": ("POST", "/lote", {"cantidad": 100, "detallado": True}),
+    "lote-grande": ("POST", "/lote", {"cantidad": 20000, "detallado": True}),
+    "ia": ("GET", "/ia?detallado=1", None),
+}
+
+
+def arrancar_servicio(directorio, url_api, trabajadores):
+    """Lanza `chargen.py serve` y devuelve (proceso, url)"""
+    with open(os.path.join(RAIZ, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    config["data_file"] = os.path.join(RAIZ, config.get("data_file", "personajes_data.json"))
+    config["settings"]["save_history"] = False
+    config["settings"]["ai_cache"] = {"enabled": False}
+    config["settings"]["ai_prefetch"] = {"enabled": False}
+    config["api"]["grok-2-latest"].update({
+        "api_base_url": url_api,
+        "api_key": "mock",
+        "requests_per_second": 1000.0
+    })
+
+    ruta_config = os.path.join(directorio, "config.json")
+    with open(ruta_config, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+
+    comando = [sys.executable, os.path.join(RAIZ, "chargen.py"), "serve", "--config", ruta_config, "--port", "0"]
+    if trabajadores:
+        comando += ["--workers", str(trabajadores)]
+    proceso = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+    # La primera línea anuncia la dirección; el resto de la salida se descarta
+    linea = proceso.stdout.readline()
+    if not linea.startswith("Servidor escuchando en "):
+        proceso.kill()
+        raise RuntimeError("El servicio no arrancó")
+    url = linea.rsplit(" ", 1)[1].strip()
+    # Vaciar la tubería para que los mensajes del servicio no lo bloqueen
+    threading.Thread(target=proceso.stdout.read, daemon=True).start()
+    return proceso, url
+
+
+async def peticion(reader, writer, metodo, destino, cuerpo):
+    """Envía una petición por una conexión abierta y devuelve el estado HTTP"""
+    datos = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else b""
+    writer.write(
+        f"{metodo} {destino} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(datos)}\r\n\r\n".encode("latin-1") + datos
+    )
+    estado = int((await reader.readline()).split()[1])
+    longitud = 0
+    while True:
+        linea = await reader.readline()
+        if linea in (b"\r\n", b""):
+            break
+        nombre, _, valor = linea.decode("latin-1").partition(":")
+        if nombre.lower() == "content-length":
+            longitud = int(valor)
+    await reader.readexactly(longitud)
+    return estado
+
+
+async def cargar(url, escenario, peticiones, concurrencia):
+    """Lanza peticiones desde concurrencia conexiones; devuelve (segundos, latencias, fallidas)"""
+    host, puerto = url.split("//", 1)[1].split(":")
+    metodo, destino, cuerpo = escenario
+    pendientes = iter(range(peticiones))
+    latencias = []
+    fallidas = 0
+
+    async def conexion():
+        nonlocal fallidas
+        reader, writer = await asyncio.open_connection(host, int(puerto), limit=2 ** 24)
+        for _ in pendientes:
+            inicio = time.perf_counter()
+            estado = await peticion(reader, writer, metodo, destino, cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+            if estado != 200:
+                fallidas += 1
+        writer.close()
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conexion() for _ in range(concurrencia)))
+    return time.perf_counter() - inicio, sorted(latencias), fallidas
+
+
+async def estadisticas(url):
+    host, puerto = url.split("//", 1)[1].split(":")
+    reader, writer = await asyncio.open_connection(host, int(puerto))
+    writer.write(b"GET /estadisticas HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    respuesta = await reader.read()
+    writer.close()
+    return json.loads(respuesta.split(b"\r\n\r\n", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del servicio HTTP de generación")
+    parser.add_argument("--url", help="Servicio ya arrancado; si se omite se lanza uno propio")
+    parser.add_argument("--rutas", nargs="+", choices=tuple(ESCENARIOS), default=["salud", "offline", "offline-detallado", "lote", "ia"])
+    parser.add_argument("--peticiones", type=int, default=2000)
+    parser.add_argument("--concurrencia", type=int, default=32)
+    parser.add_argument("--workers", type=int, help="Procesos del servicio para los lotes grandes")
+    parser.add_argument("--latencia-ia", default="fija:0.2", help="Latencia del servidor simulado (ver mock_api.py)")
+    args = parser.parse_args()
+
+    simulado = None
+    proceso = None
+    directorio = tempfile.TemporaryDirectory()
+    url = args.url
+    try:
+        if url is None:
+            simulado = ServidorSimulado("127.0.0.1", 0, latencia=args.latencia_ia).iniciar()
+            proceso, url = arrancar_servicio(directorio.name, simulado.url, args.workers)
+
+        for ruta in args.rutas:
+            total, latencias, fallidas = asyncio.run(cargar(url, ESCENARIOS[ruta], args.peticiones, args.concurrencia))
+            print(f"{ruta:<20}{args.peticiones / total:>10,.0f} req/s   "
+                  f"p50 {percentil(latencias, 50) * 1000:7.1f} ms   "
+                  f"p95 {percentil(latencias, 95) * 1000:7.1f} ms   "
+                  f"p99 {percentil(latencias, 99) * 1000:7.1f} ms   "
+                  f"fallidas {fallidas}")
+
+        if "ia" in args.rutas:
+            datos = asyncio.run(estadisticas(url))
+            llegadas = f", {simulado.peticiones} llegaron a la API" if simulado else ""
+            print(f"ia: {datos['ia_combinadas']} peticiones combinadas con otra en vuelo{llegadas}")
+    finally:
+        if proceso:
+            proceso.terminate()
+            proceso.wait()
+        if simulado:
+            simulado.detener()
+        directorio.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Benchmark de la generación offline con umbrales de regresión
+
+Mide personajes por segundo y latencia por llamada de generar_nombre_offline,
+generar_personaje_offline y generar_lote_offline para cada estilo, con y sin
+historial persistente, sobre paquetes de datos sintéticos que multiplican por
+10, 100 y 1000 los pools de personajes_data.json. Los resultados se escriben
+en JSON; si existe una línea base y algún escenario rinde menos de lo que
+permite el umbral, el comando termina con código 1.
+
+Para que la comparación sirva entre máquinas y con la máquina cargada, cada
+ejecución mide también una carga de referencia de Python puro y la línea base
+se escala por la relación entre ambas referencias. Los escenarios que aun así
+quedan por debajo se vuelven a medir una vez antes de darlos por regresión.
+La línea base es propia de cada máquina (utils/benchmark_baseline.json, fuera
+del repositorio): guárdala en la máquina donde se vaya a comprobar.
+
+Uso: python utils/benchmark.py [--escalas 1 10 100 1000] [--salida benchmark_resultados.json]
+     python utils/benchmark.py --guardar-baseline   (tras un cambio de rendimiento intencionado)
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import numpy as np
+
+from chargen import PersonajeGenerator
+
+BASELINE = os.path.join(RAIZ, "utils", "benchmark_baseline.json")
+
+
+def calibrar(repeticiones=5):
+    """Operaciones por segundo de una carga fija de Python puro (sortear y formatear)"""
+    pool = tuple(f"nombre{i}" for i in range(1000))
+    rng = random.Random(0)
+    mejor = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in range(200000):
+            f"{rng.choice(pool)} {rng.choice(pool)}"
+        total = time.perf_counter() - inicio
+        mejor = total if mejor is None else min(mejor, total)
+    return 200000 / mejor
+
+
+def escalar_datos(datos, factor):
+    """Multiplica por factor cada lista de nombres, apellidos, títulos, rasgos,
+    profesiones y motivaciones, con variantes numeradas de cada elemento"""
+    def escalar(valor):
+        if isinstance(valor, list):
+            return valor + [f"{elemento} {i}" for i in range(1, factor) for elemento in valor]
+        if isinstance(valor, dict):
+            return {clave: escalar(v) for clave, v in valor.items()}
+        return valor
+
+    if factor <= 1:
+        return datos
+    escalados = dict(datos)
+    for clave in ("categorias", "profesiones", "motivaciones"):
+        escalados[clave] = escalar(datos.get(clave, {}))
+    return escalados
+
+
+def crear_generador(directorio, ruta_datos, historial):
+    """PersonajeGenerator sobre ruta_datos con el historial (si se usa) en directorio"""
+    with open(os.path.join(RAIZ, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    config["data_file"] = ruta_datos
+    config["settings"].update({
+        "save_history": historial,
+        "history_file": os.path.join(directorio, "historico.json"),
+        "history_journal": os.path.join(directorio, "historico.jsonl")
+    })
+
+    ruta_config = os.path.join(directorio, "config.json")
+    with open(ruta_config, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return PersonajeGenerator(ruta_config)
+
+
+def medir_individual(llamada, n, repeticiones, despues=None):
+    """Mejor de varias repeticiones de n llamadas, con la latencia de cada llamada"""
+    mejor = None
+    latencias = []
+    for _ in range(repeticiones):
+        tiempos = []
+        inicio = time.perf_counter()
+        for _ in range(n):
+            t = time.perf_counter()
+            llamada()
+            tiempos.append(time.perf_counter() - t)
+        if despues:
+            despues()
+        total = time.perf_counter() - inicio
+        if mejor is None or total < mejor:
+            mejor, latencias = total, tiempos
+
+    latencias.sort()
+    return {
+        "personajes_por_segundo": n / mejor,
+        "latencia_media_us": mejor / n * 1e6,
+        "latencia_p50_us": latencias[len(latencias) // 2] * 1e6,
+        "latencia_p99_us": latencias[int(len(latencias) * 0.99)] * 1e6
+    }
+
+
+def medir_lote(llamada, n, repeticiones, despues=None):
+    """Mejor de varias repeticiones de una llamada que genera n personajes"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        llamada()
+        if despues:
+            despues()
+        tiempos.append(time.perf_counter() - inicio)
+    mejor = min(tiempos)
+    return {
+        "personajes_por_segundo": n / mejor,
+        "latencia_media_us": statistics.mean(tiempos) * 1e6,
+        "latencia_p50_us": statistics.median(tiempos) * 1e6,
+        "latencia_p99_us": max(tiempos) * 1e6
+    }
+
+
+def ejecutar_escala(datos, factor, args):
+    """Devuelve {escenario: métricas} para un paquete de datos escalado por factor"""
+    resultados = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_datos = os.path.join(directorio, "datos.json")
+        with open(ruta_datos, "w", encoding="utf-8") as f:
+            json.dump(escalar_datos(datos, factor), f, ensure_ascii=False)
+
+        for historial in (False, True):
+            subdirectorio = os.path.join(directorio, "historial" if historial else "sin_historial")
+            os.mkdir(subdirectorio)
+            generador = crear_generador(subdirectorio, ruta_datos, historial)
+            etiqueta = "historial" if historial else "sin_historial"
+
+            # Sin historial persistente, vaciar el de memoria entre repeticiones;
+            # con él, enviar al diario lo generado como hace la interfaz
+            despues = generador.save_history if historial else generador.history.clear
+
+            for estilo in generador.data["categorias"]:
+                base = f"x{factor}/{estilo}"
+
+                if not historial:
+                    # Los nombres sueltos no se guardan en el historial
+                    resultados[f"{base}/nombre/individual"] = medir_individual(
+                        lambda: generador.generar_nombre_offline("aleatorio", estilo),
+                        args.n, args.repeticiones
+                    )
+
+                resultados[f"{base}/detallado/individual/{etiqueta}"] = medir_individual(
+                    lambda: generador.generar_personaje_offline("aleatorio", estilo, True),
+                    args.n, args.repeticiones, despues
+                )
+                resultados[f"{base}/detallado/lote/{etiqueta}"] = medir_lote(
+                    lambda: generador.generar_lote_offline(args.n_lote, "aleatorio", estilo, agregar_historial=historial),
+                    args.n_lote, args.repeticiones, despues
+                )
+
+            generador.cerrar()
+    return resultados
+
+
+def comparar(resultados, referencia_actual, baseline, umbral):
+    """Devuelve los escenarios cuyo rendimiento cae por debajo de baseline * (1 - umbral)
+
+    La línea base se escala antes por la velocidad relativa de esta máquina.
+    """
+    escala = referencia_actual / baseline.get("referencia_ops", referencia_actual)
+    regresiones = []
+    for escenario, referencia in baseline.get("resultados", {}).items():
+        actual = resultados.get(escenario)
+        if actual is None:
+            continue
+        minimo = referencia["personajes_por_segundo"] * escala * (1 - umbral)
+        if actual["personajes_por_segundo"] < minimo:
+            regresiones.append((escenario, referencia["personajes_por_segundo"] * escala, actual["personajes_por_segundo"]))
+    return regresiones
+
+
+def medir_escalas(datos, escalas, args):
+    resultados = {}
+    for factor in escalas:
+        inicio = time.perf_counter()
+        # Los mensajes del generador no forman parte de la medida
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultados.update(ejecutar_escala(datos, factor, args))
+        print(f"escala x{factor}: {time.perf_counter() - inicio:.1f} s")
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la generación offline")
+    parser.add_argument("--escalas", type=int, nargs="+", default=[1, 10, 100, 1000],
+                        help="Factores de tamaño de los paquetes de datos sintéticos")
+    parser.add_argument("--n", type=int, default=5000, help="Llamadas por escenario individual")
+    parser.add_argument("--n-lote", type=int, default=100000, help="Personajes por lote")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", default="benchmark_resultados.json")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--umbral", type=float, default=0.3,
+                        help="Caída de rendimiento tolerada respecto a la línea base (0.3 = 30%%)")
+    parser.add_argument("--guardar-baseline", action="store_true",
+                        help="Guarda estos resultados como nueva línea base")
+    args = parser.parse_args()
+
+    with open(os.path.join(RAIZ, "personajes_data.json"), "r", encoding="utf-8") as f:
+        datos = json.load(f)
+
+    referencia = calibrar()
+    resultados = medir_escalas(datos, args.escalas, args)
+
+    baseline = None
+    if not args.guardar_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+        # Confirmar las posibles regresiones con una segunda medida
+        regresiones = comparar(resultados, referencia, baseline, args.umbral)
+        escalas = sorted({int(escenario.split("/")[0][1:]) for escenario, _, _ in regresiones})
+        if escalas:
+            print(f"Repitiendo las escalas con posibles regresiones: {escalas}")
+            for escenario, metricas in medir_escalas(datos, escalas, args).items():
+                if metricas["personajes_por_segundo"] > resultados[escenario]["personajes_por_segundo"]:
+                    resultados[escenario] = metricas
+
+    for escenario, metricas in resultados.items():
+        print(f"{escenario:<58}{metricas['personajes_por_segundo']:>14,.0f}/s"
+              f"{metricas['latencia_p50_us']:>12,.1f} µs")
+
+    informe = {
+        "fecha": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "plataforma": platform.platform(),
+        "referencia_ops": referencia,
+        "parametros": {"n": args.n, "n_lote": args.n_lote, "repeticiones": args.repeticiones},
+        "resultados": resultados
+    }
+    with open(args.salida, "w", encoding="utf-8") as f:
+        json.dump(informe, f, indent=2, ensure_ascii=False)
+    print(f"Resultados guardados en {args.salida}")
+
+    if args.guardar_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(informe, f, indent=2, ensure_ascii=False)
+        print(f"Línea base guardada en {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print("No hay línea base; créala con --guardar-baseline")
+        return 0
+
+    regresiones = comparar(resultados, referencia, baseline, args.umbral)
+    for escenario, referencia, actual in regresiones:
+        print(f"REGRESIÓN {escenario}: {actual:,.0f}/s frente a {referencia:,.0f}/s de la línea base")
+    return 1 if regresiones else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
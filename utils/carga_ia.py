@@ -0,0 +1,138 @@
+"""Prueba de carga del modo IA contra el servidor simulado (o cualquier endpoint)
+
+Lanza peticiones con el cliente real de PersonajeGenerator (sesión HTTP
+compartida, limitador de tasa, streaming y extractor de respuestas) desde un
+pool de hilos y mide rendimiento, latencias p50/p95/p99 y tasa de respuestas
+interpretadas correctamente.
+
+Uso: python utils/carga_ia.py --peticiones 200 --concurrencia 8 --latencia lognormal:0.3:0.4 --tasa-malformado 0.2
+     python utils/carga_ia.py --url http://127.0.0.1:8765 --detallado --stream
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from chargen import PersonajeGenerator
+from mock_api import ServidorSimulado, crear_parser, opciones_servidor
+
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(p / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+
+def crear_generador(url, args):
+    """PersonajeGenerator con la configuración del repositorio apuntando a url
+
+    Se escribe una copia temporal de config.json sin historial ni caché para
+    que la prueba no toque los archivos del usuario.
+    """
+    with open(os.path.join(RAIZ, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+
+    config["data_file"] = os.path.join(RAIZ, config.get("data_file", "personajes_data.json"))
+    config["settings"]["save_history"] = False
+    config["settings"]["ai_cache"] = {"enabled": False}
+    config["settings"]["ai_prefetch"] = {"enabled": False}
+    config["api"]["grok-2-latest"].update({
+        "api_base_url": url,
+        "api_key": config["api"]["grok-2-latest"].get("api_key") or "mock",
+        "requests_per_second": args.rps,
+        "max_concurrency": args.concurrencia,
+        "pool_size": args.concurrencia,
+        "stream": args.stream
+    })
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False, encoding="utf-8") as f:
+        json.dump(config, f)
+    try:
+        return PersonajeGenerator(f.name)
+    finally:
+        os.unlink(f.name)
+
+
+def ejecutar(generador, args):
+    """Lanza las peticiones y devuelve (segundos, [(latencia, resultado)])"""
+    def peticion(i):
+        inicio = time.perf_counter()
+        resultado = generador.generar_personaje_con_ia(args.genero, args.estilo, args.detallado, agregar_historial=False)
+        return time.perf_counter() - inicio, resultado
+
+    # Los mensajes de depuración del generador no forman parte de la medida
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrencia) as pool:
+            medidas = list(pool.map(peticion, range(args.peticiones)))
+        total = time.perf_counter() - inicio
+    return total, medidas
+
+
+def informe(total, medidas, detallado):
+    latencias = sorted(latencia for latencia, _ in medidas)
+    errores = Counter()
+    interpretadas = 0
+    for _, resultado in medidas:
+        if "error" in resultado:
+            errores[resultado.get("codigo", "conexión/formato")] += 1
+        elif detallado and "error_formato" in resultado:
+            errores["sin JSON"] += 1
+        else:
+            interpretadas += 1
+
+    n = len(medidas)
+    print(f"{n} peticiones en {total:.2f} s: {n / total:.1f} personajes/s")
+    print(f"latencia p50 {percentil(latencias, 50) * 1000:.0f} ms, "
+          f"p95 {percentil(latencias, 95) * 1000:.0f} ms, "
+          f"p99 {percentil(latencias, 99) * 1000:.0f} ms, "
+          f"máx {latencias[-1] * 1000:.0f} ms")
+    print(f"interpretadas correctamente: {interpretadas}/{n} ({interpretadas / n:.1%})")
+    for causa, cantidad in errores.most_common():
+        print(f"  fallidas ({causa}): {cantidad}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga del modo IA", parents=[crear_parser(add_help=False)])
+    parser.add_argument("--url", help="Endpoint a probar; si se omite se arranca el servidor simulado")
+    parser.add_argument("--peticiones", type=int, default=100)
+    parser.add_argument("--concurrencia", type=int, default=4)
+    parser.add_argument("--rps", type=float, default=1000.0, help="requests_per_second del limitador")
+    parser.add_argument("--detallado", action="store_true")
+    parser.add_argument("--stream", action="store_true")
+    parser.add_argument("--genero", default="aleatorio")
+    parser.add_argument("--estilo", default="fantasia")
+    args = parser.parse_args()
+
+    servidor = None
+    url = args.url
+    if url is None:
+        servidor = ServidorSimulado(args.host, 0, **opciones_servidor(args)).iniciar()
+        url = servidor.url
+
+    generador = crear_generador(url, args)
+    try:
+        total, medidas = ejecutar(generador, args)
+    finally:
+        generador.cerrar()
+        if servidor:
+            servidor.detener()
+
+    informe(total, medidas, args.detallado)
+    if servidor:
+        print(f"servidor: {servidor.peticiones} peticiones, {servidor.limitadas} 429, "
+              f"{servidor.errores} 5xx, {servidor.malformadas} malformadas")
+
+
+if __name__ == "__main__":
+    main()
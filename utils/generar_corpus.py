@@ -0,0 +1,132 @@
+"""Genera el corpus de respuestas de IA (correctas y con defectos) para bench_extractor.py
+
+Cada personaje de historico_personajes.json se serializa como lo haría un
+modelo de lenguaje y se le aplican los defectos que aparecen en respuestas
+reales. Cada línea del corpus contiene la respuesta, la ficha esperada y el
+nombre del defecto.
+
+Uso: python utils/generar_corpus.py [historico_personajes.json] [utils/corpus_respuestas.jsonl]
+"""
+import json
+import os
+import random
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMPOS = ("nombre", "titulo", "edad", "profesion", "descripcion", "motivacion", "rasgo")
+
+
+def limpio(texto, personaje, rng):
+    return texto
+
+
+def markdown(texto, personaje, rng):
+    return f"```json\n{texto}\n```"
+
+
+def texto_alrededor(texto, personaje, rng):
+    return f"¡Claro! Aquí tienes tu personaje:\n\n{texto}\n\nEspero que te sirva para tu historia."
+
+
+def coma_final(texto, personaje, rng):
+    return texto.replace("\n}", ",\n}")
+
+
+def comillas_tipograficas(texto, personaje, rng):
+    # Solo las comillas de las claves, como ocurre al copiar desde un editor
+    for campo in CAMPOS:
+        texto = texto.replace(f'"{campo}":', f"“{campo}”:")
+    return texto
+
+
+def citar_apodo(personaje):
+    """Descripción con un apodo entre comillas tipográficas (texto, no estructura)"""
+    apodo = personaje["nombre"].split()[0]
+    return f"Le llaman “{apodo}” en su tierra. {personaje.get('descripcion', '')}".strip()
+
+
+def comillas_en_valores(texto, personaje, rng):
+    # JSON válido: las comillas tipográficas del valor deben conservarse
+    ficha = {campo: personaje[campo] for campo in CAMPOS if campo in personaje}
+    ficha["descripcion"] = citar_apodo(personaje)
+    return json.dumps(ficha, ensure_ascii=False, indent=2)
+
+
+def comillas_simples(texto, personaje, rng):
+    return texto.replace("'", "’").replace('"', "'")
+
+
+def cortado(texto, personaje, rng):
+    # La respuesta se corta dentro del último campo (max_tokens agotado)
+    ultimo = texto.rfind('": "')
+    return texto[:ultimo + 4 + rng.randint(1, 10)]
+
+
+def sin_comas(texto, personaje, rng):
+    return texto.replace(",\n", "\n")
+
+
+def claves_sin_comillas(texto, personaje, rng):
+    for campo in CAMPOS:
+        texto = texto.replace(f'"{campo}":', f"{campo}:")
+    return texto
+
+
+def edad_texto(texto, personaje, rng):
+    return texto.replace(f'"edad": {personaje["edad"]}', f'"edad": "{personaje["edad"]} años"')
+
+
+def comentarios(texto, personaje, rng):
+    return texto.replace("{\n", "{\n  // Ficha generada\n", 1)
+
+
+def texto_plano(texto, personaje, rng):
+    lineas = [f"**{personaje['nombre']}**", ""]
+    for campo in CAMPOS[1:]:
+        if campo in personaje:
+            lineas.append(f"{campo.capitalize()}: {personaje[campo]}")
+    return "\n".join(lineas)
+
+
+DEFECTOS = (
+    limpio, markdown, texto_alrededor, coma_final, comillas_tipograficas, comillas_simples,
+    cortado, sin_comas, claves_sin_comillas, edad_texto, comentarios, texto_plano,
+    comillas_en_valores
+)
+
+
+def esperado(personaje, defecto):
+    ficha = {campo: personaje[campo] for campo in CAMPOS if campo in personaje}
+    if defecto is cortado:
+        # Del último campo solo se puede recuperar la parte recibida
+        ficha.pop(list(ficha)[-1])
+    elif defecto is comillas_en_valores:
+        ficha["descripcion"] = citar_apodo(personaje)
+    return ficha
+
+
+def generar(origen, destino, semilla=12345):
+    with open(origen, "r", encoding="utf-8") as f:
+        personajes = json.load(f)
+
+    rng = random.Random(semilla)
+    lineas = 0
+    with open(destino, "w", encoding="utf-8") as f:
+        for personaje in personajes:
+            ficha = {campo: personaje[campo] for campo in CAMPOS if campo in personaje}
+            texto = json.dumps(ficha, ensure_ascii=False, indent=2)
+            for defecto in DEFECTOS:
+                entrada = {
+                    "respuesta": defecto(texto, personaje, rng),
+                    "esperado": esperado(personaje, defecto),
+                    "defecto": defecto.__name__
+                }
+                f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                lineas += 1
+    return lineas
+
+
+if __name__ == "__main__":
+    origen = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, "historico_personajes.json")
+    destino = sys.argv[2] if len(sys.argv) > 2 else os.path.join(RAIZ, "utils", "corpus_respuestas.jsonl")
+    print(f"{generar(origen, destino)} respuestas escritas en {destino}")
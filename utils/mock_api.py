@@ -0,0 +1,260 @@
+"""Servidor local compatible con /chat/completions para pruebas y benchmarks
+
+Simula el endpoint de IA sin coste: responde a los prompts de chargen.py
+(nombre, personaje detallado, lista de nombres y lista de personajes) con
+personajes tomados de historico_personajes.json, con latencia configurable,
+errores 5xx, 429 con Retry-After, una proporción de respuestas con JSON
+defectuoso (los mismos defectos del corpus de generar_corpus.py) y
+streaming SSE cuando la petición lleva "stream": true.
+
+Uso: python utils/mock_api.py --puerto 8765 --latencia lognormal:0.4:0.3 --tasa-429 0.05 --tasa-malformado 0.2
+y en config.json: "api_base_url": "http://127.0.0.1:8765"
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generar_corpus import DEFECTOS, limpio, texto_plano
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMPOS = ("nombre", "titulo", "edad", "profesion", "descripcion", "motivacion", "rasgo")
+
+# Clasificación de los prompts de config.json
+PATRON_CANTIDAD = re.compile(r"\b(?:Genera|Crea) (\d+)")
+
+# Los defectos de texto plano no tienen sentido para un array de personajes
+DEFECTOS_LISTA = tuple(d for d in DEFECTOS if d not in (limpio, texto_plano))
+
+
+def parsear_latencia(especificacion):
+    """Convierte "tipo:param[:param]" en una función rng -> segundos
+
+    Tipos: fija:s, uniforme:min:max, normal:media:desviacion,
+    lognormal:mediana:sigma, exponencial:media.
+    """
+    tipo, *params = especificacion.split(":")
+    params = [float(p) for p in params]
+    distribuciones = {
+        "fija": lambda rng: params[0],
+        "uniforme": lambda rng: rng.uniform(params[0], params[1]),
+        "normal": lambda rng: rng.gauss(params[0], params[1]),
+        "lognormal": lambda rng: rng.lognormvariate(math.log(params[0]), params[1]),
+        "exponencial": lambda rng: rng.expovariate(1.0 / params[0]),
+    }
+    if tipo not in distribuciones:
+        raise ValueError(f"Distribución de latencia desconocida: {tipo}")
+    distribucion = distribuciones[tipo]
+    return lambda rng: max(0.0, distribucion(rng))
+
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Los clientes cierran sus conexiones keep-alive al terminar
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class ServidorSimulado:
+    """Servidor HTTP en un hilo propio que imita la API de chat de OpenAI"""
+
+    def __init__(self, host="127.0.0.1", puerto=8765, latencia="fija:0", tasa_error=0.0, tasa_429=0.0,
+                 retry_after=1.0, tasa_malformado=0.0, intervalo_stream=0.01, personajes=None, semilla=None):
+        self.latencia = parsear_latencia(latencia)
+        self.tasa_error = tasa_error
+        self.tasa_429 = tasa_429
+        self.retry_after = retry_after
+        self.tasa_malformado = tasa_malformado
+        self.intervalo_stream = intervalo_stream
+        self.rng = random.Random(semilla)
+        self._lock = threading.Lock()
+
+        if personajes is None:
+            with open(os.path.join(RAIZ, "historico_personajes.json"), "r", encoding="utf-8") as f:
+                personajes = json.load(f)
+        self.personajes = [{c: p[c] for c in CAMPOS if c in p} for p in personajes]
+
+        # Contadores de lo servido, para contrastar con lo que mide el cliente
+        self.peticiones = 0
+        self.errores = 0
+        self.limitadas = 0
+        self.malformadas = 0
+
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                servidor._atender(self)
+
+            def log_message(self, formato, *args):
+                pass
+
+        self.httpd = _ServidorHTTP((host, puerto), Manejador)
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._hilo = None
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self.httpd.serve_forever, name="mock-api", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _sortear(self):
+        """Sortea (latencia, resultado, malformada) de una petición con el lock tomado"""
+        with self._lock:
+            self.peticiones += 1
+            latencia = self.latencia(self.rng)
+            suerte = self.rng.random()
+            if suerte < self.tasa_429:
+                self.limitadas += 1
+                return latencia, 429, False
+            if suerte < self.tasa_429 + self.tasa_error:
+                self.errores += 1
+                return latencia, 500, False
+            malformada = self.rng.random() < self.tasa_malformado
+            if malformada:
+                self.malformadas += 1
+            return latencia, 200, malformada
+
+    def _contenido(self, prompt, malformada):
+        with self._lock:
+            rng = self.rng
+            coincidencia = PATRON_CANTIDAD.search(prompt)
+            cantidad = int(coincidencia.group(1)) if coincidencia else 1
+            elegidos = [rng.choice(self.personajes) for _ in range(cantidad)]
+
+            if "array JSON" in prompt:
+                texto = json.dumps(elegidos, ensure_ascii=False, indent=2)
+                defecto = rng.choice(DEFECTOS_LISTA) if malformada else limpio
+            elif "objeto JSON" in prompt:
+                texto = json.dumps(elegidos[0], ensure_ascii=False, indent=2)
+                defecto = rng.choice(DEFECTOS[1:]) if malformada else limpio
+            elif coincidencia:
+                return ", ".join(p["nombre"] for p in elegidos)
+            else:
+                return elegidos[0]["nombre"]
+            return defecto(texto, elegidos[0], rng)
+
+    def _atender(self, peticion):
+        longitud = int(peticion.headers.get("Content-Length", 0))
+        try:
+            payload = json.loads(peticion.rfile.read(longitud) or b"{}")
+        except ValueError:
+            payload = {}
+
+        if not peticion.path.rstrip("/").endswith("/chat/completions"):
+            self._responder(peticion, 404, {"error": {"message": "Ruta no encontrada"}})
+            return
+
+        latencia, estado, malformada = self._sortear()
+        time.sleep(latencia)
+
+        if estado == 429:
+            self._responder(peticion, 429, {"error": {"message": "Rate limit exceeded"}},
+                            {"Retry-After": f"{self.retry_after:g}"})
+            return
+        if estado != 200:
+            self._responder(peticion, estado, {"error": {"message": "Internal server error"}})
+            return
+
+        mensajes = payload.get("messages") or [{}]
+        contenido = self._contenido(mensajes[-1].get("content", ""), malformada)
+        modelo = payload.get("model", "mock")
+
+        if payload.get("stream"):
+            self._responder_stream(peticion, contenido, modelo)
+            return
+
+        self._responder(peticion, 200, {
+            "id": f"mock-{self.peticiones}",
+            "object": "chat.completion",
+            "model": modelo,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": contenido}, "finish_reason": "stop"}],
+            "usage": {"completion_tokens": len(contenido) // 4}
+        })
+
+    @staticmethod
+    def _responder(peticion, estado, cuerpo, cabeceras=None):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        peticion.send_response(estado)
+        peticion.send_header("Content-Type", "application/json")
+        peticion.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in (cabeceras or {}).items():
+            peticion.send_header(nombre, valor)
+        peticion.end_headers()
+        peticion.wfile.write(datos)
+
+    def _responder_stream(self, peticion, contenido, modelo):
+        peticion.send_response(200)
+        peticion.send_header("Content-Type", "text/event-stream")
+        peticion.send_header("Transfer-Encoding", "chunked")
+        peticion.end_headers()
+
+        def enviar(datos):
+            bloque = f"data: {datos}\n\n".encode("utf-8")
+            peticion.wfile.write(f"{len(bloque):X}\r\n".encode() + bloque + b"\r\n")
+            peticion.wfile.flush()
+
+        # Fragmentos de unos pocos caracteres, como los tokens de un modelo real
+        for i in range(0, len(contenido), 8):
+            fragmento = {"model": modelo, "choices": [{"index": 0, "delta": {"content": contenido[i:i + 8]}}]}
+            enviar(json.dumps(fragmento, ensure_ascii=False))
+            if self.intervalo_stream:
+                time.sleep(self.intervalo_stream)
+        enviar("[DONE]")
+        peticion.wfile.write(b"0\r\n\r\n")
+
+
+def crear_parser(add_help=True):
+    parser = argparse.ArgumentParser(description="Servidor local compatible con /chat/completions", add_help=add_help)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia", default="fija:0",
+                        help="fija:s, uniforme:min:max, normal:media:desv, lognormal:mediana:sigma, exponencial:media")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Proporción de respuestas 500")
+    parser.add_argument("--tasa-429", type=float, default=0.0, help="Proporción de respuestas 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Segundos de la cabecera Retry-After")
+    parser.add_argument("--tasa-malformado", type=float, default=0.0, help="Proporción de JSON defectuoso")
+    parser.add_argument("--intervalo-stream", type=float, default=0.01, help="Segundos entre fragmentos SSE")
+    parser.add_argument("--semilla", type=int, default=None)
+    return parser
+
+
+def opciones_servidor(args):
+    """Argumentos de ServidorSimulado a partir de los de crear_parser()"""
+    return {
+        "latencia": args.latencia,
+        "tasa_error": args.tasa_error,
+        "tasa_429": args.tasa_429,
+        "retry_after": args.retry_after,
+        "tasa_malformado": args.tasa_malformado,
+        "intervalo_stream": args.intervalo_stream,
+        "semilla": args.semilla,
+    }
+
+
+if __name__ == "__main__":
+    args = crear_parser().parse_args()
+    servidor = ServidorSimulado(args.host, args.puerto, **opciones_servidor(args))
+    print(f"Servidor simulado en {servidor.url}/chat/completions (Ctrl+C para salir)")
+    try:
+        servidor.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.httpd.server_close()
+        print(f"{servidor.peticiones} peticiones: {servidor.limitadas} 429, "
+              f"{servidor.errores} 5xx, {servidor.malformadas} malformadas")